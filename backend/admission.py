@@ -0,0 +1,480 @@
+"""Per-client admission control for the expensive endpoints.
+
+Clients are identified by API key (``X-API-Key`` or ``Authorization: Bearer``)
+or by IP, trusting ``X-Forwarded-For`` only when the peer is a known proxy
+(nginx on 127.0.0.1). Each client gets a token bucket; its state lives in a
+pluggable backend so several workers can share it (SQLite on one host,
+Redis across hosts).
+Admitted requests then go through a weighted fair queue: when every slot is
+busy, the next slot goes to the waiting request with the smallest virtual
+finish time, so one noisy client cannot starve the rest.
+"""
+
+import asyncio
+import heapq
+import ipaddress
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.metrics import (
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_REJECTIONS,
+)
+from backend.shared_state import RedisSharedState, SharedState
+
+# Tope del header Retry-After (segundos).
+MAX_RETRY_AFTER = 3600.0
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, status_code: int, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class ClientIdentity:
+    key: str
+    weight: float = 1.0
+
+
+@dataclass(frozen=True)
+class ApiClient:
+    name: str
+    weight: float = 1.0
+
+
+def parse_api_keys(spec: str) -> dict[str, ApiClient]:
+    """``name:key[:weight],...`` -> ``{key: ApiClient}``."""
+    clients = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        parts = entry.split(":")
+        if len(parts) not in (2, 3) or not parts[1]:
+            raise ValueError(f"Invalid API key entry: {entry!r}")
+        weight = float(parts[2]) if len(parts) == 3 else 1.0
+        clients[parts[1]] = ApiClient(name=parts[0], weight=weight)
+    return clients
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _is_trusted(address: str, trusted: tuple) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+def api_key_client(scope, api_keys: dict[str, ApiClient]) -> ApiClient | None:
+    """Client of the API key in ``X-API-Key`` or ``Authorization: Bearer``."""
+    api_key = _header(scope, b"x-api-key")
+    if api_key is None:
+        authorization = _header(scope, b"authorization") or ""
+        if authorization.lower().startswith("bearer "):
+            api_key = authorization[7:].strip()
+    return api_keys.get(api_key) if api_key else None
+
+
+def identify_client(
+    scope, api_keys: dict[str, ApiClient], trusted_proxies: tuple
+) -> ClientIdentity:
+    client = api_key_client(scope, api_keys)
+    if client is not None:
+        return ClientIdentity(key=f"key:{client.name}", weight=client.weight)
+
+    peer = (scope.get("client") or ("unknown", 0))[0]
+    address = peer
+    if _is_trusted(peer, trusted_proxies):
+        # nginx agrega $remote_addr al final: el primer salto no confiable
+        # contando desde la derecha es el cliente real.
+        forwarded = _header(scope, b"x-forwarded-for")
+        hops = [hop.strip() for hop in (forwarded or "").split(",") if hop.strip()]
+        for hop in reversed(hops):
+            address = hop
+            if not _is_trusted(hop, trusted_proxies):
+                break
+        else:
+            address = _header(scope, b"x-real-ip") or address
+    return ClientIdentity(key=f"ip:{address}")
+
+
+class RateLimitBackend(Protocol):
+    # True si take() hace I/O y conviene correrlo en el threadpool.
+    blocking: bool
+
+    def take(
+        self, key: str, rate: float, burst: float, cost: float = 1.0
+    ) -> float:
+        """Consume ``cost`` tokens; return 0 if allowed, else seconds to wait."""
+
+    def close(self) -> None: ...
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float):
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class InMemoryRateLimitBackend:
+    blocking = False
+
+    def __init__(self, max_clients: int = 100_000, clock=time.time):
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = _refill(tokens, updated, now, rate, burst)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate if rate > 0 else float("inf")
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def close(self) -> None:
+        return None
+
+
+class SQLiteRateLimitBackend:
+    """Token buckets in a SQLite file shared by every worker on the host."""
+
+    blocking = True
+    # Cada cuántos take() se borran buckets que ya se rellenaron por completo.
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str, clock=time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._takes = 0
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=5
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self._clock()
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row else (burst, now)
+                tokens = _refill(tokens, updated, now, rate, burst)
+                wait = 0.0
+                if tokens >= cost:
+                    tokens -= cost
+                else:
+                    wait = (cost - tokens) / rate if rate > 0 else float("inf")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) "
+                    "VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._takes += 1
+                if self._takes % self.PRUNE_EVERY == 0 and rate > 0:
+                    self._conn.execute(
+                        "DELETE FROM rate_buckets WHERE updated < ?",
+                        (now - burst / rate,),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Mismo algoritmo que _refill/take, atómico dentro de Redis. El reloj es el
+# del servidor Redis para que todos los hosts vean el mismo tiempo.
+_REDIS_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+elseif rate > 0 then
+  wait = (cost - tokens) / rate
+else
+  wait = -1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+if rate > 0 then
+  redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+end
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Token buckets in a Redis-compatible server, shared across hosts."""
+
+    blocking = True
+
+    def __init__(self, client, prefix: str = "tusommelier:rate:"):
+        self.prefix = prefix
+        self._take = client.register_script(_REDIS_TAKE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        wait = float(self._take(keys=[self.prefix + key], args=[rate, burst, cost]))
+        return float("inf") if wait < 0 else wait
+
+    def close(self) -> None:
+        return None
+
+
+def build_rate_limit_backend(
+    kind: str, path: str, shared: SharedState | None = None
+) -> RateLimitBackend:
+    if kind == "memory":
+        return InMemoryRateLimitBackend()
+    if kind == "sqlite":
+        return SQLiteRateLimitBackend(path)
+    if kind == "redis":
+        if not isinstance(shared, RedisSharedState):
+            raise ValueError(
+                "ADMISSION_BACKEND=redis needs SHARED_STATE_BACKEND=redis"
+            )
+        return RedisRateLimitBackend(shared.client)
+    raise ValueError(f"Unknown rate limit backend: {kind}")
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    seq: int
+    client: str
+    future: asyncio.Future
+
+
+class FairScheduler:
+    """Weighted fair queuing over at most ``max_concurrency`` running requests.
+
+    Each queued request gets a virtual finish tag ``max(V, last[client]) +
+    cost / weight``; freed slots go to the smallest tag. A client with twice
+    the weight gets twice the share of slots while both are backlogged.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        max_queue_per_client: int,
+        max_wait: float,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.max_wait = max_wait
+        self._running = 0
+        self._heap: list[_Waiter] = []
+        self._queued: dict[str, int] = {}
+        self._last_finish: dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return sum(self._queued.values())
+
+    async def acquire(self, client: ClientIdentity, cost: float = 1.0) -> float:
+        """Wait for a slot; return the time spent queued."""
+        while self._heap and self._heap[0].future.cancelled():
+            heapq.heappop(self._heap)
+        if self._running < self.max_concurrency and not self._heap:
+            self._running += 1
+            return 0.0
+        if self.queued >= self.max_queue:
+            raise AdmissionRejected("queue_full", 503, 1.0)
+        if self._queued.get(client.key, 0) >= self.max_queue_per_client:
+            raise AdmissionRejected("client_queue_full", 429, 1.0)
+
+        start = max(self._virtual_time, self._last_finish.get(client.key, 0.0))
+        finish = start + cost / client.weight
+        self._last_finish[client.key] = finish
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(finish, next(self._seq), client.key, future)
+        heapq.heappush(self._heap, waiter)
+        self._queued[client.key] = self._queued.get(client.key, 0) + 1
+        ADMISSION_QUEUE_DEPTH.set(self.queued)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # El slot llegó justo al expirar: se devuelve.
+                self.release()
+            else:
+                waiter.future.cancel()
+                self._dequeued(waiter.client)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise AdmissionRejected("queue_timeout", 503, 1.0) from exc
+            raise
+        return time.perf_counter() - started
+
+    def _dequeued(self, client: str) -> None:
+        remaining = self._queued.get(client, 0) - 1
+        if remaining > 0:
+            self._queued[client] = remaining
+        else:
+            self._queued.pop(client, None)
+            if not self._heap:
+                self._last_finish.clear()
+        ADMISSION_QUEUE_DEPTH.set(self.queued)
+
+    def release(self) -> None:
+        while self._heap:
+            waiter = heapq.heappop(self._heap)
+            if waiter.future.cancelled():
+                continue
+            self._virtual_time = max(self._virtual_time, waiter.finish_tag)
+            self._dequeued(waiter.client)
+            waiter.future.set_result(None)
+            return
+        self._running -= 1
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        scheduler: FairScheduler,
+        rate_limits: RateLimitBackend,
+        rate: float,
+        burst: float,
+        api_keys: dict[str, ApiClient] | None = None,
+        trusted_proxies: tuple = (),
+    ):
+        self.scheduler = scheduler
+        self.rate_limits = rate_limits
+        self.rate = rate
+        self.burst = burst
+        self.api_keys = api_keys or {}
+        self.trusted_proxies = tuple(
+            ipaddress.ip_network(proxy) if isinstance(proxy, str) else proxy
+            for proxy in trusted_proxies
+        )
+
+    async def admit(self, scope) -> ClientIdentity:
+        client = identify_client(scope, self.api_keys, self.trusted_proxies)
+        rate = self.rate * client.weight
+        burst = self.burst * client.weight
+        if self.rate_limits.blocking:
+            wait = await run_in_threadpool(
+                self.rate_limits.take, client.key, rate, burst
+            )
+        else:
+            wait = self.rate_limits.take(client.key, rate, burst)
+        if wait > 0:
+            ADMISSION_REJECTIONS.labels(reason="rate_limited").inc()
+            raise AdmissionRejected("rate_limited", 429, wait)
+        try:
+            waited = await self.scheduler.acquire(client)
+        except AdmissionRejected as exc:
+            ADMISSION_REJECTIONS.labels(reason=exc.reason).inc()
+            raise
+        ADMISSION_QUEUE_WAIT.observe(waited)
+        return client
+
+    def release(self) -> None:
+        self.scheduler.release()
+
+
+class AdmissionMiddleware:
+    """Applies ``AdmissionController`` to requests for ``paths``."""
+
+    def __init__(self, app, get_controller, paths):
+        self.app = app
+        self.get_controller = get_controller
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        controller = self.get_controller()
+        if (
+            controller is None
+            or scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"].rstrip("/") not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await controller.admit(scope)
+        except AdmissionRejected as exc:
+            await _send_rejection(send, exc)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+
+async def _send_rejection(send, exc: AdmissionRejected) -> None:
+    detail = (
+        "Too many requests from this client"
+        if exc.status_code == 429
+        else "Server busy, please retry shortly"
+    )
+    # Con ``rate <= 0`` el bucket nunca se rellena y la espera es ``inf``.
+    wait = min(exc.retry_after, MAX_RETRY_AFTER)
+    retry_after = str(max(1, int(wait + 0.999)))
+    await send(
+        {
+            "type": "http.response.start",
+            "status": exc.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", retry_after.encode()),
+            ],
+        }
+    )
+    await send(
+        {
+            "type": "http.response.body",
+            "body": json.dumps({"detail": detail, "reason": exc.reason}).encode(),
+        }
+    )
@@ -0,0 +1,304 @@
+"""Response cache for repeated /conversation questions.
+
+Exact hits are looked up by normalized text (case, accents, punctuation and
+whitespace folded) plus model and system-prompt version. Paraphrases are
+caught with MinHash signatures over character shingles, indexed with LSH
+bands so a lookup only compares against a handful of candidates. Signatures
+cost O(length × num_perm) in Python, so questions longer than
+``max_similarity_length`` only get exact hits.
+
+With a ``SharedState`` backend, exact entries are also written there so
+every worker can serve them; the paraphrase index stays per worker and is
+filled as shared hits come in. That backend does blocking I/O (a SQLite
+write lock can wait up to 5 s), so async callers use ``aget``/``aput``.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.metrics import ANSWER_CACHE_REQUESTS, ANSWER_CACHE_SAVED_SECONDS
+from backend.shared_state import SharedState
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_NUMBER_RE = re.compile(r"\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+_MERSENNE_PRIME = (1 << 61) - 1
+# Overhead aproximado por entrada (dicts, tuplas, firma) para el límite de memoria.
+_ENTRY_OVERHEAD_BYTES = 512
+
+
+def normalize_text(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    without_accents = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    without_punctuation = _PUNCTUATION_RE.sub(" ", without_accents)
+    return _WHITESPACE_RE.sub(" ", without_punctuation).strip()
+
+
+def _shingles(text: str, size: int = 3) -> set[str]:
+    if len(text) <= size:
+        return {text}
+    return {text[index:index + size] for index in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        generator = hashlib.blake2b(str(seed).encode(), digest_size=8)
+        self._params = []
+        for index in range(num_perm):
+            generator.update(index.to_bytes(4, "little"))
+            digest = int.from_bytes(generator.digest(), "little")
+            a = (digest % (_MERSENNE_PRIME - 1)) + 1
+            b = (digest >> 17) % _MERSENNE_PRIME
+            self._params.append((a, b))
+
+    @property
+    def num_perm(self) -> int:
+        return len(self._params)
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        hashes = [
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little"
+            )
+            for shingle in _shingles(text)
+        ]
+        return tuple(
+            min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+            for a, b in self._params
+        )
+
+
+def _similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    matches = sum(1 for a, b in zip(left, right) if a == b)
+    return matches / len(left)
+
+
+@dataclass
+class _CacheEntry:
+    reply: str
+    expires_at: float
+    size: int
+    signature: tuple[int, ...]
+    bands: tuple[tuple, ...]
+    numbers: tuple[str, ...]
+    upstream_seconds: float
+
+
+@dataclass(frozen=True)
+class CacheHit:
+    reply: str
+    near_duplicate: bool
+
+
+class AnswerCache:
+    """LRU + TTL cache bounded by entry count and approximate bytes."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl: float = 3600.0,
+        similarity_threshold: float = 0.9,
+        num_perm: int = 64,
+        bands: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+        shared: SharedState | None = None,
+        max_similarity_length: int = 512,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.max_similarity_length = max_similarity_length
+        self._hasher = MinHasher(num_perm)
+        self._rows = num_perm // bands
+        self._bands = bands
+        self._clock = clock
+        self._entries: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+        self._band_index: dict[tuple, set[tuple]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._shared = shared
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @staticmethod
+    def make_key(text: str, model: str, prompt_version: str) -> tuple:
+        return normalize_text(text), model, prompt_version
+
+    @staticmethod
+    def _shared_key(key: tuple) -> str:
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return f"answer:{digest}"
+
+    def _get_shared(self, key: tuple) -> _CacheEntry | None:
+        raw = self._shared.get(self._shared_key(key))
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        ttl = value["expires_at"] - time.time()
+        if ttl <= 0:
+            return None
+        # Se copia a la cache local para no volver a ir al backend compartido.
+        self._store(key, value["reply"], value["upstream_seconds"], ttl)
+        with self._lock:
+            return self._entries.get(key)
+
+    def _band_keys(self, key: tuple, signature: tuple[int, ...]) -> tuple:
+        _, model, prompt_version = key
+        rows = self._rows
+        return tuple(
+            (model, prompt_version, band, signature[band * rows:(band + 1) * rows])
+            for band in range(self._bands)
+        )
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for band_key in entry.bands:
+            members = self._band_index.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._band_index[band_key]
+
+    def _live_entry(self, key: tuple, now: float) -> _CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            return None
+        return entry
+
+    def get(self, key: tuple) -> CacheHit | None:
+        now = self._clock()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            near_duplicate = False
+            if entry is None and self.similarity_threshold < 1:
+                entry_key = self._find_near_duplicate(key, now)
+                if entry_key is not None:
+                    entry = self._entries[entry_key]
+                    key = entry_key
+                    near_duplicate = True
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self._shared is not None:
+            entry = self._get_shared(key)
+        if entry is None:
+            ANSWER_CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+        ANSWER_CACHE_REQUESTS.labels(
+            result="near_hit" if near_duplicate else "hit"
+        ).inc()
+        ANSWER_CACHE_SAVED_SECONDS.inc(entry.upstream_seconds)
+        return CacheHit(reply=entry.reply, near_duplicate=near_duplicate)
+
+    async def aget(self, key: tuple) -> CacheHit | None:
+        """``get`` for the event loop; shared-backend lookups run in a thread."""
+        if self._shared is None:
+            return self.get(key)
+        return await run_in_threadpool(self.get, key)
+
+    def _signature(self, text: str) -> tuple[int, ...]:
+        """MinHash signature, or ``()`` for text too long to hash cheaply."""
+        if len(text) > self.max_similarity_length:
+            return ()
+        return self._hasher.signature(text)
+
+    def _find_near_duplicate(self, key: tuple, now: float) -> tuple | None:
+        signature = self._signature(key[0])
+        if not signature:
+            return None
+        # "2 kg de vacío" y "3 kg de vacío" se parecen mucho pero no son la
+        # misma pregunta: los números tienen que coincidir exactamente.
+        numbers = tuple(_NUMBER_RE.findall(key[0]))
+        candidates: set[tuple] = set()
+        for band_key in self._band_keys(key, signature):
+            candidates.update(self._band_index.get(band_key, ()))
+        best_key, best_score = None, self.similarity_threshold
+        for candidate in candidates:
+            entry = self._live_entry(candidate, now)
+            if entry is None or entry.numbers != numbers:
+                continue
+            score = _similarity(signature, entry.signature)
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        return best_key
+
+    def put(self, key: tuple, reply: str, upstream_seconds: float = 0.0) -> None:
+        self._store(key, reply, upstream_seconds, self.ttl)
+        if self._shared is not None:
+            value = {
+                "reply": reply,
+                "upstream_seconds": upstream_seconds,
+                "expires_at": time.time() + self.ttl,
+            }
+            self._shared.set(
+                self._shared_key(key),
+                json.dumps(value, ensure_ascii=False).encode(),
+                self.ttl,
+            )
+
+    async def aput(self, key: tuple, reply: str, upstream_seconds: float = 0.0) -> None:
+        """``put`` for the event loop; shared-backend writes run in a thread."""
+        if self._shared is None:
+            self.put(key, reply, upstream_seconds)
+            return
+        await run_in_threadpool(self.put, key, reply, upstream_seconds)
+
+    def _store(
+        self, key: tuple, reply: str, upstream_seconds: float, ttl: float
+    ) -> None:
+        signature = self._signature(key[0])
+        size = len(reply.encode()) + len(key[0].encode()) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            bands = self._band_keys(key, signature) if signature else ()
+            self._entries[key] = _CacheEntry(
+                reply=reply,
+                expires_at=self._clock() + ttl,
+                size=size,
+                signature=signature,
+                bands=bands,
+                numbers=tuple(_NUMBER_RE.findall(key[0])),
+                upstream_seconds=upstream_seconds,
+            )
+            self._bytes += size
+            for band_key in bands:
+                self._band_index.setdefault(band_key, set()).add(key)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def bypass(self) -> None:
+        ANSWER_CACHE_REQUESTS.labels(result="bypass").inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._band_index.clear()
+            self._bytes = 0
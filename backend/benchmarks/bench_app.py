@@ -0,0 +1,67 @@
+"""``backend.main:app`` plus an event-loop lag probe, for the load harness.
+
+Run with ``uvicorn backend.benchmarks.bench_app:app``. ``GET /__bench/lag``
+returns lag percentiles since the previous call and resets the samples.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+
+from backend.main import app as backend_app
+
+LAG_PATH = "/__bench/lag"
+PROBE_INTERVAL = 0.01
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile of ``values`` (``fraction`` in 0..1)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LagProbeApp:
+    def __init__(self, app, interval: float = PROBE_INTERVAL):
+        self.app = app
+        self.interval = interval
+        self._samples: deque[float] = deque(maxlen=100_000)
+        self._task: asyncio.Task | None = None
+
+    async def _probe(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, time.perf_counter() - expected))
+
+    def _snapshot(self) -> dict:
+        samples = list(self._samples)
+        self._samples.clear()
+        return {
+            "samples": len(samples),
+            "p50": percentile(samples, 0.50),
+            "p99": percentile(samples, 0.99),
+            "max": max(samples, default=None),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if self._task is None and scope["type"] in ("lifespan", "http"):
+            self._task = asyncio.ensure_future(self._probe())
+        if scope["type"] == "http" and scope["path"] == LAG_PATH:
+            body = json.dumps(self._snapshot()).encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"application/json")],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+        await self.app(scope, receive, send)
+
+
+app = LagProbeApp(backend_app)
@@ -0,0 +1,298 @@
+"""Load-test ``backend.main:app`` against local Tavus/OpenAI stubs.
+
+Example::
+
+    python -m backend.benchmarks.harness --scenario conversation \\
+        --concurrency 1,8,32 --duration 10 \\
+        --openai-latency lognormal:0.4,0.5 --output bench.json
+
+The backend runs in its own uvicorn process (so the load generator does not
+share its event loop or GIL); ``--workers 1,2,4`` repeats the run with that
+many uvicorn workers to measure scaling. Results are JSON: one entry per
+worker count and concurrency level with RPS, latency percentiles, status
+counts and backend event-loop lag, plus the git commit so runs can be
+compared.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+from backend.benchmarks.bench_app import LAG_PATH, percentile
+from backend.benchmarks.stubs import (
+    OpenAIStubConfig,
+    StubServer,
+    TavusStubConfig,
+    build_openai_stub,
+    build_tavus_stub,
+    parse_latency,
+)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+QUESTIONS = (
+    "¿Qué vino va con un vacío a la parrilla?",
+    "¿Cuánto tiempo cocino una entraña?",
+    "¿Cuántos kilos de asado compro para {n} personas?",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _request_factory(scenario: str, language: str):
+    counter = itertools.count()
+
+    def conversation() -> tuple[str, dict]:
+        n = next(counter)
+        question = QUESTIONS[n % len(QUESTIONS)].format(n=n)
+        return "/conversation", {"text": f"{question} #{n}"}
+
+    def tavus() -> tuple[str, dict]:
+        return "/tavus/conversations", {"language": language}
+
+    if scenario == "conversation":
+        return conversation
+    if scenario == "tavus":
+        return tavus
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def run_level(
+    base_url: str,
+    scenario: str,
+    concurrency: int,
+    duration: float,
+    language: str = "spanish",
+) -> dict:
+    """Drive ``concurrency`` closed-loop clients for ``duration`` seconds."""
+    next_request = _request_factory(scenario, language)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as http_client:
+        await http_client.get(LAG_PATH)  # descarta muestras previas
+        deadline = time.perf_counter() + duration
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                path, body = next_request()
+                started = time.perf_counter()
+                try:
+                    response = await http_client.post(path, json=body)
+                    statuses[str(response.status_code)] += 1
+                except httpx.HTTPError as exc:
+                    statuses[type(exc).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        lag = (await http_client.get(LAG_PATH)).json()
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies, default=None),
+        },
+        "status": dict(statuses),
+        "event_loop_lag": lag,
+    }
+
+
+def _start_backend(port: int, env: dict, workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.benchmarks.bench_app:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+            "--workers",
+            str(workers),
+        ],
+        cwd=REPO_ROOT,
+        env={**os.environ, **env},
+    )
+
+
+def _wait_healthy(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Backend exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Backend did not become healthy")
+
+
+def run_benchmark(
+    scenario: str,
+    concurrency_levels: list[int],
+    duration: float,
+    tavus_config: TavusStubConfig,
+    openai_config: OpenAIStubConfig,
+    language: str = "spanish",
+    backend_env: dict | None = None,
+    worker_counts: list[int] | None = None,
+) -> dict:
+    tavus = StubServer(build_tavus_stub(tavus_config)).start()
+    openai = StubServer(build_openai_stub(openai_config)).start()
+    env = {
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{openai.url}/v1",
+        "TAVUS_API_KEY": "bench",
+        "TAVUS_API_URL": tavus.url,
+        "ANSWER_CACHE_ENABLED": "false",
+        # QUESTIONS incluye preguntas que el fast path contesta sin OpenAI.
+        "FAST_PATH_ENABLED": "false",
+        # Todo el tráfico sale de 127.0.0.1: el rate limit por IP lo frenaría.
+        "ADMISSION_ENABLED": "false",
+        "TRACING_EXPORTER": "none",
+        **(backend_env or {}),
+    }
+    results = []
+    try:
+        for workers in worker_counts or [1]:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            with tempfile.TemporaryDirectory() as metrics_dir:
+                worker_env = dict(env)
+                if workers > 1:
+                    worker_env.setdefault("PROMETHEUS_MULTIPROC_DIR", metrics_dir)
+                process = _start_backend(port, worker_env, workers)
+                try:
+                    _wait_healthy(base_url, process, timeout=30)
+                    for level in concurrency_levels:
+                        result = asyncio.run(
+                            run_level(base_url, scenario, level, duration, language)
+                        )
+                        results.append({"workers": workers, **result})
+                finally:
+                    process.terminate()
+                    process.wait(timeout=10)
+    finally:
+        tavus.stop()
+        openai.stop()
+    return {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "backend_env": {
+            key: value for key, value in env.items() if "KEY" not in key
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario", choices=("conversation", "tavus"), default="conversation"
+    )
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument(
+        "--workers",
+        default="1",
+        help="Comma separated uvicorn worker counts to compare, e.g. 1,2,4.",
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--language", default="spanish")
+    parser.add_argument("--openai-latency", default="lognormal:0.4,0.5")
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--tavus-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--tavus-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--tavus-accept-languages",
+        default="",
+        help="Comma separated; other languages get 400 (empty accepts all).",
+    )
+    parser.add_argument("--tavus-reject-voice-overrides", action="store_true")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra environment for the backend process.",
+    )
+    parser.add_argument("--output", help="Write JSON here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    accepted = {
+        language.strip().lower()
+        for language in args.tavus_accept_languages.split(",")
+        if language.strip()
+    }
+    report = run_benchmark(
+        scenario=args.scenario,
+        concurrency_levels=[int(level) for level in args.concurrency.split(",")],
+        duration=args.duration,
+        tavus_config=TavusStubConfig(
+            latency=parse_latency(args.tavus_latency),
+            accepted_languages=frozenset(accepted) if accepted else None,
+            reject_voice_overrides=args.tavus_reject_voice_overrides,
+            error_rate=args.tavus_error_rate,
+        ),
+        openai_config=OpenAIStubConfig(
+            latency=parse_latency(args.openai_latency),
+            error_rate=args.openai_error_rate,
+        ),
+        language=args.language,
+        backend_env=dict(item.split("=", 1) for item in args.env),
+        worker_counts=[int(workers) for workers in args.workers.split(",")],
+    )
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
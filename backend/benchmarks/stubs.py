@@ -0,0 +1,192 @@
+"""Local stand-ins for the Tavus and OpenAI HTTP APIs used by the benchmarks.
+
+Both stubs answer with the minimum JSON the backend (and the OpenAI SDK)
+needs, after sleeping for a delay drawn from a configurable distribution.
+The Tavus stub can reject payloads the way the real API does, so the
+fallback ladder is exercised under load.
+"""
+
+import asyncio
+import itertools
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from backend.tavus_ladder import VOICE_OVERRIDE_KEYS
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Build a delay sampler from ``kind:params`` (seconds).
+
+    ``const:0.2``, ``uniform:0.1,0.5``, ``lognormal:median,sigma`` and
+    ``exp:mean`` are supported; a bare number means ``const``.
+    """
+    kind, _, params = spec.partition(":")
+    if not params:
+        kind, params = "const", kind
+    values = [float(value) for value in params.split(",")]
+    if kind == "const" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    if kind == "exp" and len(values) == 1:
+        return lambda: random.expovariate(1 / values[0])
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+@dataclass
+class TavusStubConfig:
+    latency: Callable[[], float] = field(default=lambda: 0.0)
+    # None acepta cualquier idioma; si no, el resto recibe 400 como en Tavus.
+    accepted_languages: frozenset[str] | None = None
+    reject_voice_overrides: bool = False
+    error_rate: float = 0.0
+
+
+@dataclass
+class OpenAIStubConfig:
+    latency: Callable[[], float] = field(default=lambda: 0.0)
+    reply: str = "Un Malbec joven va muy bien con el vacío."
+    error_rate: float = 0.0
+
+
+def build_tavus_stub(config: TavusStubConfig) -> FastAPI:
+    app = FastAPI()
+    counter = itertools.count(1)
+
+    @app.post("/v2/conversations")
+    async def create_conversation(request: Request):
+        payload = await request.json()
+        await asyncio.sleep(config.latency())
+        if random.random() < config.error_rate:
+            return JSONResponse({"error": "stub failure"}, status_code=500)
+        properties = payload.get("properties", {})
+        language = str(properties.get("language", "")).lower()
+        if (
+            config.accepted_languages is not None
+            and language not in config.accepted_languages
+        ):
+            return JSONResponse({"error": "invalid language"}, status_code=400)
+        if config.reject_voice_overrides and VOICE_OVERRIDE_KEYS & set(properties):
+            return JSONResponse({"error": "unknown properties"}, status_code=400)
+        conversation_id = f"stub-{next(counter)}"
+        return {
+            "conversation_id": conversation_id,
+            "conversation_url": f"https://tavus.stub/{conversation_id}",
+            "status": "active",
+        }
+
+    @app.post("/v2/conversations/{conversation_id}/end")
+    async def end_conversation(conversation_id: str):
+        return {"conversation_id": conversation_id, "status": "ended"}
+
+    return app
+
+
+def build_openai_stub(config: OpenAIStubConfig) -> FastAPI:
+    app = FastAPI()
+
+    async def _delay_or_fail() -> JSONResponse | None:
+        await asyncio.sleep(config.latency())
+        if random.random() < config.error_rate:
+            return JSONResponse(
+                {"error": {"message": "stub failure", "type": "server_error"}},
+                status_code=500,
+            )
+        return None
+
+    @app.post("/v1/responses")
+    async def responses(request: Request):
+        body = await request.json()
+        error = await _delay_or_fail()
+        if error is not None:
+            return error
+        return {
+            "id": "resp_stub",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model", "stub"),
+            "status": "completed",
+            "output": [
+                {
+                    "id": "msg_stub",
+                    "type": "message",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [
+                        {"type": "output_text", "text": config.reply, "annotations": []}
+                    ],
+                }
+            ],
+            "usage": {
+                "input_tokens": 200,
+                "input_tokens_details": {"cached_tokens": 128},
+                "output_tokens": 20,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 220,
+            },
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = await _delay_or_fail()
+        if error is not None:
+            return error
+        return {
+            "id": "chatcmpl_stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": config.reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 200, "completion_tokens": 20},
+        }
+
+    return app
+
+
+class StubServer:
+    """Runs an ASGI app with uvicorn in a background thread."""
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0):
+        config = uvicorn.Config(
+            app, host=host, port=port, log_level="warning", lifespan="off"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        (sock,) = self._server.servers[0].sockets
+        host, port = sock.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, timeout: float = 10.0) -> "StubServer":
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Stub server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a limiter slot cannot be obtained in time."""
+
+
+class ConcurrencyLimiter:
+    """Bounded semaphore with a capped wait queue.
+
+    At most ``max_concurrency`` callers run at once. Up to ``max_queue``
+    additional callers may wait for a slot, each for at most ``max_wait``
+    seconds; anyone beyond that is rejected immediately so that load is shed
+    instead of piling up on the event loop.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self) -> None:
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                raise ConcurrencyLimitExceeded("wait queue is full")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError as exc:
+                raise ConcurrencyLimitExceeded(
+                    f"no slot available after {self.max_wait:g}s"
+                ) from exc
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self._in_flight += 1
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
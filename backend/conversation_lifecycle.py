@@ -0,0 +1,398 @@
+"""Tavus conversation slots, idle reaping and the quota wait queue.
+
+Tavus caps how many conversations an account may have open at once. Every
+conversation created through the backend holds a slot until it is ended:
+by the client (``POST /tavus/conversations/{id}/end``, authorized by the
+control token issued with the conversation), by Tavus (webhook or status
+check) or by the reaper, once it stops sending heartbeats for
+``idle_timeout`` seconds. Conversations that never sent a heartbeat are not
+cut off: every ``idle_timeout`` the reaper claims them so their status can be
+checked on Tavus, which ends abandoned calls by itself. ``max_duration``
+(off by default) is a hard cap for every conversation.
+
+When every slot is taken, requests get a ticket in a FIFO queue and poll
+it; each poll reports the position and a rough wait estimate, and the
+ticket is granted a slot once enough of them free up. Tickets that stop
+polling for ``ticket_ttl`` seconds are dropped.
+
+State lives in SQLite: ``:memory:`` for a single worker, or a file shared
+by every worker on the host.
+"""
+
+import hashlib
+import json
+import math
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+
+from backend.metrics import (
+    TAVUS_CONVERSATION_QUEUE_DEPTH,
+    TAVUS_CONVERSATION_QUEUE_WAIT,
+    TAVUS_CONVERSATION_SLOTS_LIMIT,
+    TAVUS_CONVERSATION_SLOTS_USED,
+    TAVUS_CONVERSATIONS_ENDED,
+)
+
+
+@dataclass(frozen=True)
+class QueueTicket:
+    ticket_id: str
+    # 1 = el próximo en recibir un slot; 0 = ya tiene slot (``slot_id``).
+    position: int
+    estimated_wait: float
+    slot_id: str | None = None
+    body: dict | None = None
+
+    @property
+    def granted(self) -> bool:
+        return self.slot_id is not None
+
+    def as_dict(self) -> dict:
+        return {
+            "status": "queued",
+            "ticket_id": self.ticket_id,
+            "position": self.position,
+            "estimated_wait_seconds": math.ceil(self.estimated_wait),
+        }
+
+
+class ConversationLifecycle:
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_active: int = 0,
+        idle_timeout: float = 120.0,
+        max_duration: float = 0.0,
+        ticket_ttl: float = 30.0,
+        pending_ttl: float = 120.0,
+        expected_duration: float = 600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """``max_active=0`` tracks and reaps conversations without a quota.
+
+        ``max_duration=0`` never ends a conversation just for its age.
+        """
+        self.max_active = max_active
+        self.idle_timeout = idle_timeout
+        self.max_duration = max_duration
+        self.ticket_ttl = ticket_ttl
+        self.pending_ttl = pending_ttl
+        self._clock = clock
+        # Duración media observada (EWMA), base de la espera estimada.
+        self._average_duration = expected_duration
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=5
+        )
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tavus_slots (
+                slot_id TEXT PRIMARY KEY,
+                conversation_id TEXT UNIQUE,
+                created_at REAL NOT NULL,
+                last_heartbeat REAL,
+                token_hash TEXT,
+                checked_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS tavus_queue (
+                ticket_id TEXT PRIMARY KEY,
+                enqueued_at REAL NOT NULL,
+                last_poll REAL NOT NULL,
+                body TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS tavus_queue_order
+                ON tavus_queue (enqueued_at);
+            """
+        )
+        # Archivos creados antes de que existieran estas columnas.
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(tavus_slots)")
+        }
+        for column, kind in (("token_hash", "TEXT"), ("checked_at", "REAL")):
+            if column not in columns:
+                try:
+                    self._conn.execute(
+                        f"ALTER TABLE tavus_slots ADD COLUMN {column} {kind}"
+                    )
+                except sqlite3.OperationalError:
+                    # Otro worker la agregó primero.
+                    pass
+        TAVUS_CONVERSATION_SLOTS_LIMIT.set(max_active)
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _counts(self, conn) -> tuple[int, int]:
+        used = conn.execute("SELECT COUNT(*) FROM tavus_slots").fetchone()[0]
+        queued = conn.execute("SELECT COUNT(*) FROM tavus_queue").fetchone()[0]
+        return used, queued
+
+    def _publish(self, conn) -> None:
+        used, queued = self._counts(conn)
+        TAVUS_CONVERSATION_SLOTS_USED.set(used)
+        TAVUS_CONVERSATION_QUEUE_DEPTH.set(queued)
+
+    def _free_slots(self, conn) -> float:
+        if self.max_active <= 0:
+            return math.inf
+        used = conn.execute("SELECT COUNT(*) FROM tavus_slots").fetchone()[0]
+        return max(0, self.max_active - used)
+
+    def _new_slot(self, conn, now: float) -> str:
+        slot_id = uuid.uuid4().hex
+        conn.execute(
+            "INSERT INTO tavus_slots (slot_id, created_at) VALUES (?, ?)",
+            (slot_id, now),
+        )
+        return slot_id
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _expire_tickets(self, conn, now: float) -> None:
+        conn.execute(
+            "DELETE FROM tavus_queue WHERE last_poll < ?", (now - self.ticket_ttl,)
+        )
+
+    def _estimate(self, position: int) -> float:
+        slots = self.max_active if self.max_active > 0 else 1
+        return position * self._average_duration / slots
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            used, queued = self._counts(self._conn)
+        return {"limit": self.max_active, "used": used, "queued": queued}
+
+    def acquire(self) -> str | None:
+        """Slot for a new conversation, or ``None`` if it has to queue.
+
+        Nobody jumps the queue: while tickets are waiting, new requests
+        queue too even if a slot just freed up.
+        """
+        now = self._clock()
+        with self._lock, self._transaction() as conn:
+            self._expire_tickets(conn, now)
+            waiting = conn.execute("SELECT COUNT(*) FROM tavus_queue").fetchone()[0]
+            if waiting or self._free_slots(conn) < 1:
+                return None
+            slot_id = self._new_slot(conn, now)
+            self._publish(conn)
+        return slot_id
+
+    def enqueue(self, body: dict) -> QueueTicket:
+        now = self._clock()
+        ticket_id = uuid.uuid4().hex
+        with self._lock, self._transaction() as conn:
+            self._expire_tickets(conn, now)
+            conn.execute(
+                "INSERT INTO tavus_queue (ticket_id, enqueued_at, last_poll, body) "
+                "VALUES (?, ?, ?, ?)",
+                (ticket_id, now, now, json.dumps(body)),
+            )
+            position = conn.execute(
+                "SELECT COUNT(*) FROM tavus_queue WHERE enqueued_at <= ?", (now,)
+            ).fetchone()[0]
+            self._publish(conn)
+        return QueueTicket(ticket_id, position, self._estimate(position))
+
+    def poll(self, ticket_id: str) -> QueueTicket | None:
+        """Refresh a ticket; ``None`` if it is unknown or expired."""
+        now = self._clock()
+        with self._lock, self._transaction() as conn:
+            self._expire_tickets(conn, now)
+            row = conn.execute(
+                "SELECT enqueued_at, body FROM tavus_queue WHERE ticket_id = ?",
+                (ticket_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            enqueued_at, body = row
+            position = conn.execute(
+                "SELECT COUNT(*) FROM tavus_queue WHERE enqueued_at < ? "
+                "OR (enqueued_at = ? AND ticket_id <= ?)",
+                (enqueued_at, enqueued_at, ticket_id),
+            ).fetchone()[0]
+            if position <= self._free_slots(conn):
+                conn.execute(
+                    "DELETE FROM tavus_queue WHERE ticket_id = ?", (ticket_id,)
+                )
+                slot_id = self._new_slot(conn, now)
+                self._publish(conn)
+                TAVUS_CONVERSATION_QUEUE_WAIT.observe(now - enqueued_at)
+                return QueueTicket(ticket_id, 0, 0.0, slot_id, json.loads(body))
+            conn.execute(
+                "UPDATE tavus_queue SET last_poll = ? WHERE ticket_id = ?",
+                (now, ticket_id),
+            )
+        return QueueTicket(ticket_id, position, self._estimate(position))
+
+    def cancel(self, ticket_id: str) -> bool:
+        with self._lock, self._transaction() as conn:
+            deleted = conn.execute(
+                "DELETE FROM tavus_queue WHERE ticket_id = ?", (ticket_id,)
+            ).rowcount
+            self._publish(conn)
+        return bool(deleted)
+
+    def activate(self, slot_id: str, conversation_id: str) -> str:
+        """Attach the conversation Tavus created to its slot.
+
+        Returns the control token the client needs for heartbeat and end.
+        """
+        token = secrets.token_urlsafe(24)
+        with self._lock, self._transaction() as conn:
+            # La misma conversación nunca ocupa dos slots.
+            conn.execute(
+                "DELETE FROM tavus_slots WHERE conversation_id = ? AND slot_id != ?",
+                (conversation_id, slot_id),
+            )
+            conn.execute(
+                "UPDATE tavus_slots SET conversation_id = ?, created_at = ?, "
+                "token_hash = ? WHERE slot_id = ?",
+                (conversation_id, self._clock(), self._hash(token), slot_id),
+            )
+            self._publish(conn)
+        return token
+
+    def hand_off(self, conversation_id: str) -> str | None:
+        """Give a pre-created conversation to a client; ``None`` if unknown.
+
+        Restarts its clock and returns a fresh control token.
+        """
+        token = secrets.token_urlsafe(24)
+        with self._lock, self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE tavus_slots SET created_at = ?, last_heartbeat = NULL, "
+                "checked_at = NULL, token_hash = ? WHERE conversation_id = ?",
+                (self._clock(), self._hash(token), conversation_id),
+            ).rowcount
+        return token if updated else None
+
+    def release(self, slot_id: str) -> None:
+        """Free a slot whose conversation could not be created."""
+        with self._lock, self._transaction() as conn:
+            conn.execute("DELETE FROM tavus_slots WHERE slot_id = ?", (slot_id,))
+            self._publish(conn)
+
+    def heartbeat(self, conversation_id: str, token: str) -> bool:
+        """``False`` if the conversation is unknown or the token does not match."""
+        with self._lock, self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE tavus_slots SET last_heartbeat = ? "
+                "WHERE conversation_id = ? AND token_hash = ?",
+                (self._clock(), conversation_id, self._hash(token)),
+            ).rowcount
+        return bool(updated)
+
+    def _forget(self, rows, reason: str, now: float) -> list[str]:
+        ended = []
+        for conversation_id, created_at in rows:
+            TAVUS_CONVERSATIONS_ENDED.labels(reason=reason).inc()
+            if conversation_id is None:
+                continue
+            duration = now - created_at
+            self._average_duration = 0.8 * self._average_duration + 0.2 * duration
+            ended.append(conversation_id)
+        return ended
+
+    def finish(
+        self, conversation_id: str, reason: str = "client", token: str | None = None
+    ) -> bool:
+        """Free the slot of an ended conversation; ``False`` if unknown.
+
+        With ``token`` (client requests) it must match the control token.
+        """
+        now = self._clock()
+        query = "DELETE FROM tavus_slots WHERE conversation_id = ?"
+        params = [conversation_id]
+        if token is not None:
+            query += " AND token_hash = ?"
+            params.append(self._hash(token))
+        with self._lock, self._transaction() as conn:
+            rows = conn.execute(
+                query + " RETURNING conversation_id, created_at", params
+            ).fetchall()
+            self._forget(rows, reason, now)
+            self._publish(conn)
+        return bool(rows)
+
+    def reap(self) -> list[tuple[str, str]]:
+        """Claim conversations to end now, as ``(conversation_id, reason)``.
+
+        Rows are deleted in the same transaction, so with several workers
+        sharing the file each conversation is ended by exactly one of them.
+        """
+        now = self._clock()
+        to_end = []
+        with self._lock, self._transaction() as conn:
+            self._expire_tickets(conn, now)
+            idle = conn.execute(
+                "DELETE FROM tavus_slots WHERE conversation_id IS NOT NULL "
+                "AND last_heartbeat IS NOT NULL AND last_heartbeat < ? "
+                "RETURNING conversation_id, created_at",
+                (now - self.idle_timeout,),
+            ).fetchall()
+            to_end += [(cid, "idle") for cid in self._forget(idle, "idle", now)]
+            if self.max_duration > 0:
+                expired = conn.execute(
+                    "DELETE FROM tavus_slots WHERE conversation_id IS NOT NULL "
+                    "AND created_at < ? RETURNING conversation_id, created_at",
+                    (now - self.max_duration,),
+                ).fetchall()
+                to_end += [
+                    (cid, "max_duration")
+                    for cid in self._forget(expired, "max_duration", now)
+                ]
+            # Slots reservados por un worker que murió mientras creaba.
+            conn.execute(
+                "DELETE FROM tavus_slots WHERE conversation_id IS NULL "
+                "AND created_at < ?",
+                (now - self.pending_ttl,),
+            )
+            self._publish(conn)
+        return to_end
+
+    def claim_silent(self) -> list[str]:
+        """Conversations without heartbeats whose status is due for a check.
+
+        Each one is claimed for ``idle_timeout`` seconds, so with several
+        workers only one of them asks Tavus. Free the slot with ``finish`` if
+        Tavus reports the conversation as ended.
+        """
+        now = self._clock()
+        cutoff = now - self.idle_timeout
+        with self._lock, self._transaction() as conn:
+            rows = conn.execute(
+                "UPDATE tavus_slots SET checked_at = ? "
+                "WHERE conversation_id IS NOT NULL AND last_heartbeat IS NULL "
+                "AND created_at < ? AND (checked_at IS NULL OR checked_at < ?) "
+                "RETURNING conversation_id",
+                (now, cutoff, cutoff),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
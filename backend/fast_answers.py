@@ -0,0 +1,420 @@
+"""Deterministic answers for structured cooking questions.
+
+Some /conversation questions have table-driven answers: the internal
+temperature for a doneness ("¿a qué temperatura saco un bife a punto?"),
+the cooking time of a cut for a given weight ("¿cuánto tiempo para 2 kg de
+vacío?") and how much meat to buy for a number of guests. ``FastAnswerEngine``
+recognizes those intents with keyword rules, fills the slots (cut, weight,
+doneness, guests) and answers from the tables below in well under a
+millisecond.
+
+Every answer carries a confidence. It starts from how completely the
+slots were filled and loses ``UNKNOWN_WORD_PENALTY`` per content word the
+rule does not explain, so compound questions ("... ¿y qué vino sirvo?")
+still go to the model. The numbers match ``config/knowledge_base.yaml``.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from backend.knowledge import tokenize
+
+UNKNOWN_WORD_PENALTY = 0.15
+
+_NUMBER_WORDS = {
+    "un": 1,
+    "una": 1,
+    "uno": 1,
+    "dos": 2,
+    "tres": 3,
+    "cuatro": 4,
+    "cinco": 5,
+    "seis": 6,
+    "siete": 7,
+    "ocho": 8,
+    "nueve": 9,
+    "diez": 10,
+    "once": 11,
+    "doce": 12,
+    "quince": 15,
+    "veinte": 20,
+    "treinta": 30,
+}
+_NUMBER = r"(\d+(?:[.,]\d+)?|" + "|".join(_NUMBER_WORDS) + r")"
+_WEIGHT_RE = re.compile(
+    rf"(?:{_NUMBER}|medio)\s*(kg|kilos?|kilogramos?|grs?|gramos?|g)\b(\s+y\s+medio)?"
+)
+_GUESTS_RE = re.compile(
+    rf"{_NUMBER}\s+(personas?|invitados?|comensales?|adultos?|amigos?)\b"
+)
+_GROUP_RE = re.compile(rf"\b(?:para|somos|seremos)\s+{_NUMBER}\b")
+_KIDS_RE = re.compile(rf"{_NUMBER}\s+(?:chicos?|ninos?|nenes?|menores)\b")
+
+
+def _fold(text: str) -> str:
+    """Lowercase without accents, keeping digits and punctuation."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _number(raw: str) -> float:
+    if raw in _NUMBER_WORDS:
+        return float(_NUMBER_WORDS[raw])
+    return float(raw.replace(",", "."))
+
+
+def _format_kg(kilos: float) -> str:
+    text = f"{kilos:.1f}".rstrip("0").rstrip(".")
+    return text.replace(".", ",")
+
+
+@dataclass(frozen=True)
+class CookingTime:
+    label: str
+    minutes: tuple[int, int]
+    # Peso de referencia de ``minutes``; None = el tiempo depende del espesor.
+    reference_kg: float | None = None
+    note: str = ""
+
+
+# Parrilla, fuego según cada corte (ver config/knowledge_base.yaml).
+COOKING_TIMES = {
+    "vacio": CookingTime(
+        "el vacío", (90, 120), 2.5, "a fuego medio-bajo, empezando del lado de la grasa"
+    ),
+    "matambre": CookingTime(
+        "el matambre", (45, 60), 2.0, "a fuego medio-bajo, primero del lado de la grasa"
+    ),
+    "colita de cuadril": CookingTime(
+        "la colita de cuadril", (40, 60), 1.0, "a fuego medio"
+    ),
+    "picana": CookingTime(
+        "la picaña", (45, 60), 1.2, "con la grasa hacia abajo primero"
+    ),
+    "tapa de asado": CookingTime(
+        "la tapa de asado", (120, 150), 2.0, "a fuego muy bajo"
+    ),
+    "lomo": CookingTime(
+        "el lomo entero", (30, 45), 1.5, "sellado a fuego fuerte y terminado a medio"
+    ),
+    "bondiola": CookingTime(
+        "la bondiola entera", (90, 120), 1.5, "a fuego medio-bajo"
+    ),
+    "pollo": CookingTime(
+        "el pollo abierto", (60, 90), 2.0, "a fuego medio, con el hueso hacia abajo"
+    ),
+    "cordero": CookingTime(
+        "el cordero entero", (180, 240), 12.0, "al asador, a fuego lento"
+    ),
+    "asado de tira": CookingTime(
+        "el asado de tira", (90, 120), None, "a fuego lento, con el hueso hacia abajo"
+    ),
+    "matambrito de cerdo": CookingTime(
+        "el matambrito de cerdo", (30, 40), None, "a fuego medio"
+    ),
+    "pechito de cerdo": CookingTime(
+        "el pechito de cerdo", (90, 120), None, "a fuego lento"
+    ),
+    "bife de chorizo": CookingTime(
+        "el bife de chorizo de 3-4 cm", (6, 8), None, "por lado, a fuego fuerte-medio"
+    ),
+    "ojo de bife": CookingTime(
+        "el ojo de bife de 3-4 cm", (5, 7), None, "por lado, a fuego fuerte"
+    ),
+    "bife ancho": CookingTime(
+        "el bife ancho de 3-4 cm", (7, 9), None, "por lado, a fuego fuerte-medio"
+    ),
+    "entrana": CookingTime("la entraña", (5, 8), None, "por lado, a fuego fuerte"),
+    "chorizo": CookingTime("los chorizos", (20, 30), None, "a fuego medio"),
+    "mollejas": CookingTime("las mollejas", (30, 40), None, "a fuego medio"),
+    "chinchulines": CookingTime("los chinchulines", (40, 60), None, "a fuego lento"),
+}
+
+# Alias normalizados (sin acentos) -> clave canónica; se prueban los más largos
+# primero para que "bife de chorizo" no se lea como "chorizo".
+CUT_ALIASES = {
+    "vacio": "vacio",
+    "matambre": "matambre",
+    "matambre de cerdo": "matambrito de cerdo",
+    "matambrito": "matambrito de cerdo",
+    "matambrito de cerdo": "matambrito de cerdo",
+    "colita de cuadril": "colita de cuadril",
+    "colita": "colita de cuadril",
+    "picana": "picana",
+    "tapa de cuadril": "picana",
+    "tapa de asado": "tapa de asado",
+    "lomo": "lomo",
+    "bondiola": "bondiola",
+    "pollo": "pollo",
+    "cordero": "cordero",
+    "asado de tira": "asado de tira",
+    "tira de asado": "asado de tira",
+    "pechito": "pechito de cerdo",
+    "pechito de cerdo": "pechito de cerdo",
+    "costillas de cerdo": "pechito de cerdo",
+    "bife de chorizo": "bife de chorizo",
+    "ojo de bife": "ojo de bife",
+    "bife ancho": "bife ancho",
+    "entrana": "entrana",
+    "chorizo": "chorizo",
+    "chorizos": "chorizo",
+    "molleja": "mollejas",
+    "mollejas": "mollejas",
+    "chinchulin": "chinchulines",
+    "chinchulines": "chinchulines",
+}
+_CUT_RE = re.compile(
+    r"\b("
+    + "|".join(re.escape(alias) for alias in sorted(CUT_ALIASES, key=len, reverse=True))
+    + r")\b"
+)
+
+# Temperatura interna final y de retiro (la carne sube 2-3 °C en el reposo).
+BEEF_DONENESS = {
+    "vuelta y vuelta": ((48, 50), (46, 48)),
+    "jugoso": ((52, 55), (50, 52)),
+    "a punto": ((57, 60), (55, 57)),
+    "cocido": ((65, 70), (63, 65)),
+}
+_DONENESS_LABELS = {
+    "vuelta y vuelta": "vuelta y vuelta",
+    "jugoso": "jugosa",
+    "a punto": "a punto",
+    "cocido": "bien cocida",
+}
+_DONENESS_ALIASES = {
+    "vuelta y vuelta": "vuelta y vuelta",
+    "jugoso": "jugoso",
+    "jugosa": "jugoso",
+    "a punto": "a punto",
+    "al punto": "a punto",
+    "bien cocido": "cocido",
+    "bien cocida": "cocido",
+    "cocido": "cocido",
+    "cocida": "cocido",
+}
+_DONENESS_RE = re.compile(
+    r"\b("
+    + "|".join(sorted(_DONENESS_ALIASES, key=len, reverse=True))
+    + r")\b"
+)
+# Cortes que no son vacunos, con su propia regla de temperatura.
+_POULTRY = {"pollo"}
+_PORK = {"bondiola", "matambrito de cerdo", "pechito de cerdo"}
+
+_OTHER_METHODS = re.compile(
+    r"\b(horno|sarten|plancha|sous vide|ahumad\w*|disco|olla|freidora)\b"
+)
+
+_TIME_TRIGGERS = re.compile(
+    r"\b(cuanto tiempo|cuanto tarda|cuanto lleva|cuanto demora|cuantos minutos"
+    r"|cuantas horas|tiempo de coccion)\b"
+)
+_TEMPERATURE_TRIGGERS = re.compile(r"\b(temperatura|grados|termometro)\b")
+_PORTION_TRIGGERS = re.compile(
+    r"\b(cuanta carne|cuantos kilos|cuantos kg|cuanto compro|cuanta cantidad"
+    r"|que cantidad|cuanto asado|cuanta compro|cuantos gramos)\b"
+)
+
+# Palabras que cada intención explica además de los slots reconocidos.
+_COMMON_WORDS = set(
+    tokenize(
+        "cuanto cuanta tiempo tarda lleva demora cocinar cocino cocinarlo "
+        "cocinarla hago hacer parrilla parrillada asar asado carne fuego brasas "
+        "necesito necesitamos saber dejar dejo dejarlo aproximadamente "
+        "mas menos entero entera pieza corte bife tiene"
+    )
+)
+_INTENT_WORDS = {
+    "doneness_temperature": _COMMON_WORDS
+    | set(
+        tokenize(
+            "temperatura interna grados termometro saco saca sacar sacarlo "
+            "retiro retira retirar retirarlo punto medir queda quede quiero"
+        )
+    ),
+    "cooking_time": _COMMON_WORDS
+    | set(tokenize("minutos horas coccion tiempo lado vuelta")),
+    "portions": _COMMON_WORDS
+    | set(
+        tokenize(
+            "compro comprar compramos cantidad kilos gramos personas invitados "
+            "comensales adultos amigos chicos ninos nenes menores somos seremos "
+            "calcular calculo hay"
+        )
+    ),
+}
+
+
+@dataclass(frozen=True)
+class FastAnswer:
+    intent: str
+    reply: str
+    confidence: float
+
+
+class FastAnswerEngine:
+    def __init__(self, min_confidence: float = 0.8, max_length: int = 200):
+        self.min_confidence = min_confidence
+        self.max_length = max_length
+
+    def recognize(self, text: str) -> FastAnswer | None:
+        """Best matching intent with its answer, whatever its confidence."""
+        if not text or len(text) > self.max_length:
+            return None
+        folded = _fold(text)
+        for recognizer in (self._doneness, self._portions, self._cooking_time):
+            answer = recognizer(folded)
+            if answer is not None:
+                return answer
+        return None
+
+    def answer(self, text: str) -> FastAnswer | None:
+        """Answer only when confident enough; ``None`` means ask the model."""
+        answer = self.recognize(text)
+        if answer is None or answer.confidence < self.min_confidence:
+            return None
+        return answer
+
+    @staticmethod
+    def _confidence(intent: str, remainder: str, slots_score: float) -> float:
+        unknown = [
+            word for word in tokenize(remainder) if word not in _INTENT_WORDS[intent]
+        ]
+        return max(0.0, slots_score - UNKNOWN_WORD_PENALTY * len(unknown))
+
+    def _doneness(self, folded: str) -> FastAnswer | None:
+        if not _TEMPERATURE_TRIGGERS.search(folded):
+            return None
+        cut_match = _CUT_RE.search(folded)
+        cut = CUT_ALIASES[cut_match.group(1)] if cut_match else None
+        doneness_match = _DONENESS_RE.search(folded)
+        remainder = _DONENESS_RE.sub(" ", _CUT_RE.sub(" ", folded))
+
+        if cut in _POULTRY:
+            reply = (
+                "El pollo siempre tiene que quedar bien cocido: 74 °C en la parte "
+                "más gruesa del muslo, sin tocar el hueso."
+            )
+        elif cut in _PORK:
+            reply = (
+                "El cerdo está listo a 63 °C internos, con 5 minutos de reposo. "
+                "Así queda jugoso y apenas rosado. Para desmenuzar, como una "
+                "bondiola braseada, llevalo a unos 90 °C."
+            )
+        elif doneness_match:
+            doneness = _DONENESS_ALIASES[doneness_match.group(1)]
+            (final_low, final_high), (pull_low, pull_high) = BEEF_DONENESS[doneness]
+            reply = (
+                f"Para una carne {_DONENESS_LABELS[doneness]}, retirala a "
+                f"{pull_low}-{pull_high} °C "
+                f"internos. En el reposo sube 2-3 °C y termina en "
+                f"{final_low}-{final_high} °C. Medí en la parte más gruesa, "
+                "lejos del hueso."
+            )
+        else:
+            points = "; ".join(
+                f"{name}: {final[0]}-{final[1]} °C"
+                for name, (final, _) in BEEF_DONENESS.items()
+            )
+            reply = (
+                f"Temperatura interna de la carne vacuna: {points}. "
+                "Retirala 2-3 °C antes, porque sigue subiendo en el reposo."
+            )
+        # Sin corte ni punto la respuesta es una tabla genérica: menos segura.
+        slots_score = 1.0 if (doneness_match or cut in _POULTRY | _PORK) else 0.85
+        return FastAnswer(
+            "doneness_temperature",
+            reply,
+            self._confidence("doneness_temperature", remainder, slots_score),
+        )
+
+    def _cooking_time(self, folded: str) -> FastAnswer | None:
+        if not _TIME_TRIGGERS.search(folded):
+            return None
+        cut_match = _CUT_RE.search(folded)
+        if cut_match is None:
+            return None
+        if _OTHER_METHODS.search(folded):
+            # Las tablas son de parrilla; horno, sartén, etc. van al modelo.
+            return FastAnswer("cooking_time", "", 0.0)
+        timing = COOKING_TIMES[CUT_ALIASES[cut_match.group(1)]]
+        weight_match = _WEIGHT_RE.search(folded)
+        remainder = _WEIGHT_RE.sub(" ", _CUT_RE.sub(" ", folded))
+
+        low, high = timing.minutes
+        detail = ""
+        if timing.reference_kg is not None and weight_match:
+            kilos = self._kilos(weight_match)
+            # El tiempo crece con el espesor, no linealmente con el peso.
+            factor = min(1.8, max(0.6, (kilos / timing.reference_kg) ** 0.5))
+            low, high = (5 * round(value * factor / 5) for value in (low, high))
+            detail = f" para {_format_kg(kilos)} kg"
+        reply = (
+            f"A la parrilla, {timing.label}{detail} lleva entre "
+            f"{self._minutes(low, high)}, {timing.note}."
+        )
+        if timing.reference_kg is None and weight_match:
+            reply += " El tiempo depende del espesor, no del peso total."
+        elif timing.reference_kg is not None:
+            reply += " Para el punto exacto, guiate por el termómetro."
+        slots_score = 1.0 if weight_match or timing.reference_kg is None else 0.9
+        return FastAnswer(
+            "cooking_time",
+            reply,
+            self._confidence("cooking_time", remainder, slots_score),
+        )
+
+    def _portions(self, folded: str) -> FastAnswer | None:
+        guests_match = _GUESTS_RE.search(folded) or _GROUP_RE.search(folded)
+        if not _PORTION_TRIGGERS.search(folded) or guests_match is None:
+            return None
+        guests = _number(guests_match.group(1))
+        kids_match = _KIDS_RE.search(folded)
+        kids = _number(kids_match.group(1)) if kids_match else 0.0
+        # "8 adultos y 4 chicos" suma; "somos 12, 4 chicos" ya los incluye.
+        explicit_adults = guests_match.re is _GUESTS_RE and (
+            guests_match.group(2).startswith("adulto")
+        )
+        adults = guests if explicit_adults or kids >= guests else guests - kids
+        remainder = _KIDS_RE.sub(" ", _GROUP_RE.sub(" ", _GUESTS_RE.sub(" ", folded)))
+        if not 0 < adults + kids <= 500:
+            return FastAnswer("portions", "", 0.0)
+
+        # Un chico come más o menos la mitad que un adulto.
+        eaters = adults + kids / 2
+        with_bone = eaters * 0.45
+        boneless = eaters * 0.325
+        people = f"{int(adults)} adultos"
+        if kids:
+            people += f" y {int(kids)} chicos"
+        reply = (
+            f"Para {people} calculá unos {_format_kg(with_bone)} kg de carne con "
+            f"hueso, o {_format_kg(boneless)} kg sin hueso: 450 g o 325 g por "
+            "adulto y la mitad por chico. Las achuras van aparte. Con entradas "
+            "abundantes podés bajar a unos 300 g por persona."
+        )
+        return FastAnswer(
+            "portions", reply, self._confidence("portions", remainder, 1.0)
+        )
+
+    @staticmethod
+    def _kilos(match: re.Match) -> float:
+        amount = 0.5 if match.group(1) is None else _number(match.group(1))
+        if match.group(2).startswith("g"):
+            amount /= 1000
+        if match.group(3):
+            amount += 0.5
+        return amount
+
+    @staticmethod
+    def _minutes(low: int, high: int) -> str:
+        if high < 90:
+            return f"{low} y {high} minutos"
+
+        def hours(minutes: int) -> str:
+            whole, rest = divmod(minutes, 60)
+            return f"{whole} h {rest} min" if rest else f"{whole} h"
+
+        return f"{hours(low)} y {hours(high)}"
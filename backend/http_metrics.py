@@ -0,0 +1,116 @@
+"""Prometheus instrumentation for HTTP requests and upstream calls.
+
+``PrometheusMiddleware`` is a plain ASGI middleware (no BaseHTTPMiddleware,
+no per-request allocations beyond a closure) and labels requests with the
+matched route template, so ``/items/{id}`` is one series instead of one per
+id. The series match the rules in ``docs/slo_alerts.md``.
+"""
+
+import time
+from contextlib import asynccontextmanager
+
+from backend.metrics import (
+    HTTP_INPROGRESS_REQUESTS,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_RESPONSES,
+    UPSTREAM_REQUEST_DURATION,
+)
+
+_KNOWN_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+)
+UNMATCHED_HANDLER = "unmatched"
+
+
+def route_template(scope) -> str:
+    """Route path template matched by the router, if any."""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_HANDLER
+    return getattr(route, "path_format", None) or getattr(
+        route, "path", UNMATCHED_HANDLER
+    )
+
+
+class PrometheusMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # Los .labels() de prometheus_client cuestan varios µs; se cachean.
+        self._inprogress = {}
+        self._series = {}
+        self._responses = {}
+
+    def _request_series(self, method: str, handler: str):
+        key = (method, handler)
+        series = self._series.get(key)
+        if series is None:
+            series = (
+                HTTP_REQUESTS.labels(method=method, handler=handler),
+                HTTP_REQUEST_DURATION.labels(method=method, handler=handler),
+            )
+            self._series[key] = series
+        return series
+
+    def _response_counter(self, method: str, handler: str, status: int):
+        key = (method, handler, status)
+        counter = self._responses.get(key)
+        if counter is None:
+            counter = HTTP_RESPONSES.labels(
+                method=method, handler=handler, status=str(status)
+            )
+            self._responses[key] = counter
+        return counter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        if method not in _KNOWN_METHODS:
+            method = "OTHER"
+        inprogress = self._inprogress.get(method)
+        if inprogress is None:
+            inprogress = HTTP_INPROGRESS_REQUESTS.labels(method=method)
+            self._inprogress[method] = inprogress
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        inprogress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            inprogress.dec()
+            handler = route_template(scope)
+            requests, duration = self._request_series(method, handler)
+            requests.inc()
+            duration.observe(elapsed)
+            self._response_counter(method, handler, status).inc()
+
+
+def observe_upstream(
+    provider: str, attempt: str, outcome: str, seconds: float
+) -> None:
+    UPSTREAM_REQUEST_DURATION.labels(
+        provider=provider, attempt=attempt, outcome=outcome
+    ).observe(seconds)
+
+
+@asynccontextmanager
+async def track_upstream(provider: str, attempt: str):
+    """Time the wrapped upstream call; outcome is ``error`` if it raises."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        observe_upstream(provider, attempt, outcome, time.perf_counter() - started)
@@ -0,0 +1,301 @@
+"""Local knowledge base that grounds /conversation answers.
+
+``config/knowledge_base.yaml`` holds short snippets about cuts, cooking
+methods, doneness, wine pairings and origin. They are compiled into a BM25
+index file whose per-posting weights are precomputed, so a query only
+adds floats. ``load_knowledge_base`` rebuilds the file when the YAML
+changed and maps it read-only with ``mmap``: postings and snippet texts
+are read straight from the mapping and shared by every worker through the
+page cache. Only the vocabulary lives in a per-process dict.
+
+Each request gets the top-k snippets above ``min_score``; small talk
+("hola") matches nothing and adds nothing to the prompt.
+
+``python -m backend.knowledge`` compiles the index, searches it or
+benchmarks retrieval latency over the whole catalogue.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import yaml
+
+from backend.answer_cache import normalize_text
+from backend.metrics import KNOWLEDGE_RETRIEVAL_SECONDS, KNOWLEDGE_RETRIEVALS
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_SOURCE_PATH = os.path.join(REPO_ROOT, "config", "knowledge_base.yaml")
+DEFAULT_INDEX_PATH = os.path.join(REPO_ROOT, "data", "knowledge_base.idx")
+
+MAGIC = b"TSKB\x00\x00\x00\x01"
+_HEADER = struct.Struct("<8sI")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_STOPWORDS = frozenset(
+    """
+    a al algo como con cual cuales cuando de del desde donde el ella en entre
+    es esa ese eso esta este esto hay la las le les lo los mas me mi muy no o
+    para pero por que se si sin sobre su sus te tu un una uno unos unas y ya
+    yo vos queres quiero puedo hago hacer tengo tiene
+    """.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Accent- and case-folded terms, without stopwords or a plural ``-s``."""
+    terms = []
+    for word in normalize_text(text).split():
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+@dataclass(frozen=True)
+class Snippet:
+    snippet_id: str
+    title: str
+    text: str
+    score: float = 0.0
+
+
+def read_snippets(source_path: str) -> list[dict]:
+    with open(source_path, encoding="utf-8") as handle:
+        raw = yaml.safe_load(handle) or {}
+    snippets = raw.get("snippets") or []
+    for snippet in snippets:
+        if not snippet.get("id") or not snippet.get("text"):
+            raise ValueError(f"Knowledge snippet without id or text: {snippet!r}")
+    return snippets
+
+
+def source_version(source_path: str) -> str:
+    with open(source_path, "rb") as handle:
+        return hashlib.sha256(handle.read()).hexdigest()[:12]
+
+
+def _pad(blob: bytearray) -> None:
+    blob.extend(b"\x00" * (-len(blob) % 4))
+
+
+def compile_index(source_path: str, index_path: str) -> str:
+    """Write the BM25 index for ``source_path``; returns its version."""
+    version = source_version(source_path)
+    snippets = read_snippets(source_path)
+    documents = [
+        tokenize(
+            " ".join(
+                [snippet.get("title", ""), *snippet.get("tags", []), snippet["text"]]
+            )
+        )
+        for snippet in snippets
+    ]
+    doc_count = len(documents)
+    average_length = sum(map(len, documents)) / doc_count if doc_count else 0.0
+
+    postings: dict[str, list[tuple[int, float]]] = {}
+    for doc_id, terms in enumerate(documents):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(terms) / (average_length or 1))
+        for term, frequency in Counter(terms).items():
+            weight = frequency * (BM25_K1 + 1) / (frequency + norm)
+            postings.setdefault(term, []).append((doc_id, weight))
+
+    body = bytearray()
+    vocabulary = {}
+    for term in sorted(postings):
+        entries = postings[term]
+        idf = math.log(1 + (doc_count - len(entries) + 0.5) / (len(entries) + 0.5))
+        vocabulary[term] = [len(body), len(entries)]
+        body.extend(struct.pack(f"<{len(entries)}I", *(doc for doc, _ in entries)))
+        body.extend(
+            struct.pack(f"<{len(entries)}f", *(idf * w for _, w in entries))
+        )
+    _pad(body)
+    docs = []
+    for snippet in snippets:
+        encoded = json.dumps(
+            [snippet["id"], snippet.get("title", ""), snippet["text"].strip()],
+            ensure_ascii=False,
+        ).encode()
+        docs.append([len(body), len(encoded)])
+        body.extend(encoded)
+
+    header = json.dumps(
+        {"version": version, "terms": vocabulary, "docs": docs},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    header += b" " * (-len(header) % 4)
+
+    directory = os.path.dirname(index_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Escritura atómica: otro worker puede estar leyendo el índice anterior.
+    handle, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as output:
+            output.write(_HEADER.pack(MAGIC, len(header)))
+            output.write(header)
+            output.write(body)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return version
+
+
+class KnowledgeIndex:
+    """Read-only BM25 index over an mmap'ed index file."""
+
+    def __init__(self, index_path: str):
+        with open(index_path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a knowledge index: {index_path}")
+        start = _HEADER.size
+        header = json.loads(self._mmap[start:start + header_length])
+        self._base = start + header_length
+        self._view = memoryview(self._mmap)
+        self.version: str = header["version"]
+        self._terms: dict[str, list[int]] = header["terms"]
+        self._docs: list[list[int]] = header["docs"]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _postings(self, term: str):
+        entry = self._terms.get(term)
+        if entry is None:
+            return (), ()
+        offset, count = entry
+        start = self._base + offset
+        ids = self._view[start:start + 4 * count].cast("I")
+        weights = self._view[start + 4 * count:start + 8 * count].cast("f")
+        return ids, weights
+
+    def snippet(self, doc_id: int, score: float = 0.0) -> Snippet:
+        offset, length = self._docs[doc_id]
+        start = self._base + offset
+        snippet_id, title, text = json.loads(self._mmap[start:start + length])
+        return Snippet(snippet_id, title, text, score)
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0) -> list[Snippet]:
+        started = time.perf_counter()
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            ids, weights = self._postings(term)
+            for doc_id, weight in zip(ids, weights):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        best = sorted(
+            (item for item in scores.items() if item[1] >= min_score),
+            key=lambda item: (-item[1], item[0]),
+        )[:k]
+        results = [self.snippet(doc_id, score) for doc_id, score in best]
+        KNOWLEDGE_RETRIEVAL_SECONDS.observe(time.perf_counter() - started)
+        KNOWLEDGE_RETRIEVALS.labels(result="hit" if results else "miss").inc()
+        return results
+
+    def warm(self) -> int:
+        """Fault every page of the index in; returns the pages touched."""
+        pages = 0
+        for offset in range(0, len(self._mmap), mmap.PAGESIZE):
+            self._mmap[offset]
+            pages += 1
+        return pages
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+
+
+def load_knowledge_base(
+    source_path: str = DEFAULT_SOURCE_PATH, index_path: str = DEFAULT_INDEX_PATH
+) -> KnowledgeIndex:
+    """Map the index for ``source_path``, compiling it first if stale."""
+    version = source_version(source_path)
+    if os.path.exists(index_path):
+        index = KnowledgeIndex(index_path)
+        if index.version == version:
+            return index
+        index.close()
+    compile_index(source_path, index_path)
+    return KnowledgeIndex(index_path)
+
+
+# Preguntas de ejemplo para el benchmark, además del título de cada snippet.
+BENCH_QUERIES = (
+    "¿Cuánto tiempo a la parrilla para 2 kg de vacío?",
+    "¿A qué temperatura interna saco un bife a punto?",
+    "¿Qué vino va con un ojo de bife?",
+    "¿Cómo hago mollejas crocantes?",
+    "Diferencia entre carne de pastura y de feedlot",
+    "Quiero un corte magro para el horno",
+    "hola",
+)
+
+
+def benchmark(index: KnowledgeIndex, rounds: int = 200, k: int = 3) -> dict:
+    queries = list(BENCH_QUERIES)
+    queries += [index.snippet(doc_id).title for doc_id in range(len(index))]
+    timings = []
+    for _ in range(rounds):
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, k=k)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "snippets": len(index),
+        "queries": len(timings),
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        "max_ms": timings[-1] * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Meat knowledge base index.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE_PATH)
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="Compile the index")
+    search = commands.add_parser("search", help="Print the top-k snippets")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=3)
+    bench = commands.add_parser("bench", help="Measure retrieval latency")
+    bench.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        version = compile_index(args.source, args.index)
+        print(f"{args.index}: version {version}")
+        return 0
+    index = load_knowledge_base(args.source, args.index)
+    try:
+        if args.command == "search":
+            for snippet in index.search(args.query, k=args.k):
+                print(f"{snippet.score:6.2f}  {snippet.snippet_id}: {snippet.title}")
+        else:
+            print(json.dumps(benchmark(index, rounds=args.rounds), indent=2))
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,75 +1,421 @@
+# Primero, para que el reloj de arranque cubra el resto de los imports.
+from backend.startup import STARTUP, LazyClient
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from openai import OpenAI
 from dotenv import load_dotenv
+import asyncio
+import hashlib
+import hmac
+import inspect
 import os
 import logging
 import json
-import sentry_sdk
-import requests
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-from fastapi.responses import Response
+import math
+import signal
+import time
+import uuid
+import httpx
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask, BackgroundTasks
+
+from backend.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    ApiClient,
+    FairScheduler,
+    api_key_client,
+    build_rate_limit_backend,
+    parse_api_keys,
+)
+from backend.answer_cache import AnswerCache
+from backend.concurrency import ConcurrencyLimiter, ConcurrencyLimitExceeded
+from backend.conversation_lifecycle import ConversationLifecycle, QueueTicket
+from backend.fast_answers import FastAnswerEngine
+from backend.http_metrics import (
+    PrometheusMiddleware,
+    observe_upstream,
+    track_upstream,
+)
+from backend.knowledge import (
+    DEFAULT_INDEX_PATH,
+    DEFAULT_SOURCE_PATH,
+    KnowledgeIndex,
+    load_knowledge_base,
+)
+from backend.metrics import (
+    CONVERSATION_BATCH_ITEMS,
+    CONVERSATION_SUMMARIES,
+    FAST_PATH_REQUESTS,
+    OPENAI_CACHED_INPUT_TOKENS,
+    OPENAI_COALESCED_REQUESTS,
+    OPENAI_INPUT_TOKENS,
+    OPENAI_TIME_TO_FIRST_TOKEN,
+    TAVUS_WEBHOOK_EVENTS,
+)
+from backend.model_router import ModelRouter, parse_tiers
+from backend.prompting import (
+    SUMMARY_INSTRUCTIONS,
+    PromptBudget,
+    build_input_messages,
+    build_summary_input,
+    fit_history,
+    turns_to_summarize,
+)
+from backend.resilience import (
+    AIMDLimiter,
+    CircuitBreaker,
+    UpstreamGuard,
+    UpstreamUnavailable,
+    is_provider_failure,
+)
+from backend.session_store import Turn, build_session_backend
+from backend.shared_state import build_shared_state
+from backend.singleflight import SingleFlight
+from backend.settings import (
+    DEFAULT_SETTINGS_PATH,
+    TAVUS_MULTILINGUAL_CONTEXT,
+    SettingsStore,
+    TavusSettings,
+)
+from backend.tracing import NOOP_SPAN, TracingMiddleware, build_tracer
+from backend.tavus_ladder import (
+    VOICE_OVERRIDE_KEYS,
+    FallbackLadderMemory,
+    order_attempts,
+    payload_shape,
+)
+from backend.warm_pool import PoolProfile, TavusWarmPool
+from backend.warmup import WarmUp
+from backend.webhooks import (
+    InvalidWebhook,
+    SQLiteEventStore,
+    WebhookEvent,
+    WebhookIngestor,
+)
 
 # Cargar variables de entorno
 load_dotenv(
     dotenv_path=os.path.join(os.path.dirname(__file__), "..", "config", "secrets.env")
 )
 
-app = FastAPI()
 logger = logging.getLogger(__name__)
 
+# Cliente HTTP compartido para Tavus (keep-alive + pool de conexiones).
+# Se crea en el startup de la app y se cierra en el shutdown.
+tavus_http_client: httpx.AsyncClient | None = None
+
+
+def _build_conversation_lifecycle() -> ConversationLifecycle | None:
+    """Slots, idle reaping and quota queue for Tavus conversations."""
+    if os.getenv("TAVUS_LIFECYCLE_ENABLED", "true").strip().lower() in (
+        "0",
+        "false",
+        "no",
+    ):
+        return None
+    # Con varios workers el estado tiene que estar en un archivo compartido.
+    default_path = ":memory:"
+    if os.getenv("SHARED_STATE_BACKEND", "memory").strip().lower() != "memory":
+        default_path = os.path.join(
+            os.path.dirname(__file__), "..", "data", "tavus_lifecycle.sqlite3"
+        )
+    return ConversationLifecycle(
+        path=os.getenv("TAVUS_LIFECYCLE_PATH", default_path),
+        max_active=int(os.getenv("TAVUS_MAX_CONCURRENT_CONVERSATIONS", "0")),
+        idle_timeout=float(os.getenv("TAVUS_IDLE_TIMEOUT", "120")),
+        max_duration=float(os.getenv("TAVUS_MAX_CONVERSATION_SECONDS", "0")),
+        ticket_ttl=float(os.getenv("TAVUS_QUEUE_TICKET_TTL", "30")),
+        expected_duration=float(
+            os.getenv("TAVUS_EXPECTED_CONVERSATION_SECONDS", "600")
+        ),
+    )
 
-def _sanitize_for_log(value: object) -> str:
-    text = str(value)
-    return text.replace("\r", "\\r").replace("\n", "\\n")
 
+conversation_lifecycle = _build_conversation_lifecycle()
+TAVUS_QUEUE_POLL_SECONDS = int(os.getenv("TAVUS_QUEUE_POLL_SECONDS", "5"))
+
+# Eventos de Tavus (callback_url); el writer se crea en el startup de la app.
+webhook_ingestor: WebhookIngestor | None = None
+TAVUS_WEBHOOK_TOKEN = os.getenv("TAVUS_WEBHOOK_TOKEN", "")
+TAVUS_WEBHOOK_MAX_BYTES = int(os.getenv("TAVUS_WEBHOOK_MAX_BYTES", "65536"))
+
+
+def _build_webhook_ingestor() -> WebhookIngestor | None:
+    if os.getenv("TAVUS_WEBHOOKS_ENABLED", "true").strip().lower() in (
+        "0",
+        "false",
+        "no",
+    ):
+        return None
+    return WebhookIngestor(
+        SQLiteEventStore(
+            os.getenv(
+                "TAVUS_WEBHOOK_PATH",
+                os.path.join(
+                    os.path.dirname(__file__), "..", "data", "tavus_webhooks.sqlite3"
+                ),
+            )
+        ),
+        max_queue=int(os.getenv("TAVUS_WEBHOOK_MAX_QUEUE", "10000")),
+        batch_size=int(os.getenv("TAVUS_WEBHOOK_BATCH_SIZE", "200")),
+        flush_interval=float(os.getenv("TAVUS_WEBHOOK_FLUSH_INTERVAL", "0.5")),
+    )
 
-def _load_json_dict_env(var_name: str) -> dict:
-    raw_value = os.getenv(var_name, "").strip()
-    if not raw_value:
-        return {}
 
-    try:
-        parsed = json.loads(raw_value)
-    except json.JSONDecodeError as exc:
-        raise HTTPException(
-            status_code=500,
-            detail=f"{var_name} must be a valid JSON object",
-        ) from exc
+# Pool opcional de conversaciones Tavus pre-creadas (ver _build_tavus_warm_pool).
+tavus_warm_pool: TavusWarmPool | None = None
+WARM_POOL_BODY_KEYS = frozenset({"replica_id", "persona_id", "language"})
 
-    if not isinstance(parsed, dict):
-        raise HTTPException(
-            status_code=500,
-            detail=f"{var_name} must be a JSON object",
+
+def _build_tavus_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("TAVUS_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(
+            os.getenv("TAVUS_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+        ),
+        keepalive_expiry=float(os.getenv("TAVUS_HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    timeout = httpx.Timeout(float(os.getenv("TAVUS_HTTP_TIMEOUT", "20")))
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def _get_tavus_http_client() -> httpx.AsyncClient:
+    global tavus_http_client
+    if tavus_http_client is None or tavus_http_client.is_closed:
+        tavus_http_client = _build_tavus_http_client()
+    return tavus_http_client
+
+
+def _install_sighup_reload() -> bool:
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, settings_store.reload, True
         )
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        # Sin SIGHUP (Windows) o fuera del main thread (p. ej. TestClient).
+        return False
+    return True
 
-    return parsed
 
+# Lo setea systemd con --workers > 1; prometheus_client lo lee al importarse.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
 
-def _build_tavus_payload(body: dict) -> tuple[dict, str]:
-    replica_id = (
-        body.get("replica_id")
-        or os.getenv("TAVUS_REPLICA_ID")
-        or "rf4e9d9790f0"
+# Warm-up al arrancar; /ready responde 503 hasta que termina.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").strip().lower() not in (
+    "0",
+    "false",
+    "no",
+)
+warmup: WarmUp | None = None
+
+
+async def _warm_openai() -> None:
+    """Build the SDK client and open a pooled TLS connection to OpenAI."""
+    if isinstance(client, LazyClient):
+        await run_in_threadpool(client.resolve)
+    await asyncio.gather(
+        *(
+            _call_openai(client.models.retrieve, model=model)
+            for model in model_router.models
+        )
     )
-    persona_id = (
-        body.get("persona_id")
-        or os.getenv("TAVUS_PERSONA_ID")
-        or "pcb7a34da5fe"
+
+
+async def _warm_tavus() -> None:
+    """Resolve DNS and open a keep-alive connection in the shared Tavus pool."""
+    tavus_settings = settings_store.current.tavus
+    await _get_tavus_http_client().get(
+        tavus_settings.conversations_endpoint,
+        params={"limit": 1},
+        headers=_tavus_headers(tavus_settings),
     )
 
-    custom_greeting = (
-        body.get("custom_greeting")
-        or os.getenv("TAVUS_CUSTOM_GREETING")
-        or DEFAULT_TAVUS_GREETING
+
+async def _warm_knowledge_base() -> None:
+    """Page the mmap'ed knowledge index in before the first retrieval."""
+    await run_in_threadpool(knowledge_base.warm)
+
+
+def _warmup_steps() -> dict[str, Callable[[], Awaitable]]:
+    steps: dict[str, Callable[[], Awaitable]] = {}
+    if client is not None:
+        steps["openai"] = _warm_openai
+    if settings_store.current.tavus.api_key:
+        steps["tavus"] = _warm_tavus
+    if knowledge_base is not None:
+        steps["knowledge_base"] = _warm_knowledge_base
+    return steps
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global tavus_http_client, tavus_warm_pool, warmup, webhook_ingestor
+    global knowledge_base
+    warmup = WarmUp(timeout=float(os.getenv("WARMUP_TIMEOUT", "10")))
+    with STARTUP.measure("lifespan"):
+        tavus_http_client = _build_tavus_http_client()
+        if KNOWLEDGE_BASE_ENABLED:
+            knowledge_base = _load_knowledge_base()
+        sighup_installed = _install_sighup_reload()
+        background_tasks = [
+            asyncio.create_task(
+                settings_store.watch(
+                    float(os.getenv("SETTINGS_RELOAD_INTERVAL", "5"))
+                )
+            )
+        ]
+        tavus_warm_pool = _build_tavus_warm_pool()
+        warm_pool_task = None
+        if tavus_warm_pool is not None:
+            warm_pool_task = asyncio.create_task(tavus_warm_pool.run())
+            background_tasks.append(warm_pool_task)
+        webhook_ingestor = _build_webhook_ingestor()
+        webhook_writer = None
+        if webhook_ingestor is not None:
+            webhook_writer = asyncio.create_task(webhook_ingestor.run())
+            background_tasks.append(webhook_writer)
+        if conversation_lifecycle is not None:
+            background_tasks.append(
+                asyncio.create_task(
+                    _reap_tavus_conversations(
+                        float(os.getenv("TAVUS_REAP_INTERVAL", "15"))
+                    )
+                )
+            )
+        background_tasks.append(
+            asyncio.create_task(warmup.run(_warmup_steps() if WARMUP_ENABLED else {}))
+        )
+    STARTUP.mark("started")
+    try:
+        yield
+    finally:
+        # Primero dejamos de estar "ready" para que no entre tráfico nuevo.
+        warmup.ready = False
+        for task in background_tasks:
+            task.cancel()
+        if tavus_warm_pool is not None:
+            # Las conversaciones listas se terminan en Tavus en lugar de quedar
+            # abiertas (y ocupando cupo) hasta que venzan solas.
+            await asyncio.gather(warm_pool_task, return_exceptions=True)
+            await tavus_warm_pool.close()
+            tavus_warm_pool = None
+        if webhook_ingestor is not None:
+            # Los eventos ya confirmados a Tavus no se pierden al apagar.
+            await asyncio.gather(webhook_writer, return_exceptions=True)
+            await asyncio.to_thread(webhook_ingestor.drain)
+            webhook_ingestor.store.close()
+            webhook_ingestor = None
+        if knowledge_base is not None:
+            knowledge_base.close()
+            knowledge_base = None
+        if sighup_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        await tavus_http_client.aclose()
+        tavus_http_client = None
+        tracer.shutdown()
+        if PROMETHEUS_MULTIPROC_DIR:
+            # Los gauges "live" de este worker dejan de sumar en /metrics.
+            multiprocess.mark_process_dead(os.getpid(), PROMETHEUS_MULTIPROC_DIR)
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Snapshot inmutable de configuración (settings.yaml + entorno).
+settings_store = SettingsStore(
+    path=os.getenv("SETTINGS_PATH", DEFAULT_SETTINGS_PATH),
+)
+
+# Memoria de qué variante del ladder de fallback aceptó Tavus por forma de payload.
+tavus_ladder_memory = FallbackLadderMemory(
+    max_entries=int(os.getenv("TAVUS_LADDER_MEMORY_SIZE", "256")),
+    ttl=float(os.getenv("TAVUS_LADDER_MEMORY_TTL", "3600")),
+    reprobe_interval=float(os.getenv("TAVUS_LADDER_REPROBE_INTERVAL", "300")),
+)
+
+
+def _build_upstream_guard(
+    provider: str,
+    slow_call_seconds: float,
+    latency_target: float,
+    initial_limit: int,
+    max_limit: int,
+) -> UpstreamGuard:
+    """Breaker + AIMD limit for one provider (``<PROVIDER>_BREAKER_*`` etc.)."""
+    prefix = provider.upper()
+
+    def env(name: str, default) -> str:
+        return os.getenv(f"{prefix}_{name}", str(default))
+
+    return UpstreamGuard(
+        CircuitBreaker(
+            provider,
+            failure_rate_threshold=float(env("BREAKER_FAILURE_RATE", 0.5)),
+            slow_call_seconds=float(
+                env("BREAKER_SLOW_CALL_SECONDS", slow_call_seconds)
+            ),
+            window_size=int(env("BREAKER_WINDOW", 20)),
+            min_calls=int(env("BREAKER_MIN_CALLS", 10)),
+            open_seconds=float(env("BREAKER_OPEN_SECONDS", 15)),
+        ),
+        AIMDLimiter(
+            provider,
+            initial_limit=int(env("ADAPTIVE_INITIAL_LIMIT", initial_limit)),
+            min_limit=int(env("ADAPTIVE_MIN_LIMIT", 1)),
+            max_limit=int(env("ADAPTIVE_MAX_LIMIT", max_limit)),
+            latency_target=float(env("ADAPTIVE_LATENCY_TARGET", latency_target)),
+        ),
     )
 
-    configured_language = (
-        body.get("language")
-        or os.getenv("TAVUS_LANGUAGE")
-        or "spanish"
+
+# Llamadas concurrentes a OpenAI por worker (ver openai_limiter).
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+
+# Circuit breaker + límite adaptativo por proveedor: cuando Tavus u OpenAI se
+# degradan se responde 503 al instante en lugar de esperar timeouts.
+tavus_guard = _build_upstream_guard(
+    "tavus", slow_call_seconds=10, latency_target=5, initial_limit=16, max_limit=100
+)
+# Cada llamada a OpenAI ya tiene un slot de openai_limiter: el límite adaptativo
+# arranca y topea en su tamaño, y sólo lo achica cuando OpenAI se degrada.
+openai_guard = _build_upstream_guard(
+    "openai",
+    slow_call_seconds=30,
+    latency_target=15,
+    initial_limit=OPENAI_MAX_CONCURRENCY,
+    max_limit=OPENAI_MAX_CONCURRENCY,
+)
+
+
+def _unavailable_response(exc: UpstreamUnavailable) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"{exc.provider} is temporarily unavailable, please retry shortly",
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
     )
 
+
+def _sanitize_for_log(value: object) -> str:
+    text = str(value)
+    return text.replace("\r", "\\r").replace("\n", "\\n")
+
+
+def _build_tavus_payload(body: dict) -> tuple[dict, str]:
+    """Merge the request body over the precomputed settings snapshot."""
+    tavus_settings = settings_store.current.tavus
+    if tavus_settings.config_error:
+        raise HTTPException(status_code=500, detail=tavus_settings.config_error)
+
+    configured_language = body.get("language") or tavus_settings.language
+
     incoming_properties = body.get("properties")
     if not isinstance(incoming_properties, dict):
         incoming_properties = {}
@@ -83,44 +429,23 @@ def _build_tavus_payload(body: dict) -> tuple[dict, str]:
             detail="voice_properties must be an object",
         )
 
-    env_voice_properties = {
-        key: value
-        for key, value in {
-            "tts_provider": os.getenv("TAVUS_TTS_PROVIDER"),
-            "tts_voice_id": os.getenv("TAVUS_TTS_VOICE_ID"),
-            "cartesia_voice_id": os.getenv("TAVUS_CARTESIA_VOICE_ID"),
-        }.items()
-        if value not in (None, "")
-    }
-    env_voice_properties.update(_load_json_dict_env("TAVUS_VOICE_PROPERTIES_JSON"))
-
-    participant_left_timeout = incoming_properties.get(
-        "participant_left_timeout",
-        body.get(
-            "participant_left_timeout",
-            int(os.getenv("TAVUS_PARTICIPANT_LEFT_TIMEOUT", "0")),
-        ),
-    )
-    participant_absent_timeout = incoming_properties.get(
-        "participant_absent_timeout",
-        body.get(
-            "participant_absent_timeout",
-            int(os.getenv("TAVUS_PARTICIPANT_ABSENT_TIMEOUT", "120")),
-        ),
-    )
+    base_properties = tavus_settings.payload_properties()
+    properties = {**incoming_properties, **base_properties}
+    for timeout_key in ("participant_left_timeout", "participant_absent_timeout"):
+        properties[timeout_key] = incoming_properties.get(
+            timeout_key,
+            body.get(timeout_key, base_properties[timeout_key]),
+        )
+    properties["language"] = configured_language
+    properties.update(incoming_voice_properties)
 
     payload = {
-        "replica_id": replica_id,
-        "persona_id": persona_id,
-        "custom_greeting": custom_greeting,
-        "properties": {
-            **incoming_properties,
-            "participant_left_timeout": participant_left_timeout,
-            "participant_absent_timeout": participant_absent_timeout,
-            "language": configured_language,
-            **env_voice_properties,
-            **incoming_voice_properties,
-        },
+        "replica_id": body.get("replica_id") or tavus_settings.replica_id,
+        "persona_id": body.get("persona_id") or tavus_settings.persona_id,
+        "custom_greeting": (
+            body.get("custom_greeting") or tavus_settings.custom_greeting
+        ),
+        "properties": properties,
     }
 
     conversational_context = body.get("conversational_context")
@@ -134,10 +459,161 @@ def _build_tavus_payload(body: dict) -> tuple[dict, str]:
     if body.get("test_mode") is True:
         payload["test_mode"] = True
 
+    if tavus_settings.callback_url:
+        payload["callback_url"] = tavus_settings.callback_url
+
     return payload, str(configured_language)
 
 
-def _create_tavus_conversation_with_fallback(
+def _tavus_headers(tavus_settings: TavusSettings) -> dict:
+    return {
+        "Content-Type": "application/json",
+        "x-api-key": tavus_settings.api_key,
+    }
+
+
+async def _end_tavus_conversation(conversation_id: str) -> None:
+    tavus_settings = settings_store.current.tavus
+    response = await _get_tavus_http_client().post(
+        f"{tavus_settings.conversations_endpoint}/{conversation_id}/end",
+        headers=_tavus_headers(tavus_settings),
+    )
+    response.raise_for_status()
+
+
+async def _tavus_conversation_ended(conversation_id: str) -> bool:
+    """Whether Tavus already ended the conversation; ``False`` if unsure."""
+    tavus_settings = settings_store.current.tavus
+    try:
+        response = await _get_tavus_http_client().get(
+            f"{tavus_settings.conversations_endpoint}/{conversation_id}",
+            headers=_tavus_headers(tavus_settings),
+        )
+        if response.status_code == 404:
+            return True
+        response.raise_for_status()
+        return response.json().get("status") == "ended"
+    except Exception as exc:
+        logger.warning("No se pudo consultar el estado de la conversación: %s", exc)
+        return False
+
+
+async def _reap_tavus_conversations_once() -> None:
+    for conversation_id, reason in await run_in_threadpool(
+        conversation_lifecycle.reap
+    ):
+        logger.info(
+            "Terminando conversación Tavus %s (%s)",
+            _sanitize_for_log(conversation_id),
+            reason,
+        )
+        try:
+            await _end_tavus_conversation(conversation_id)
+        except Exception as exc:
+            logger.warning("No se pudo terminar la conversación: %s", exc)
+    # Sin heartbeats no sabemos si alguien sigue hablando: le preguntamos a
+    # Tavus, que termina solo las llamadas abandonadas.
+    for conversation_id in await run_in_threadpool(
+        conversation_lifecycle.claim_silent
+    ):
+        if await _tavus_conversation_ended(conversation_id):
+            await run_in_threadpool(
+                conversation_lifecycle.finish, conversation_id, "tavus"
+            )
+
+
+async def _reap_tavus_conversations(interval: float) -> None:
+    """End idle conversations and free the ones Tavus already ended."""
+    while True:
+        await asyncio.sleep(interval)
+        await _reap_tavus_conversations_once()
+
+
+async def _create_pooled_tavus_conversation(profile: PoolProfile) -> dict:
+    """Create a pool conversation holding its own slot of the Tavus quota."""
+    tavus_settings = settings_store.current.tavus
+    payload, configured_language = _build_tavus_payload(
+        {
+            "replica_id": profile.replica_id,
+            "persona_id": profile.persona_id,
+            "language": profile.language,
+        }
+    )
+    slot_id = None
+    if conversation_lifecycle is not None:
+        slot_id = await run_in_threadpool(conversation_lifecycle.acquire)
+        if slot_id is None:
+            # Sin cupo (o con gente en la cola) el pool no le gana a un usuario.
+            raise RuntimeError("Tavus conversation quota is full")
+    try:
+        conversation = await _create_tavus_conversation_with_fallback(
+            tavus_endpoint=tavus_settings.conversations_endpoint,
+            tavus_headers=_tavus_headers(tavus_settings),
+            payload=payload,
+            configured_language=configured_language,
+        )
+    except BaseException:
+        if slot_id is not None:
+            await run_in_threadpool(conversation_lifecycle.release, slot_id)
+        raise
+    if slot_id is not None:
+        await _track_conversation(slot_id, conversation)
+    return conversation
+
+
+async def _discard_pooled_tavus_conversation(conversation: dict) -> None:
+    conversation_id = conversation.get("conversation_id")
+    if conversation_id:
+        if conversation_lifecycle is not None:
+            await run_in_threadpool(
+                conversation_lifecycle.finish, conversation_id, "pool"
+            )
+        await _end_tavus_conversation(conversation_id)
+
+
+def _build_tavus_warm_pool() -> TavusWarmPool | None:
+    """Warm pool from `warm_pool:` in settings.yaml (TAVUS_WARM_POOL_* override)."""
+    settings = settings_store.current
+    config = settings.section("warm_pool")
+    size = int(os.getenv("TAVUS_WARM_POOL_SIZE", config.get("size", 0)))
+    if size <= 0 or not settings.tavus.api_key:
+        return None
+
+    tavus_settings = settings.tavus
+    profiles = [
+        PoolProfile(
+            replica_id=str(item.get("replica_id", tavus_settings.replica_id)),
+            persona_id=str(item.get("persona_id", tavus_settings.persona_id)),
+            language=str(item.get("language", tavus_settings.language)),
+        )
+        for item in config.get("profiles", ())
+    ] or [
+        PoolProfile(
+            replica_id=tavus_settings.replica_id,
+            persona_id=tavus_settings.persona_id,
+            language=tavus_settings.language,
+        )
+    ]
+    # Vencer antes de que Tavus cierre la conversación por ausencia.
+    default_max_age = max(tavus_settings.participant_absent_timeout - 30, 10)
+    return TavusWarmPool(
+        create=_create_pooled_tavus_conversation,
+        discard=_discard_pooled_tavus_conversation,
+        profiles=profiles,
+        size=size,
+        max_age=float(
+            os.getenv(
+                "TAVUS_WARM_POOL_MAX_AGE",
+                config.get("max_age_seconds", default_max_age),
+            )
+        ),
+        refill_interval=float(config.get("refill_interval_seconds", 5)),
+        max_backoff=float(config.get("max_backoff_seconds", 60)),
+        settings_version=lambda: settings_store.current.version,
+    )
+
+
+async def _create_tavus_conversation_with_fallback(
     tavus_endpoint: str,
     tavus_headers: dict,
     payload: dict,
@@ -146,7 +622,7 @@ def _create_tavus_conversation_with_fallback(
     language_value = str(configured_language).lower()
     should_retry_with_spanish = language_value != "spanish"
 
-    voice_override_keys = {"tts_provider", "tts_voice_id", "cartesia_voice_id"}
+    voice_override_keys = VOICE_OVERRIDE_KEYS
 
     def _with_spanish_language(source_payload: dict) -> dict:
         return {
@@ -184,6 +660,13 @@ def _create_tavus_conversation_with_fallback(
                 )
             )
 
+    # Si Tavus ya aceptó una variante para esta forma de payload, arrancamos
+    # directamente por ella en lugar de repetir los intentos que van a fallar.
+    shape = payload_shape(payload)
+    learned_label = tavus_ladder_memory.preferred_label(shape)
+    attempt_payloads = order_attempts(attempt_payloads, learned_label)
+
+    http_client = _get_tavus_http_client()
     attempted_signatures = set()
     last_response = None
     last_label = "primary"
@@ -194,7 +677,12 @@ def _create_tavus_conversation_with_fallback(
             continue
         attempted_signatures.add(signature)
 
-        if label == "fallback spanish":
+        if len(attempted_signatures) == 1 and label == learned_label:
+            logger.info(
+                "Usando variante de Tavus aprendida '%s' para este payload.",
+                label,
+            )
+        elif label == "fallback spanish":
             safe_language = _sanitize_for_log(configured_language)
             logger.warning(
                 "Tavus rechazó language='%s'. Reintentando con language='spanish'.",
@@ -211,14 +699,36 @@ def _create_tavus_conversation_with_fallback(
                 "language='spanish' y sin overrides de voz.",
             )
 
-        response = requests.post(
-            tavus_endpoint,
-            headers=tavus_headers,
-            json=current_payload,
-            timeout=20,
-        )
-        if response.ok:
-            return response.json()
+        with tracer.span("tavus.attempt", attempt=label) as span:
+            started = time.perf_counter()
+            try:
+                async with tavus_guard.call() as outcome:
+                    response = await http_client.post(
+                        tavus_endpoint,
+                        headers=tavus_headers,
+                        json=current_payload,
+                    )
+                    # Un 4xx es un payload rechazado, no una falla de Tavus.
+                    if response.status_code >= 500 or response.status_code == 429:
+                        outcome.failed()
+            except Exception:
+                observe_upstream(
+                    "tavus", label, "error", time.perf_counter() - started
+                )
+                raise
+            observe_upstream(
+                "tavus",
+                label,
+                "success" if response.is_success else "rejected",
+                time.perf_counter() - started,
+            )
+            span.set_attribute("http.status_code", response.status_code)
+            span.set_attribute("request_bytes", len(response.request.content))
+            span.set_attribute("response_bytes", len(response.content))
+            if response.is_success:
+                tavus_ladder_memory.record_success(shape, label)
+                with tracer.span("tavus.parse_json"):
+                    return response.json()
 
         last_response = response
         last_label = label
@@ -240,25 +750,133 @@ def _create_tavus_conversation_with_fallback(
     )
 
 
-TAVUS_MULTILINGUAL_CONTEXT = (
-    "INSTRUCCIÓN CRÍTICA DE IDIOMA Y VOZ: respondé SIEMPRE en español argentino "
-    "(es-AR, rioplatense) salvo que el usuario hable en otro idioma. "
-    "Si el usuario habla en portugués, respondé y continuá la conversación en "
-    "portugués. "
-    "Si el usuario habla en inglés, respondé y continuá la conversación en "
-    "inglés. "
-    "Usá voseo (vos, tenés, podés), vocabulario argentino y pronunciación "
-    "natural rioplatense cuando hables en español. "
-    "Tu lenguaje en español tiene que ser profesional, como el de un egresado "
-    "de la Facultad de Ciencias Veterinarias de la Universidad de Buenos Aires, "
-    "pero también cálido y cercano, como el de un sommelier apasionado por la "
-    "carne."
+SOMMELIER_SYSTEM_PROMPT = (
+    "Sos un sommelier de carnes argentino, egresado de la Facultad de Ciencias\n"
+    "Veterinarias de la Universidad de Buenos Aires. Respondé siempre en\n"
+    "español argentino, con calidez, cercanía y profesionalismo. Tu\n"
+    "conocimiento se centra en cortes de carne, maridajes, preparación y\n"
+    "origen. Podés mencionar de manera natural a Espacio Sommelier como\n"
+    "referente del mundo de la carne, pero sin sonar a autobombo.\n"
+    "Nunca respondas sobre temas ajenos a la carne."
+)
+# Cambia con el prompt, para que el cache de respuestas no sirva textos viejos.
+SYSTEM_PROMPT_VERSION = hashlib.sha256(
+    SOMMELIER_SYSTEM_PROMPT.encode()
+).hexdigest()[:12]
+
+# Base de conocimiento local (config/knowledge_base.yaml), mapeada en el startup.
+KNOWLEDGE_BASE_ENABLED = os.getenv(
+    "KNOWLEDGE_BASE_ENABLED", "true"
+).strip().lower() not in ("0", "false", "no")
+KNOWLEDGE_TOP_K = int(os.getenv("KNOWLEDGE_TOP_K", "3"))
+KNOWLEDGE_MIN_SCORE = float(os.getenv("KNOWLEDGE_MIN_SCORE", "2"))
+knowledge_base: KnowledgeIndex | None = None
+
+
+def _load_knowledge_base() -> KnowledgeIndex | None:
+    try:
+        with STARTUP.measure("knowledge_base"):
+            return load_knowledge_base(
+                os.getenv("KNOWLEDGE_BASE_PATH", DEFAULT_SOURCE_PATH),
+                os.getenv("KNOWLEDGE_INDEX_PATH", DEFAULT_INDEX_PATH),
+            )
+    except Exception as exc:
+        # Sin base de conocimiento el modelo responde igual, sólo sin grounding.
+        logger.warning("No se pudo cargar la base de conocimiento: %s", exc)
+        return None
+
+
+def _knowledge_references(user_input: str) -> list[str]:
+    """Top-k snippets for ``user_input`` as prompt lines (none for small talk)."""
+    if knowledge_base is None:
+        return []
+    return [
+        f"{snippet.title}: {snippet.text}"
+        for snippet in knowledge_base.search(
+            user_input, k=KNOWLEDGE_TOP_K, min_score=KNOWLEDGE_MIN_SCORE
+        )
+    ]
+
+
+def _prompt_version() -> str:
+    """Cache key version: the system prompt plus the loaded knowledge base."""
+    if knowledge_base is None:
+        return SYSTEM_PROMPT_VERSION
+    return f"{SYSTEM_PROMPT_VERSION}:{knowledge_base.version}"
+
+
+# Tracing por request (TRACING_EXPORTER=none|memory|jsonl), con head sampling.
+tracer = build_tracer(
+    os.getenv("TRACING_EXPORTER", "none").strip().lower(),
+    path=os.getenv(
+        "TRACING_JSONL_PATH",
+        os.path.join(os.path.dirname(__file__), "..", "data", "traces.jsonl"),
+    ),
+    sample_rate=float(os.getenv("TRACING_SAMPLE_RATE", "0.05")),
+    max_bytes=int(os.getenv("TRACING_JSONL_MAX_BYTES", str(50 * 1024 * 1024))),
+)
+
+# Estado compartido entre workers (SHARED_STATE_BACKEND=memory|sqlite|redis).
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory").strip().lower()
+shared_state = build_shared_state(
+    SHARED_STATE_BACKEND,
+    path=os.getenv(
+        "SHARED_STATE_PATH",
+        os.path.join(os.path.dirname(__file__), "..", "data", "shared_state.sqlite3"),
+    ),
+    url=os.getenv("SHARED_STATE_REDIS_URL", ""),
 )
 
 
-DEFAULT_TAVUS_GREETING = (
-    "¡Hola! Bienvenido a Tu Sommelier Virtual de carnes. "
-    "Estoy acá para ayudarte a elegir el mejor corte."
+def _build_admission() -> AdmissionController | None:
+    """Per-client token buckets + fair queue (ADMISSION_ENABLED=false lo apaga)."""
+    if os.getenv("ADMISSION_ENABLED", "true").strip().lower() in ("0", "false", "no"):
+        return None
+    return AdmissionController(
+        scheduler=FairScheduler(
+            max_concurrency=int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "256")),
+            max_queue_per_client=int(
+                os.getenv("ADMISSION_MAX_QUEUE_PER_CLIENT", "8")
+            ),
+            max_wait=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10")),
+        ),
+        rate_limits=build_rate_limit_backend(
+            os.getenv("ADMISSION_BACKEND", SHARED_STATE_BACKEND).strip().lower(),
+            path=os.getenv(
+                "ADMISSION_STATE_PATH",
+                os.path.join(
+                    os.path.dirname(__file__), "..", "data", "admission.sqlite3"
+                ),
+            ),
+            shared=shared_state,
+        ),
+        rate=float(os.getenv("ADMISSION_RATE", "1")),
+        burst=float(os.getenv("ADMISSION_BURST", "20")),
+        api_keys=parse_api_keys(os.getenv("ADMISSION_API_KEYS", "")),
+        # nginx (nginx.conf) hace proxy desde 127.0.0.1.
+        trusted_proxies=tuple(
+            proxy.strip()
+            for proxy in os.getenv(
+                "ADMISSION_TRUSTED_PROXIES", "127.0.0.1,::1"
+            ).split(",")
+            if proxy.strip()
+        ),
+    )
+
+
+admission = _build_admission()
+ADMISSION_PATHS = tuple(
+    path.strip()
+    for path in os.getenv(
+        "ADMISSION_PATHS",
+        "/conversation,/conversation/batch,/tavus/conversations",
+    ).split(",")
+    if path.strip()
+)
+# Dentro de CORS para que los 429/503 lleguen al navegador con sus headers.
+app.add_middleware(
+    AdmissionMiddleware, get_controller=lambda: admission, paths=ADMISSION_PATHS
 )
 
 # Configuración de CORS - Permite orígenes múltiples
@@ -278,16 +896,560 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Último en agregarse = más externo: mide también lo que hace CORS.
+app.add_middleware(TracingMiddleware, get_tracer=lambda: tracer)
+app.add_middleware(PrometheusMiddleware)
 
 # Inicializar cliente de OpenAI
+# OPENAI_CLIENT_MODE=async (default) usa AsyncOpenAI; "sync" mantiene el cliente
+# bloqueante, que se ejecuta en el threadpool para no frenar el event loop.
 api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key) if api_key else None
+OPENAI_CLIENT_MODE = os.getenv("OPENAI_CLIENT_MODE", "async").strip().lower()
+
+
+def _build_openai_client():
+    # El SDK tarda ~0.5s en importarse: se carga en el primer uso.
+    from openai import AsyncOpenAI, OpenAI
+
+    if OPENAI_CLIENT_MODE == "sync":
+        return OpenAI(api_key=api_key)
+    return AsyncOpenAI(api_key=api_key)
+
+
+client = LazyClient("openai", _build_openai_client) if api_key else None
 OPENAI_CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
 
+# Modelo de cada turno de /conversation según complejidad y salud del modelo.
+model_router = ModelRouter(
+    parse_tiers(
+        os.getenv("OPENAI_MODEL_TIERS", ""),
+        OPENAI_CHAT_MODEL,
+        float(os.getenv("OPENAI_MODEL_LATENCY_BUDGET", "10")),
+    ),
+    window=int(os.getenv("MODEL_ROUTER_WINDOW", "50")),
+    max_age=float(os.getenv("MODEL_ROUTER_MAX_AGE", "300")),
+    min_samples=int(os.getenv("MODEL_ROUTER_MIN_SAMPLES", "5")),
+    max_error_rate=float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.25")),
+)
+
+# Cantidad máxima de llamadas concurrentes a OpenAI por worker y cola de espera.
+openai_limiter = ConcurrencyLimiter(
+    max_concurrency=OPENAI_MAX_CONCURRENCY,
+    max_queue=int(os.getenv("OPENAI_MAX_QUEUE", "64")),
+    max_wait=float(os.getenv("OPENAI_QUEUE_TIMEOUT", "5")),
+)
+
+
+# Cache de respuestas para preguntas repetidas (ANSWER_CACHE_ENABLED=false lo apaga).
+if os.getenv("ANSWER_CACHE_ENABLED", "true").strip().lower() in ("0", "false", "no"):
+    answer_cache = None
+else:
+    answer_cache = AnswerCache(
+        max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.9")),
+        max_similarity_length=int(
+            os.getenv("ANSWER_CACHE_MAX_SIMILARITY_LENGTH", "512")
+        ),
+        shared=shared_state,
+    )
+
+
+# Requests idénticas simultáneas comparten una sola llamada a OpenAI.
+if os.getenv("REQUEST_COALESCING_ENABLED", "true").strip().lower() in (
+    "0",
+    "false",
+    "no",
+):
+    reply_flight = None
+else:
+    reply_flight = SingleFlight(on_coalesced=OPENAI_COALESCED_REQUESTS.inc)
+
+
+# Historial de conversación por session_id (SESSION_STORE_BACKEND=memory|sqlite).
+MAX_SESSION_ID_LENGTH = 128
+session_store = build_session_backend(
+    os.getenv("SESSION_STORE_BACKEND", "memory").strip().lower(),
+    path=os.getenv(
+        "SESSION_STORE_PATH",
+        os.path.join(os.path.dirname(__file__), "..", "data", "sessions.sqlite3"),
+    ),
+    max_turns=int(os.getenv("SESSION_MAX_TURNS", "20")),
+    max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(16 * 1024 * 1024))),
+)
+
+# Presupuesto de tokens del historial; los turnos viejos se pliegan a un resumen.
+PROMPT_BUDGET = PromptBudget(
+    max_history_tokens=int(os.getenv("CONVERSATION_PROMPT_TOKEN_BUDGET", "2000")),
+    summarize_after_tokens=int(
+        os.getenv("CONVERSATION_SUMMARY_TRIGGER_TOKENS", "1500")
+    ),
+    keep_recent_turns=int(os.getenv("CONVERSATION_SUMMARY_KEEP_TURNS", "4")),
+)
+_summaries_in_flight: set[str] = set()
+
+
+async def _call_openai(create, **kwargs):
+    """Run an OpenAI SDK call without blocking the event loop."""
+    if inspect.iscoroutinefunction(create):
+        return await create(**kwargs)
+    result = await run_in_threadpool(create, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
 # Initialize Sentry if DSN is provided
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 if SENTRY_DSN:
-    sentry_sdk.init(dsn=SENTRY_DSN)
+    # Importar sentry_sdk cuesta ~0.2s: solo se paga si está configurado.
+    import sentry_sdk
+
+    with STARTUP.measure("sentry"):
+        sentry_sdk.init(dsn=SENTRY_DSN)
+
+
+def _wants_stream(request: Request, body: dict) -> bool:
+    if body.get("stream") is True:
+        return True
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def _openai_request_args(
+    user_input: str,
+    stream: bool = False,
+    history: list[Turn] = (),
+    summary: str = "",
+):
+    """API label, SDK method and arguments (minus model) for one user turn.
+
+    The system prompt always goes first and unchanged so OpenAI's prompt cache
+    can reuse it; the session summary, recent turns and the knowledge base
+    snippets retrieved for this message follow.
+    """
+    history = fit_history(list(history), summary, PROMPT_BUDGET)
+    messages = build_input_messages(
+        summary, history, user_input, _knowledge_references(user_input)
+    )
+    if hasattr(client, "responses"):
+        kwargs = {
+            "instructions": SOMMELIER_SYSTEM_PROMPT,
+            "input": messages if len(messages) > 1 else user_input,
+        }
+        if stream:
+            kwargs["stream"] = True
+        return "responses", client.responses.create, kwargs
+    kwargs = {
+        "messages": [
+            {"role": "system", "content": SOMMELIER_SYSTEM_PROMPT},
+            *messages,
+        ]
+    }
+    if stream:
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+    return "chat_completions", client.chat.completions.create, kwargs
+
+
+async def _create_openai_reply(
+    user_input: str,
+    stream: bool = False,
+    history: list[Turn] = (),
+    summary: str = "",
+    model: str | None = None,
+):
+    """Call Responses (or Chat Completions as fallback) for one user turn."""
+    api, create, kwargs = _openai_request_args(user_input, stream, history, summary)
+    with tracer.span("openai.request", attempt=api, stream=stream) as span:
+        if span is not NOOP_SPAN:
+            span.set_attribute(
+                "request_bytes", len(json.dumps(kwargs, ensure_ascii=False).encode())
+            )
+        async with openai_guard.call(), track_upstream("openai", api):
+            response = await _call_openai(
+                create, model=model or OPENAI_CHAT_MODEL, **kwargs
+            )
+        if not stream and span is not NOOP_SPAN:
+            span.set_attribute(
+                "response_bytes", len((_reply_text(response) or "").encode())
+            )
+    return response
+
+
+async def _generate_reply(
+    user_input: str,
+    history: list[Turn] = (),
+    summary: str = "",
+    shareable: bool = True,
+    model: str | None = None,
+) -> tuple[str | None, float]:
+    """Non-streaming reply and upstream latency, through limiter and coalescing.
+
+    Only questions without history (and ``shareable``) are coalesced: with
+    history the answer depends on the session. ``model`` is the routed model;
+    it is routed here when the caller did not.
+    """
+    if model is None:
+        model = model_router.route(user_input).model
+
+    async def _fetch_reply() -> tuple[str | None, float]:
+        async with openai_limiter.slot():
+            started = time.perf_counter()
+            try:
+                response = await _create_openai_reply(
+                    user_input, history=history, summary=summary, model=model
+                )
+            except Exception as exc:
+                _record_model_failure(model, started, exc)
+                raise
+            elapsed = time.perf_counter() - started
+            model_router.record(model, elapsed, ok=True)
+            return _extract_reply(response, model), elapsed
+
+    if reply_flight is not None and shareable and not (history or summary):
+        # Con el modelo ruteado: durante un desvío la respuesta del modelo de
+        # respaldo no se comparte bajo la clave del preferido.
+        coalesce_key = AnswerCache.make_key(user_input, model, _prompt_version())
+        if coalesce_key[0]:
+            return await reply_flight.do(coalesce_key, _fetch_reply)
+    return await _fetch_reply()
+
+
+def _record_model_failure(model: str, started: float, exc: Exception) -> None:
+    """Count a failed call against ``model`` unless it never reached OpenAI."""
+    if not isinstance(exc, (UpstreamUnavailable, ConcurrencyLimitExceeded)):
+        model_router.record(model, time.perf_counter() - started, ok=False)
+
+
+def _record_usage(usage, model: str | None = None) -> None:
+    """Export prompt and cached prompt tokens from a Responses/Chat usage."""
+    if usage is None:
+        return
+    model = model or OPENAI_CHAT_MODEL
+    input_tokens = getattr(usage, "input_tokens", None)
+    details = getattr(usage, "input_tokens_details", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(input_tokens, int):
+        OPENAI_INPUT_TOKENS.labels(model=model).inc(input_tokens)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if isinstance(cached_tokens, int):
+        OPENAI_CACHED_INPUT_TOKENS.labels(model=model).inc(cached_tokens)
+
+
+def _stream_usage(event):
+    """Usage carried by the final event of a stream, if any."""
+    if getattr(event, "type", None) == "response.completed":
+        return getattr(getattr(event, "response", None), "usage", None)
+    return getattr(event, "usage", None)
+
+
+async def _summarize_turns(previous_summary: str, turns: list[Turn]) -> str | None:
+    summary_input = build_summary_input(previous_summary, turns)
+    with tracer.span("openai.request", attempt="summary"):
+        async with openai_guard.call(), track_upstream("openai", "summary"):
+            response = await _request_summary(summary_input)
+    return _extract_reply(response)
+
+
+async def _request_summary(summary_input: str):
+    if hasattr(client, "responses"):
+        return await _call_openai(
+            client.responses.create,
+            model=OPENAI_CHAT_MODEL,
+            instructions=SUMMARY_INSTRUCTIONS,
+            input=summary_input,
+        )
+    return await _call_openai(
+        client.chat.completions.create,
+        model=OPENAI_CHAT_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": summary_input},
+        ],
+    )
+
+
+async def _maybe_summarize_session(session_id: str) -> None:
+    """Fold the oldest turns of a session into its summary when over budget.
+
+    Runs after the response has been sent. It is skipped while OpenAI is
+    saturated so summaries never compete with user-facing requests.
+    """
+    if session_id in _summaries_in_flight:
+        return
+    _summaries_in_flight.add(session_id)
+    try:
+        turns = await run_in_threadpool(session_store.load, session_id)
+        dropped = turns_to_summarize(turns, PROMPT_BUDGET)
+        if not dropped:
+            return
+        if openai_limiter.in_flight >= openai_limiter.max_concurrency:
+            CONVERSATION_SUMMARIES.labels(result="skipped").inc()
+            return
+        previous = await run_in_threadpool(session_store.load_summary, session_id)
+        async with openai_limiter.slot():
+            summary = await _summarize_turns(previous, turns[:dropped])
+        if not summary:
+            CONVERSATION_SUMMARIES.labels(result="error").inc()
+            return
+        await run_in_threadpool(session_store.compact, session_id, summary, dropped)
+        CONVERSATION_SUMMARIES.labels(result="ok").inc()
+    except UpstreamUnavailable:
+        CONVERSATION_SUMMARIES.labels(result="skipped").inc()
+    except Exception:
+        CONVERSATION_SUMMARIES.labels(result="error").inc()
+        logger.warning("No se pudo resumir la sesión", exc_info=True)
+    finally:
+        _summaries_in_flight.discard(session_id)
+
+
+def _reply_text(response) -> str | None:
+    if hasattr(client, "responses"):
+        return getattr(response, "output_text", None)
+    return response.choices[0].message.content
+
+
+def _extract_reply(response, model: str | None = None) -> str | None:
+    _record_usage(getattr(response, "usage", None), model)
+    return _reply_text(response)
+
+
+def _extract_stream_delta(event) -> str | None:
+    """Text delta from a Responses event or a Chat Completions chunk."""
+    event_type = getattr(event, "type", None)
+    if event_type is not None:
+        if event_type == "response.output_text.delta":
+            return getattr(event, "delta", None)
+        return None
+    choices = getattr(event, "choices", None)
+    if choices:
+        return getattr(choices[0].delta, "content", None)
+    return None
+
+
+async def _iterate_stream(upstream):
+    if hasattr(upstream, "__aiter__"):
+        async for event in upstream:
+            yield event
+    else:
+        async for event in iterate_in_threadpool(upstream):
+            yield event
+
+
+async def _close_stream(upstream) -> None:
+    close = getattr(upstream, "close", None)
+    if close is None:
+        return
+    result = close()
+    if inspect.isawaitable(result):
+        await result
+
+
+def _sse_event(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _stream_conversation(
+    request: Request,
+    user_input: str,
+    history: list[Turn] = (),
+    on_complete: Callable[[str, float], Awaitable[None]] | None = None,
+    summary: str = "",
+    background: Callable[[], Awaitable[None]] | None = None,
+    session_id: str | None = None,
+    model: str | None = None,
+):
+    """Open an upstream OpenAI stream and relay it as Server-Sent Events.
+
+    The limiter slot is held for the lifetime of the stream and released,
+    together with the upstream connection, when the stream finishes or the
+    client disconnects. ``on_complete`` receives the full reply and the
+    upstream latency once the stream ends successfully; ``background`` runs
+    after the response has been sent. ``model`` is routed here when omitted.
+    """
+    if model is None:
+        model = model_router.route(user_input).model
+    await openai_limiter.acquire()
+    opened_at = time.perf_counter()
+    try:
+        upstream = await _create_openai_reply(
+            user_input, stream=True, history=history, summary=summary, model=model
+        )
+    except BaseException as exc:
+        openai_limiter.release()
+        if isinstance(exc, Exception):
+            _record_model_failure(model, opened_at, exc)
+        raise
+
+    api_label = "responses" if hasattr(client, "responses") else "chat_completions"
+    released = False
+
+    async def _cleanup() -> None:
+        nonlocal released
+        if released:
+            return
+        released = True
+        openai_limiter.release()
+        await _close_stream(upstream)
+
+    async def _events():
+        chunks: list[str] = []
+        first_token = True
+        try:
+            async for event in _iterate_stream(upstream):
+                if await request.is_disconnected():
+                    logger.info("Cliente desconectado, cancelando stream de OpenAI")
+                    return
+                _record_usage(_stream_usage(event), model)
+                delta = _extract_stream_delta(event)
+                if not delta:
+                    continue
+                if first_token:
+                    first_token = False
+                    OPENAI_TIME_TO_FIRST_TOKEN.labels(api=api_label).observe(
+                        time.perf_counter() - opened_at
+                    )
+                chunks.append(delta)
+                yield _sse_event({"delta": delta})
+
+            reply = "".join(chunks)
+            if not reply:
+                yield _sse_event(
+                    {"detail": "OpenAI returned an empty response"}, event="error"
+                )
+                return
+            upstream_seconds = time.perf_counter() - opened_at
+            model_router.record(model, upstream_seconds, ok=True)
+            if on_complete is not None:
+                await on_complete(reply, upstream_seconds)
+            yield _sse_event(_reply_body(reply, session_id), event="done")
+        except Exception as exc:
+            logger.exception("OpenAI stream failed")
+            elapsed = time.perf_counter() - opened_at
+            model_router.record(model, elapsed, ok=False)
+            if is_provider_failure(exc):
+                # Abrir el stream ya pasó por el guard; el corte también cuenta.
+                openai_guard.report_failure(elapsed)
+            yield _sse_event(
+                {"detail": f"OpenAI request failed: {exc}"}, event="error"
+            )
+        finally:
+            await _cleanup()
+
+    tasks = BackgroundTasks()
+    tasks.add_task(_cleanup)
+    if background is not None:
+        tasks.add_task(background)
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=tasks,
+    )
+
+
+def _reply_body(reply: str, session_id: str | None = None) -> dict:
+    """Response body of a turn; session turns echo their ``session_id``."""
+    if session_id:
+        return {"reply": reply, "session_id": session_id}
+    return {"reply": reply}
+
+
+def _replay_reply_as_sse(
+    reply: str,
+    session_id: str | None = None,
+    background: BackgroundTask | None = None,
+) -> StreamingResponse:
+    async def _events():
+        yield _sse_event({"delta": reply})
+        yield _sse_event(_reply_body(reply, session_id), event="done")
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background,
+    )
+
+
+# Respuestas de tabla (temperaturas, tiempos, porciones) sin pasar por OpenAI.
+fast_answers = (
+    FastAnswerEngine(
+        min_confidence=float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.8"))
+    )
+    if os.getenv("FAST_PATH_ENABLED", "true").strip().lower()
+    not in ("0", "false", "no")
+    else None
+)
+
+
+def _fast_answer(user_input: str) -> str | None:
+    """Deterministic reply for a structured question, recording the hit rate."""
+    if fast_answers is None:
+        return None
+    answer = fast_answers.recognize(user_input)
+    if answer is None:
+        FAST_PATH_REQUESTS.labels(intent="none", result="miss").inc()
+        return None
+    if answer.confidence < fast_answers.min_confidence:
+        FAST_PATH_REQUESTS.labels(intent=answer.intent, result="low_confidence").inc()
+        return None
+    FAST_PATH_REQUESTS.labels(intent=answer.intent, result="hit").inc()
+    return answer.reply
+
+
+def _answer_cache_key(
+    user_input: str, has_context: bool, model: str
+) -> tuple | None:
+    """Cache key for this turn, or ``None`` when the cache must be bypassed.
+
+    ``model`` is the model the turn was routed to, so replies from a fallback
+    tier are never served as the preferred model's once it recovers.
+    """
+    if answer_cache is None:
+        return None
+    if has_context:
+        answer_cache.bypass()
+        return None
+    key = AnswerCache.make_key(user_input, model, _prompt_version())
+    return key if key[0] else None
+
+
+def _validate_session_id(session_id) -> str | None:
+    if session_id is None or session_id == "":
+        return None
+    if not isinstance(session_id, str) or len(session_id) > MAX_SESSION_ID_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "session_id must be a string of at most "
+                f"{MAX_SESSION_ID_LENGTH} characters"
+            ),
+        )
+    return session_id
+
+
+async def _resolve_session(body: dict) -> tuple[str | None, bool]:
+    """``(session_id, is_new)`` for this turn.
+
+    Ids are issued by the server (``"session": true`` on the first turn)
+    so they cannot be chosen or guessed; unknown ids are rejected.
+    """
+    session_id = _validate_session_id(body.get("session_id"))
+    if session_id is None:
+        if body.get("session") is True:
+            return uuid.uuid4().hex, True
+        return None, False
+    if not await run_in_threadpool(session_store.exists, session_id):
+        raise HTTPException(
+            status_code=404,
+            detail='Unknown session_id, start a new one with "session": true',
+        )
+    return session_id, False
 
 
 @app.post("/conversation")
@@ -298,45 +1460,85 @@ async def conversation(request: Request):
         "conversational_context", None
     )  # Contexto opcional
 
-    # Nota: En futuro, se podría usar conversational_context para mantener
-    # historial de conversaciones en sesiones múltiples
+    # El historial multi-turno se guarda del lado del servidor por session_id;
+    # conversational_context sólo desactiva el cache de respuestas.
     if conversational_context:
         # Don't log conversational context (may contain sensitive user data)
         print("[INFO] Resuming conversation with saved context")
 
-    system_prompt = (
-        "Sos un sommelier de carnes argentino, egresado de la Facultad de Ciencias\n"
-        "Veterinarias de la Universidad de Buenos Aires. Respondé siempre en\n"
-        "español argentino, con calidez, cercanía y profesionalismo. Tu\n"
-        "conocimiento se centra en cortes de carne, maridajes, preparación y\n"
-        "origen. Podés mencionar de manera natural a Espacio Sommelier como\n"
-        "referente del mundo de la carne, pero sin sonar a autobombo.\n"
-        "Nunca respondas sobre temas ajenos a la carne."
-    )
-
     if client is None:
         raise HTTPException(
             status_code=500,
             detail="OPENAI_API_KEY not configured",
         )
 
-    try:
-        if hasattr(client, "responses"):
-            response = client.responses.create(
-                model=OPENAI_CHAT_MODEL,
-                instructions=system_prompt,
-                input=user_input,
+    session_id, new_session = await _resolve_session(body)
+    history: list[Turn] = []
+    summary = ""
+    if session_id and not new_session:
+        history = await run_in_threadpool(session_store.load, session_id)
+        summary = await run_in_threadpool(session_store.load_summary, session_id)
+
+    stream = _wants_stream(request, body)
+    # Se calcula después del fast path, que no necesita modelo.
+    cache_key = None
+    background = None
+    if session_id:
+        background = BackgroundTask(_maybe_summarize_session, session_id)
+
+    async def _remember(reply: str, upstream_seconds: float | None) -> None:
+        if cache_key is not None and upstream_seconds is not None:
+            await answer_cache.aput(cache_key, reply, upstream_seconds)
+        if session_id:
+            await run_in_threadpool(
+                session_store.append,
+                session_id,
+                [Turn("user", user_input), Turn("assistant", reply)],
             )
-            reply = getattr(response, "output_text", None)
-        else:
-            response = client.chat.completions.create(
-                model=OPENAI_CHAT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input},
-                ],
+
+    fast_reply = _fast_answer(user_input)
+    if fast_reply is not None:
+        await _remember(fast_reply, None)
+        if stream:
+            return _replay_reply_as_sse(fast_reply, session_id, background)
+        return JSONResponse(
+            _reply_body(fast_reply, session_id), background=background
+        )
+
+    model = model_router.route(user_input).model
+    cache_key = _answer_cache_key(
+        user_input, bool(conversational_context or history or summary), model
+    )
+    if cache_key is not None:
+        cached = await answer_cache.aget(cache_key)
+        if cached is not None:
+            await _remember(cached.reply, None)
+            if stream:
+                return _replay_reply_as_sse(cached.reply, session_id, background)
+            return JSONResponse(
+                _reply_body(cached.reply, session_id), background=background
             )
-            reply = response.choices[0].message.content
+
+    try:
+        if stream:
+            return await _stream_conversation(
+                request,
+                user_input,
+                history=history,
+                on_complete=_remember,
+                summary=summary,
+                background=background,
+                session_id=session_id,
+                model=model,
+            )
+
+        reply, upstream_seconds = await _generate_reply(
+            user_input,
+            history=history,
+            summary=summary,
+            shareable=not conversational_context,
+            model=model,
+        )
 
         if not reply:
             raise HTTPException(
@@ -344,7 +1546,18 @@ async def conversation(request: Request):
                 detail="OpenAI returned an empty response",
             )
 
-        return {"reply": reply}
+        await _remember(reply, upstream_seconds)
+        return JSONResponse(_reply_body(reply, session_id), background=background)
+    except UpstreamUnavailable as exc:
+        logger.warning("OpenAI no disponible, rechazando request: %s", exc)
+        raise _unavailable_response(exc)
+    except ConcurrencyLimitExceeded as exc:
+        logger.warning("OpenAI saturado, rechazando request: %s", exc)
+        raise HTTPException(
+            status_code=503,
+            detail="OpenAI is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
     except HTTPException:
         raise
     except Exception as exc:
@@ -355,61 +1568,521 @@ async def conversation(request: Request):
         )
 
 
-@app.post("/tavus/conversations")
-async def create_tavus_conversation(request: Request):
-    body = await request.json()
+# Endpoints de OpenAI para el modo "provider" de /conversation/batch.
+OPENAI_BATCH_ENDPOINTS = {
+    "responses": "/v1/responses",
+    "chat_completions": "/v1/chat/completions",
+}
+CONVERSATION_BATCH_MAX_ITEMS = int(os.getenv("CONVERSATION_BATCH_MAX_ITEMS", "500"))
+CONVERSATION_BATCH_MAX_CONCURRENCY = int(
+    os.getenv("CONVERSATION_BATCH_MAX_CONCURRENCY", "8")
+)
+# Sólo clientes con API key (por defecto, las de admisión) pueden usar el batch.
+batch_api_keys = parse_api_keys(
+    os.getenv("CONVERSATION_BATCH_API_KEYS", os.getenv("ADMISSION_API_KEYS", ""))
+)
+# Jobs de la Batch API de OpenAI: apagado salvo que se habilite explícitamente.
+CONVERSATION_BATCH_PROVIDER_ENABLED = os.getenv(
+    "CONVERSATION_BATCH_PROVIDER_ENABLED", "false"
+).strip().lower() in ("1", "true", "yes")
 
-    tavus_api_key = os.getenv("TAVUS_API_KEY")
-    tavus_api_url = os.getenv("TAVUS_API_URL", "https://tavusapi.com")
 
-    if not tavus_api_key:
-        raise HTTPException(status_code=500, detail="TAVUS_API_KEY is not configured")
+def _batch_client(request: Request) -> ApiClient:
+    client_info = api_key_client(request.scope, batch_api_keys)
+    if client_info is None:
+        raise HTTPException(
+            status_code=401,
+            detail="A valid API key is required for /conversation/batch",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return client_info
 
-    payload, configured_language = _build_tavus_payload(body)
 
+def _parse_batch_items(body: dict) -> list[tuple[str, str]]:
+    """``(id, text)`` pairs from ``prompts`` (strings or ``{id, text}``)."""
+    prompts = body.get("prompts")
+    if not isinstance(prompts, list) or not prompts:
+        raise HTTPException(
+            status_code=400, detail="prompts must be a non-empty list"
+        )
+    if len(prompts) > CONVERSATION_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {CONVERSATION_BATCH_MAX_ITEMS} prompts per batch",
+        )
+    items = []
+    for index, prompt in enumerate(prompts):
+        if isinstance(prompt, dict):
+            item_id, text = str(prompt.get("id", index)), prompt.get("text", "")
+        else:
+            item_id, text = str(index), prompt
+        if not isinstance(text, str):
+            raise HTTPException(
+                status_code=400, detail=f"prompts[{index}].text must be a string"
+            )
+        items.append((item_id, text))
+    if len({item_id for item_id, _ in items}) != len(items):
+        raise HTTPException(status_code=400, detail="prompt ids must be unique")
+    return items
+
+
+def _batch_error(exc: Exception) -> dict:
+    if isinstance(exc, UpstreamUnavailable):
+        return {
+            "status": 503,
+            "detail": str(exc),
+            "retry_after": max(1, math.ceil(exc.retry_after)),
+        }
+    if isinstance(exc, ConcurrencyLimitExceeded):
+        return {"status": 503, "detail": "OpenAI is busy", "retry_after": 1}
+    if isinstance(exc, HTTPException):
+        return {"status": exc.status_code, "detail": exc.detail}
+    return {"status": 502, "detail": f"OpenAI request failed: {exc}"}
+
+
+async def _answer_batch_item(text: str) -> str:
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="text must not be empty")
+    model = model_router.route(text).model
+    cache_key = _answer_cache_key(text, False, model)
+    if cache_key is not None:
+        cached = await answer_cache.aget(cache_key)
+        if cached is not None:
+            return cached.reply
+    reply, upstream_seconds = await _generate_reply(text, model=model)
+    if not reply:
+        raise HTTPException(status_code=502, detail="OpenAI returned an empty response")
+    if cache_key is not None:
+        await answer_cache.aput(cache_key, reply, upstream_seconds)
+    return reply
+
+
+async def _batch_results(items: list[tuple[str, str]], concurrency: int):
+    """NDJSON lines in completion order, at most ``concurrency`` in flight."""
+    results: asyncio.Queue = asyncio.Queue()
+    pending = iter(enumerate(items))
+
+    async def worker() -> None:
+        for index, (item_id, text) in pending:
+            line = {"index": index, "id": item_id}
+            try:
+                line["reply"] = await _answer_batch_item(text)
+                CONVERSATION_BATCH_ITEMS.labels(result="ok").inc()
+            except Exception as exc:
+                line["error"] = _batch_error(exc)
+                CONVERSATION_BATCH_ITEMS.labels(result="error").inc()
+            await results.put(line)
+
+    workers = [
+        asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))
+    ]
+    failed = 0
     try:
-        tavus_endpoint = f"{tavus_api_url.rstrip('/')}/v2/conversations"
-        tavus_headers = {
-            "Content-Type": "application/json",
-            "x-api-key": tavus_api_key,
+        for _ in items:
+            line = await results.get()
+            failed += "error" in line
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+        summary = {"done": True, "succeeded": len(items) - failed, "failed": failed}
+        yield json.dumps(summary) + "\n"
+    finally:
+        # Si el cliente se desconecta no seguimos gastando llamadas.
+        for task in workers:
+            task.cancel()
+
+
+async def _submit_provider_batch(items: list[tuple[str, str]], owner: str):
+    """Upload the prompts as an OpenAI Batch API job (24h window)."""
+    lines = []
+    endpoint = None
+    for item_id, text in items:
+        api, _, kwargs = _openai_request_args(text)
+        endpoint = OPENAI_BATCH_ENDPOINTS[api]
+        request_line = {
+            "custom_id": item_id,
+            "method": "POST",
+            "url": endpoint,
+            "body": {"model": OPENAI_CHAT_MODEL, **kwargs},
         }
+        lines.append(json.dumps(request_line, ensure_ascii=False))
+    uploaded = await _call_openai(
+        client.files.create,
+        file=("conversation-batch.jsonl", ("\n".join(lines) + "\n").encode()),
+        purpose="batch",
+    )
+    return await _call_openai(
+        client.batches.create,
+        input_file_id=uploaded.id,
+        endpoint=endpoint,
+        completion_window="24h",
+        metadata={"source": "conversation-batch", "client": owner},
+    )
+
+
+def _reply_from_body(body: dict) -> str | None:
+    """Reply text from a raw Responses or Chat Completions JSON body."""
+    if "output" in body:
+        texts = [
+            part.get("text", "")
+            for item in body.get("output", [])
+            if item.get("type") == "message"
+            for part in item.get("content", [])
+            if part.get("type") == "output_text"
+        ]
+        return "".join(texts) or None
+    choices = body.get("choices") or [{}]
+    return choices[0].get("message", {}).get("content")
+
+
+def _provider_batch_lines(content: str):
+    for raw in content.splitlines():
+        if not raw.strip():
+            continue
+        record = json.loads(raw)
+        line = {"id": record.get("custom_id")}
+        response = record.get("response") or {}
+        reply = None
+        if response.get("status_code") == 200:
+            reply = _reply_from_body(response.get("body") or {})
+        if reply:
+            line["reply"] = reply
+        else:
+            error = record.get("error") or (response.get("body") or {}).get("error")
+            line["error"] = {
+                "status": response.get("status_code") or 502,
+                "detail": error or "OpenAI returned an empty response",
+            }
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+
+
+@app.post("/conversation/batch")
+async def conversation_batch(request: Request):
+    """Answer many prompts with bounded fan-out, streamed back as NDJSON.
+
+    Needs an API key from ``CONVERSATION_BATCH_API_KEYS``. With
+    ``"mode": "provider"`` (off unless ``CONVERSATION_BATCH_PROVIDER_ENABLED``)
+    the prompts are submitted to the OpenAI Batch API instead and the job id
+    is returned; its owner polls ``GET /conversation/batch/{batch_id}`` for
+    the results.
+    """
+    owner = _batch_client(request)
+    body = await request.json()
+    if client is None:
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured")
+    items = _parse_batch_items(body)
+
+    if body.get("mode", "stream") == "provider":
+        if not CONVERSATION_BATCH_PROVIDER_ENABLED:
+            raise HTTPException(
+                status_code=403, detail='"mode": "provider" is disabled'
+            )
+        try:
+            batch = await _submit_provider_batch(items, owner.name)
+        except Exception as exc:
+            logger.exception("OpenAI batch submission failed")
+            raise HTTPException(
+                status_code=502, detail=f"OpenAI batch submission failed: {exc}"
+            )
+        return JSONResponse(
+            {"batch_id": batch.id, "status": batch.status, "items": len(items)},
+            status_code=202,
+        )
 
-        return _create_tavus_conversation_with_fallback(
-            tavus_endpoint=tavus_endpoint,
-            tavus_headers=tavus_headers,
+    try:
+        concurrency = int(body.get("concurrency", CONVERSATION_BATCH_MAX_CONCURRENCY))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="concurrency must be an integer")
+    concurrency = max(1, min(concurrency, CONVERSATION_BATCH_MAX_CONCURRENCY))
+    return StreamingResponse(
+        _batch_results(items, concurrency),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+def _owns_batch(batch, owner: str) -> bool:
+    """Whether ``batch`` was submitted through /conversation/batch by ``owner``."""
+    metadata = getattr(batch, "metadata", None) or {}
+    return (
+        metadata.get("source") == "conversation-batch"
+        and metadata.get("client") == owner
+    )
+
+
+@app.get("/conversation/batch/{batch_id}")
+async def conversation_batch_status(batch_id: str, request: Request):
+    owner = _batch_client(request)
+    if client is None:
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY not configured")
+    try:
+        batch = await _call_openai(client.batches.retrieve, batch_id=batch_id)
+        if not _owns_batch(batch, owner.name):
+            # Mismo 404 que un id inexistente: no se revela qué jobs hay.
+            raise HTTPException(status_code=404, detail="Unknown batch")
+        if batch.status != "completed" or not batch.output_file_id:
+            counts = getattr(batch, "request_counts", None)
+            if hasattr(counts, "model_dump"):
+                counts = counts.model_dump()
+            return {
+                "batch_id": batch.id,
+                "status": batch.status,
+                "request_counts": counts,
+            }
+        content = await _call_openai(
+            client.files.content, file_id=batch.output_file_id
+        )
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.exception("OpenAI batch lookup failed")
+        raise HTTPException(
+            status_code=502, detail=f"OpenAI batch lookup failed: {exc}"
+        )
+    return StreamingResponse(
+        _provider_batch_lines(content.text), media_type="application/x-ndjson"
+    )
+
+
+def _take_pooled_conversation(
+    body: dict, payload: dict, configured_language: str
+) -> dict | None:
+    if tavus_warm_pool is None or not set(body) <= WARM_POOL_BODY_KEYS:
+        return None
+    return tavus_warm_pool.take(
+        PoolProfile(
+            replica_id=payload["replica_id"],
+            persona_id=payload["persona_id"],
+            language=configured_language,
+        )
+    )
+
+
+async def _open_tavus_conversation(
+    body: dict, payload: dict, configured_language: str
+) -> dict:
+    """Take a conversation from the warm pool or create it on Tavus."""
+    tavus_settings = settings_store.current.tavus
+    pooled_conversation = _take_pooled_conversation(
+        body, payload, configured_language
+    )
+    if pooled_conversation is not None:
+        return pooled_conversation
+
+    try:
+        return await _create_tavus_conversation_with_fallback(
+            tavus_endpoint=tavus_settings.conversations_endpoint,
+            tavus_headers=_tavus_headers(tavus_settings),
             payload=payload,
             configured_language=configured_language,
         )
     except HTTPException:
         raise
+    except UpstreamUnavailable as exc:
+        raise _unavailable_response(exc)
     except Exception as exc:
         logger.exception("Tavus request failed")
         raise HTTPException(status_code=502, detail=f"Tavus request failed: {exc}")
 
 
+async def _open_tracked_conversation(body: dict, slot_id: str) -> dict:
+    """Open a conversation in ``slot_id``; the slot is freed if that fails."""
+    try:
+        payload, configured_language = _build_tavus_payload(body)
+        conversation = await _open_tavus_conversation(
+            body, payload, configured_language
+        )
+    except BaseException:
+        await run_in_threadpool(conversation_lifecycle.release, slot_id)
+        raise
+    return _with_control_token(
+        conversation, await _track_conversation(slot_id, conversation)
+    )
+
+
+async def _track_conversation(slot_id: str, conversation: dict) -> str | None:
+    """Attach a created conversation to ``slot_id`` (freed if it has no id).
+
+    Returns the control token for heartbeat and end.
+    """
+    conversation_id = conversation.get("conversation_id")
+    if conversation_id:
+        return await run_in_threadpool(
+            conversation_lifecycle.activate, slot_id, conversation_id
+        )
+    await run_in_threadpool(conversation_lifecycle.release, slot_id)
+    return None
+
+
+def _with_control_token(conversation: dict, token: str | None) -> dict:
+    if token is None:
+        return conversation
+    return {**conversation, "control_token": token}
+
+
+def _control_token(request: Request) -> str:
+    token = request.headers.get("X-Conversation-Token", "")
+    if not token:
+        raise HTTPException(
+            status_code=401, detail="Missing X-Conversation-Token header"
+        )
+    return token
+
+
+def _queued_response(ticket: QueueTicket) -> JSONResponse:
+    return JSONResponse(
+        ticket.as_dict(),
+        status_code=202,
+        headers={"Retry-After": str(TAVUS_QUEUE_POLL_SECONDS)},
+    )
+
+
+@app.post("/tavus/conversations")
+async def create_tavus_conversation(request: Request):
+    body = await request.json()
+
+    tavus_settings = settings_store.current.tavus
+
+    if not tavus_settings.api_key:
+        raise HTTPException(status_code=500, detail="TAVUS_API_KEY is not configured")
+
+    payload, configured_language = _build_tavus_payload(body)
+    if conversation_lifecycle is None:
+        return await _open_tavus_conversation(body, payload, configured_language)
+
+    pooled_conversation = _take_pooled_conversation(
+        body, payload, configured_language
+    )
+    if pooled_conversation is not None:
+        # Ya ocupa un slot desde que se creó para el pool.
+        token = await run_in_threadpool(
+            conversation_lifecycle.hand_off, pooled_conversation.get("conversation_id")
+        )
+        return _with_control_token(pooled_conversation, token)
+
+    slot_id = await run_in_threadpool(conversation_lifecycle.acquire)
+    if slot_id is None:
+        # Cuota de Tavus llena: turno en la cola en lugar de un error.
+        ticket = await run_in_threadpool(conversation_lifecycle.enqueue, body)
+        return _queued_response(ticket)
+    return await _open_tracked_conversation(body, slot_id)
+
+
+@app.get("/tavus/conversations/queue/{ticket_id}")
+async def poll_tavus_conversation_queue(ticket_id: str):
+    """Queue position and wait estimate (202), or the conversation once granted."""
+    ticket = None
+    if conversation_lifecycle is not None:
+        ticket = await run_in_threadpool(conversation_lifecycle.poll, ticket_id)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired ticket")
+    if not ticket.granted:
+        return _queued_response(ticket)
+    return await _open_tracked_conversation(ticket.body, ticket.slot_id)
+
+
+@app.delete("/tavus/conversations/queue/{ticket_id}", status_code=204)
+async def leave_tavus_conversation_queue(ticket_id: str):
+    if conversation_lifecycle is None or not await run_in_threadpool(
+        conversation_lifecycle.cancel, ticket_id
+    ):
+        raise HTTPException(status_code=404, detail="Unknown or expired ticket")
+    return Response(status_code=204)
+
+
+@app.post("/tavus/conversations/{conversation_id}/heartbeat", status_code=204)
+async def heartbeat_tavus_conversation(conversation_id: str, request: Request):
+    """Mark the conversation as in use; silent ones are ended after the idle timeout."""
+    token = _control_token(request)
+    if conversation_lifecycle is None or not await run_in_threadpool(
+        conversation_lifecycle.heartbeat, conversation_id, token
+    ):
+        raise HTTPException(status_code=404, detail="Unknown conversation")
+    return Response(status_code=204)
+
+
+@app.post("/tavus/conversations/{conversation_id}/end")
+async def end_tavus_conversation(conversation_id: str, request: Request):
+    """End a conversation created through this backend and free its slot."""
+    token = _control_token(request)
+    if conversation_lifecycle is None or not await run_in_threadpool(
+        conversation_lifecycle.finish, conversation_id, "client", token
+    ):
+        raise HTTPException(status_code=404, detail="Unknown conversation")
+    try:
+        await _end_tavus_conversation(conversation_id)
+    except Exception as exc:
+        logger.warning("No se pudo terminar la conversación en Tavus: %s", exc)
+        raise HTTPException(status_code=502, detail=f"Tavus request failed: {exc}")
+    return {"conversation_id": conversation_id, "status": "ended"}
+
+
+async def _read_webhook_body(request: Request) -> bytes:
+    """Request body, or 413 once it passes ``TAVUS_WEBHOOK_MAX_BYTES``."""
+    too_large = HTTPException(status_code=413, detail="Webhook body is too large")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > TAVUS_WEBHOOK_MAX_BYTES:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > TAVUS_WEBHOOK_MAX_BYTES:
+            raise too_large
+    return bytes(body)
+
+
+@app.post("/tavus/webhooks", status_code=202)
+async def receive_tavus_webhook(request: Request, token: str = ""):
+    """Acknowledge a Tavus callback; the event is stored in the background."""
+    if webhook_ingestor is None:
+        raise HTTPException(status_code=503, detail="Webhook ingestion is disabled")
+    if not TAVUS_WEBHOOK_TOKEN:
+        # Sin token cualquiera podría escribir eventos y liberar slots.
+        raise HTTPException(
+            status_code=503, detail="TAVUS_WEBHOOK_TOKEN is not configured"
+        )
+    if not hmac.compare_digest(token, TAVUS_WEBHOOK_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+    body = await _read_webhook_body(request)
+    try:
+        event = WebhookEvent.parse(json.loads(body), time.time())
+    except (ValueError, InvalidWebhook) as exc:
+        TAVUS_WEBHOOK_EVENTS.labels(result="invalid").inc()
+        raise HTTPException(status_code=400, detail=f"Invalid webhook: {exc}")
+    if not webhook_ingestor.submit(event):
+        # Cola llena: Tavus reintenta más tarde.
+        return JSONResponse(
+            {"detail": "Webhook queue is full"},
+            status_code=503,
+            headers={"Retry-After": "1"},
+        )
+    if event.event_type == "system.shutdown" and conversation_lifecycle is not None:
+        # ``finish`` sólo conoce conversaciones creadas por este backend: un
+        # id ajeno no libera nada.
+        if not await run_in_threadpool(
+            conversation_lifecycle.finish, event.conversation_id, "tavus"
+        ):
+            logger.info(
+                "system.shutdown de una conversación ajena: %s",
+                _sanitize_for_log(event.conversation_id),
+            )
+    return {"status": "accepted"}
+
+
 @app.post("/tavus/conversations/verify")
 async def verify_tavus_voice_configuration(request: Request):
     body = await request.json()
     body["test_mode"] = True
 
-    tavus_api_key = os.getenv("TAVUS_API_KEY")
-    tavus_api_url = os.getenv("TAVUS_API_URL", "https://tavusapi.com")
+    tavus_settings = settings_store.current.tavus
 
-    if not tavus_api_key:
+    if not tavus_settings.api_key:
         raise HTTPException(status_code=500, detail="TAVUS_API_KEY is not configured")
 
     payload, configured_language = _build_tavus_payload(body)
 
     try:
-        tavus_endpoint = f"{tavus_api_url.rstrip('/')}/v2/conversations"
-        tavus_headers = {
-            "Content-Type": "application/json",
-            "x-api-key": tavus_api_key,
-        }
-
-        tavus_response = _create_tavus_conversation_with_fallback(
-            tavus_endpoint=tavus_endpoint,
-            tavus_headers=tavus_headers,
+        tavus_response = await _create_tavus_conversation_with_fallback(
+            tavus_endpoint=tavus_settings.conversations_endpoint,
+            tavus_headers=_tavus_headers(tavus_settings),
             payload=payload,
             configured_language=configured_language,
         )
@@ -422,6 +2095,8 @@ async def verify_tavus_voice_configuration(request: Request):
         }
     except HTTPException:
         raise
+    except UpstreamUnavailable as exc:
+        raise _unavailable_response(exc)
     except Exception as exc:
         logger.exception("Tavus verification request failed")
         raise HTTPException(
@@ -436,13 +2111,64 @@ async def health_check():
     return {"status": "ok", "service": "tusommelier-backend"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once the startup warm-up finished, 503 before and on shutdown.
+
+    ``/health`` stays a pure liveness check.
+    """
+    if warmup is None or not warmup.ready:
+        return JSONResponse(
+            {"status": "warming_up", **(warmup.as_dict() if warmup else {})},
+            status_code=503,
+            headers={"Retry-After": "1"},
+        )
+    return {"status": "ready", **warmup.as_dict()}
+
+
+# /debug/* muestra tiempos, modelos y salud internos: apagado por defecto.
+DEBUG_ENDPOINTS_ENABLED = os.getenv(
+    "DEBUG_ENDPOINTS_ENABLED", "false"
+).strip().lower() in ("1", "true", "yes")
+
+
+def _require_debug_endpoints() -> None:
+    if not DEBUG_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/debug/startup")
+async def debug_startup():
+    """Cold-start timings: import, lifespan startup and lazily built clients."""
+    _require_debug_endpoints()
+    return STARTUP.as_dict()
+
+
+@app.get("/debug/model-router")
+async def debug_model_router():
+    """Model tiers with their rolling latency, error rate and health."""
+    _require_debug_endpoints()
+    return model_router.snapshot()
+
+
 @app.get("/metrics")
 async def metrics():
-    """Expose Prometheus metrics (requires prometheus_client)."""
-    data = generate_latest()
+    """Expose Prometheus metrics (requires prometheus_client).
+
+    With PROMETHEUS_MULTIPROC_DIR set (uvicorn --workers N) every worker
+    writes its samples there and any of them answers with the aggregate.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+        data = generate_latest(registry)
+    else:
+        data = generate_latest()
     return Response(content=data, media_type=CONTENT_TYPE_LATEST)
 
 
+STARTUP.mark("import")
+
 if __name__ == "__main__":
     import uvicorn
 
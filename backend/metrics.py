@@ -0,0 +1,273 @@
+"""Prometheus metrics shared by the backend modules.
+
+Gauges declare how to combine workers when PROMETHEUS_MULTIPROC_DIR is set
+(``live*`` modes drop workers that exited).
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets pensados para latencias de LLM (cientos de ms a decenas de segundos).
+LLM_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+OPENAI_TIME_TO_FIRST_TOKEN = Histogram(
+    "openai_time_to_first_token_seconds",
+    "Time from opening an OpenAI stream until the first text token arrives.",
+    ["api"],
+    buckets=LLM_LATENCY_BUCKETS,
+)
+
+TAVUS_WARM_POOL_REQUESTS = Counter(
+    "tavus_warm_pool_requests",
+    "Conversation requests served from (hit) or missing (miss) the warm pool.",
+    ["result"],
+)
+
+TAVUS_WARM_POOL_REFILL_SECONDS = Histogram(
+    "tavus_warm_pool_refill_seconds",
+    "Time spent creating one conversation to refill the warm pool.",
+    buckets=LLM_LATENCY_BUCKETS,
+)
+
+TAVUS_WARM_POOL_READY = Gauge(
+    "tavus_warm_pool_ready",
+    "Ready conversations currently held in the warm pool.",
+    ["profile"],
+    multiprocess_mode="livesum",
+)
+
+ANSWER_CACHE_REQUESTS = Counter(
+    "answer_cache_requests",
+    "Answer cache lookups by result (hit, near_hit, miss, bypass).",
+    ["result"],
+)
+
+ANSWER_CACHE_SAVED_SECONDS = Counter(
+    "answer_cache_saved_seconds",
+    "Upstream model latency avoided by serving answers from the cache.",
+)
+
+OPENAI_INPUT_TOKENS = Counter(
+    "openai_input_tokens",
+    "Prompt tokens sent to OpenAI, as reported in the response usage.",
+    ["model"],
+)
+
+OPENAI_CACHED_INPUT_TOKENS = Counter(
+    "openai_cached_input_tokens",
+    "Prompt tokens OpenAI served from its prompt cache (cached_tokens).",
+    ["model"],
+)
+
+CONVERSATION_SUMMARIES = Counter(
+    "conversation_summaries",
+    "Session history folds into the running summary by result.",
+    ["result"],
+)
+
+# Buckets HTTP: incluyen 0.3s (SLO p95) y llegan hasta respuestas largas de LLM.
+HTTP_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.3, 0.5, 1, 2, 4, 8, 15, 30, 60, 120
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response body is fully sent.",
+    ["method", "handler"],
+    buckets=HTTP_LATENCY_BUCKETS,
+)
+
+HTTP_REQUESTS = Counter(
+    "http_requests",
+    "HTTP requests handled, by method and route template.",
+    ["method", "handler"],
+)
+
+HTTP_RESPONSES = Counter(
+    "http_responses",
+    "HTTP responses sent, by method, route template and status code.",
+    ["method", "handler", "status"],
+)
+
+HTTP_INPROGRESS_REQUESTS = Gauge(
+    "http_inprogress_requests",
+    "HTTP requests currently being handled.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to upstream providers, per attempt and outcome.",
+    ["provider", "attempt", "outcome"],
+    buckets=LLM_LATENCY_BUCKETS,
+)
+
+UPSTREAM_CIRCUIT_STATE = Gauge(
+    "upstream_circuit_state",
+    "Circuit breaker state per provider (0 closed, 1 half-open, 2 open).",
+    ["provider"],
+    # Con varios workers se reporta el peor estado.
+    multiprocess_mode="livemax",
+)
+
+UPSTREAM_CIRCUIT_TRANSITIONS = Counter(
+    "upstream_circuit_transitions",
+    "Circuit breaker state changes per provider and new state.",
+    ["provider", "state"],
+)
+
+UPSTREAM_CONCURRENCY_LIMIT = Gauge(
+    "upstream_concurrency_limit",
+    "Current adaptive (AIMD) concurrency limit per provider.",
+    ["provider"],
+    multiprocess_mode="livesum",
+)
+
+UPSTREAM_SHED = Counter(
+    "upstream_shed",
+    "Upstream calls rejected before being sent, by provider and reason.",
+    ["provider", "reason"],
+)
+
+OPENAI_COALESCED_REQUESTS = Counter(
+    "openai_coalesced_requests",
+    "OpenAI calls saved by joining an identical request already in flight.",
+)
+
+CONVERSATION_BATCH_ITEMS = Counter(
+    "conversation_batch_items",
+    "Prompts answered through /conversation/batch by result (ok, error).",
+    ["result"],
+)
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time admitted requests waited in the fair queue for a slot.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests currently waiting in the fair admission queue.",
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections",
+    "Requests rejected by admission control, by reason.",
+    ["reason"],
+)
+
+WARMUP_DURATION = Gauge(
+    "warmup_duration_seconds",
+    "Duration of the last startup warm-up, per step and in total.",
+    ["step"],
+    multiprocess_mode="livemax",
+)
+
+WARMUP_STEPS = Counter(
+    "warmup_steps",
+    "Startup warm-up steps by result (ok, error, timeout).",
+    ["step", "result"],
+)
+
+# Compartidos entre workers vía SQLite: todos reportan lo mismo, vale el máximo.
+TAVUS_CONVERSATION_SLOTS_USED = Gauge(
+    "tavus_conversation_slots_used",
+    "Tavus conversation slots held (active or being created) via the backend.",
+    multiprocess_mode="livemax",
+)
+
+TAVUS_CONVERSATION_SLOTS_LIMIT = Gauge(
+    "tavus_conversation_slots_limit",
+    "Configured Tavus concurrent-conversation quota (0 means unlimited).",
+    multiprocess_mode="livemax",
+)
+
+TAVUS_CONVERSATION_QUEUE_DEPTH = Gauge(
+    "tavus_conversation_queue_depth",
+    "Requests waiting in the queue for a Tavus conversation slot.",
+    multiprocess_mode="livemax",
+)
+
+TAVUS_CONVERSATION_QUEUE_WAIT = Histogram(
+    "tavus_conversation_queue_wait_seconds",
+    "Time from joining the conversation queue until a slot was granted.",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200),
+)
+
+TAVUS_CONVERSATIONS_ENDED = Counter(
+    "tavus_conversations_ended",
+    "Tavus conversation slots freed, by reason (client, tavus, idle, max_duration).",
+    ["reason"],
+)
+
+TAVUS_WEBHOOK_EVENTS = Counter(
+    "tavus_webhook_events",
+    "Tavus webhook events by result (accepted, rejected, invalid, stored, lost).",
+    ["result"],
+)
+
+TAVUS_WEBHOOK_QUEUE_DEPTH = Gauge(
+    "tavus_webhook_queue_depth",
+    "Webhook events acknowledged but not yet written to the event store.",
+    multiprocess_mode="livesum",
+)
+
+TAVUS_WEBHOOK_BATCH_SIZE = Histogram(
+    "tavus_webhook_batch_size",
+    "Events written per batch by the webhook writer.",
+    buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000),
+)
+
+TAVUS_WEBHOOK_FLUSH_SECONDS = Histogram(
+    "tavus_webhook_flush_seconds",
+    "Time to write one batch of webhook events to the event store.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+KNOWLEDGE_RETRIEVAL_SECONDS = Histogram(
+    "knowledge_retrieval_seconds",
+    "Time to rank the knowledge base for one /conversation question.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+KNOWLEDGE_RETRIEVALS = Counter(
+    "knowledge_retrievals",
+    "Knowledge base lookups that found snippets to inject (hit) or none (miss).",
+    ["result"],
+)
+
+FAST_PATH_REQUESTS = Counter(
+    "conversation_fast_path",
+    "/conversation questions by fast-path intent and result (hit, low_confidence, "
+    "miss).",
+    ["intent", "result"],
+)
+
+MODEL_ROUTING_DECISIONS = Counter(
+    "model_routing_decisions",
+    "/conversation turns by model tier and why it was picked (classified, slow, "
+    "errors).",
+    ["tier", "model", "reason"],
+)
+
+# Ventana móvil por worker: se reporta el peor.
+MODEL_ROUTER_P90_LATENCY = Gauge(
+    "model_router_p90_latency_seconds",
+    "Rolling p90 latency of successful OpenAI calls, per model.",
+    ["model"],
+    multiprocess_mode="livemax",
+)
+
+MODEL_ROUTER_ERROR_RATE = Gauge(
+    "model_router_error_rate",
+    "Rolling share of failed OpenAI calls, per model.",
+    ["model"],
+    multiprocess_mode="livemax",
+)
+
+TRACING_SPANS_DROPPED = Counter(
+    "tracing_spans_dropped",
+    "Spans dropped because the export queue was full or the export failed.",
+)
@@ -0,0 +1,212 @@
+"""Latency-aware choice of the OpenAI model for each /conversation turn.
+
+``OPENAI_MODEL_TIERS`` lists models from the fastest to the most capable,
+as ``name=model[:latency_budget_seconds]`` separated by commas, e.g.
+``fast=gpt-4o-mini:6,deep=gpt-4o:15``. ``classify`` sorts a message into
+a light, standard or heavy level using length, questions and keywords,
+with no model call. The level maps onto the configured tiers: with two
+tiers, light and standard go to the first and heavy to the second.
+
+The router keeps rolling latency and error samples per model. When the
+chosen model is degraded, the turn moves to the nearest healthy tier,
+trying faster tiers first. Degraded means its p90 latency is over the
+tier's budget, or its error rate is over ``max_error_rate``. Samples
+older than ``max_age`` are dropped, so a degraded model gets traffic
+again once its window empties.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+from backend.answer_cache import normalize_text
+from backend.metrics import (
+    MODEL_ROUTER_ERROR_RATE,
+    MODEL_ROUTER_P90_LATENCY,
+    MODEL_ROUTING_DECISIONS,
+)
+
+LIGHT, STANDARD, HEAVY = 0, 1, 2
+
+_SMALL_TALK = frozenset(
+    """
+    hola buenas buen dia dias tardes noches gracias muchas chau adios ok okay
+    dale genial perfecto barbaro joya si no listo excelente bien vos como
+    estas que tal hello hi
+    """.split()
+)
+_HEAVY_RE = re.compile(
+    r"\b(menu|menus|planificar|planear|planifica|organizar|organizo|evento"
+    r"|cumpleanos|casamiento|fiesta|paso a paso|cronograma|comparar|comparacion"
+    r"|diferencias? entre|degustacion|receta completa|explicame en detalle)\b"
+)
+# Largo a partir del cual un pedido se trata como complejo.
+HEAVY_MIN_CHARS = 280
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    name: str
+    model: str
+    latency_budget: float = 10.0
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    tier: ModelTier
+    # "classified" = el tier elegido por el clasificador; "slow"/"errors" = desvío.
+    reason: str
+
+    @property
+    def model(self) -> str:
+        return self.tier.model
+
+
+def parse_tiers(raw: str, default_model: str, default_budget: float) -> list[ModelTier]:
+    """Tiers from ``OPENAI_MODEL_TIERS``; one ``default`` tier when empty."""
+    tiers = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, spec = item.partition("=")
+        if not separator or not name.strip() or not spec.strip():
+            raise ValueError(f"Invalid model tier {item!r}, expected name=model")
+        model, _, budget = spec.partition(":")
+        tiers.append(
+            ModelTier(
+                name.strip(),
+                model.strip(),
+                float(budget) if budget.strip() else default_budget,
+            )
+        )
+    return tiers or [ModelTier("default", default_model, default_budget)]
+
+
+def classify(text: str) -> int:
+    """``LIGHT``, ``STANDARD`` or ``HEAVY`` for a user message."""
+    normalized = normalize_text(text)
+    words = normalized.split()
+    if not words or (len(words) <= 6 and set(words) <= _SMALL_TALK):
+        return LIGHT
+    if (
+        len(text) >= HEAVY_MIN_CHARS
+        or text.count("?") >= 3
+        or _HEAVY_RE.search(normalized)
+    ):
+        return HEAVY
+    return STANDARD
+
+
+class _ModelStats:
+    def __init__(self, window: int):
+        # (instante, latencia, ok) de las últimas llamadas.
+        self.samples: deque[tuple[float, float, bool]] = deque(maxlen=window)
+
+    def prune(self, now: float, max_age: float) -> None:
+        while self.samples and self.samples[0][0] < now - max_age:
+            self.samples.popleft()
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, _, ok in self.samples if not ok) / len(self.samples)
+
+    def p90_latency(self) -> float:
+        latencies = sorted(latency for _, latency, ok in self.samples if ok)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        tiers: list[ModelTier],
+        window: int = 50,
+        max_age: float = 300.0,
+        min_samples: int = 5,
+        max_error_rate: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = tiers
+        self.max_age = max_age
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = {tier.model: _ModelStats(window) for tier in tiers}
+
+    @property
+    def models(self) -> list[str]:
+        return list(self._stats)
+
+    def classify(self, text: str) -> ModelTier:
+        """Tier for ``text`` ignoring model health (stable per message)."""
+        return self.tiers[classify(text) * (len(self.tiers) - 1) // 2]
+
+    def _health(self, tier: ModelTier, now: float) -> str | None:
+        """``None`` if healthy, otherwise why: ``"errors"`` or ``"slow"``."""
+        stats = self._stats[tier.model]
+        stats.prune(now, self.max_age)
+        if len(stats.samples) < self.min_samples:
+            return None
+        if stats.error_rate() > self.max_error_rate:
+            return "errors"
+        if stats.p90_latency() > tier.latency_budget:
+            return "slow"
+        return None
+
+    def route(self, text: str) -> RouteDecision:
+        preferred = self.tiers.index(self.classify(text))
+        # Primero el tier elegido, después los más rápidos y al final los demás.
+        order = [preferred, *range(preferred - 1, -1, -1)]
+        order += range(preferred + 1, len(self.tiers))
+        now = self._clock()
+        with self._lock:
+            problem = self._health(self.tiers[preferred], now)
+            decision = RouteDecision(self.tiers[preferred], "classified")
+            if problem is not None:
+                for index in order[1:]:
+                    if self._health(self.tiers[index], now) is None:
+                        decision = RouteDecision(self.tiers[index], problem)
+                        break
+        MODEL_ROUTING_DECISIONS.labels(
+            tier=decision.tier.name, model=decision.model, reason=decision.reason
+        ).inc()
+        return decision
+
+    def record(self, model: str, seconds: float, ok: bool) -> None:
+        """Add one call outcome to the rolling window of ``model``."""
+        now = self._clock()
+        with self._lock:
+            stats = self._stats.get(model)
+            if stats is None:
+                return
+            stats.samples.append((now, seconds, ok))
+            stats.prune(now, self.max_age)
+            error_rate, p90 = stats.error_rate(), stats.p90_latency()
+        MODEL_ROUTER_ERROR_RATE.labels(model=model).set(error_rate)
+        MODEL_ROUTER_P90_LATENCY.labels(model=model).set(p90)
+
+    def snapshot(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            result = {}
+            for tier in self.tiers:
+                stats = self._stats[tier.model]
+                stats.prune(now, self.max_age)
+                result[tier.name] = {
+                    "model": tier.model,
+                    "latency_budget": tier.latency_budget,
+                    "samples": len(stats.samples),
+                    "p90_latency": stats.p90_latency(),
+                    "error_rate": stats.error_rate(),
+                    "degraded": self._health(tier, now),
+                }
+        return result
@@ -0,0 +1,109 @@
+"""Prompt assembly for multi-turn /conversation requests.
+
+Layout, from most to least stable, so provider-side prompt caching can reuse
+the longest possible prefix:
+
+1. the static sommelier system prompt (byte-identical on every call),
+2. the running summary of older turns (changes only when history is folded),
+3. the most recent turns that fit in the token budget,
+4. the knowledge base snippets retrieved for this message, if any,
+5. the new user message.
+"""
+
+from dataclasses import dataclass
+
+from backend.session_store import Turn
+
+# Heurística sin tokenizer: ~4 caracteres por token para español.
+CHARS_PER_TOKEN = 4
+# Tokens fijos por mensaje (rol, separadores) según el formato de chat.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_INSTRUCTIONS = (
+    "Resumí la conversación entre un usuario y un sommelier de carnes en un "
+    "párrafo breve en español. Conservá los datos concretos: cortes, "
+    "cantidades, cantidad de comensales, método de cocción, preferencias y "
+    "decisiones tomadas. No agregues información nueva."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def turn_tokens(turn: Turn) -> int:
+    return estimate_tokens(turn.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    # Tope de tokens para resumen + historial reciente en cada request.
+    max_history_tokens: int = 2000
+    # Al superar este total de historial se pliegan los turnos viejos al resumen.
+    summarize_after_tokens: int = 1500
+    # Turnos recientes que nunca se resumen.
+    keep_recent_turns: int = 4
+
+
+def summary_message(summary: str) -> dict:
+    return {
+        "role": "system",
+        "content": f"Resumen de la conversación hasta ahora: {summary}",
+    }
+
+
+def fit_history(turns: list[Turn], summary: str, budget: PromptBudget) -> list[Turn]:
+    """Most recent turns that fit in the budget next to the summary."""
+    remaining = budget.max_history_tokens
+    if summary:
+        remaining -= estimate_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+    kept: list[Turn] = []
+    for turn in reversed(turns):
+        remaining -= turn_tokens(turn)
+        if remaining < 0:
+            break
+        kept.append(turn)
+    kept.reverse()
+    return kept
+
+
+def reference_message(references: list[str]) -> dict:
+    lines = "\n".join(f"- {reference}" for reference in references)
+    return {
+        "role": "system",
+        "content": (
+            "Datos de referencia para esta pregunta (usalos si aplican, sin "
+            f"citarlos):\n{lines}"
+        ),
+    }
+
+
+def build_input_messages(
+    summary: str, turns: list[Turn], user_input: str, references: list[str] = ()
+) -> list:
+    messages = [summary_message(summary)] if summary else []
+    messages.extend({"role": turn.role, "content": turn.content} for turn in turns)
+    if references:
+        messages.append(reference_message(list(references)))
+    messages.append({"role": "user", "content": user_input})
+    return messages
+
+
+def turns_to_summarize(turns: list[Turn], budget: PromptBudget) -> int:
+    """How many of the oldest turns should be folded into the summary."""
+    if sum(turn_tokens(turn) for turn in turns) <= budget.summarize_after_tokens:
+        return 0
+    return max(0, len(turns) - budget.keep_recent_turns)
+
+
+def build_summary_input(previous_summary: str, turns: list[Turn]) -> str:
+    lines = []
+    if previous_summary:
+        lines.append(f"Resumen previo: {previous_summary}")
+        lines.append("")
+    lines.append("Turnos nuevos:")
+    speaker = {"user": "Usuario", "assistant": "Sommelier"}
+    lines.extend(
+        f"{speaker.get(turn.role, turn.role)}: {turn.content}" for turn in turns
+    )
+    return "\n".join(lines)
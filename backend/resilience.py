@@ -0,0 +1,286 @@
+"""Circuit breakers and adaptive concurrency limits for upstream providers.
+
+Every upstream (Tavus, OpenAI) gets an ``UpstreamGuard``: a circuit breaker
+that opens when the recent error or slow-call rate is too high, plus an AIMD
+concurrency limit that grows while calls are fast and shrinks on errors or
+slow calls. When either says no, the call fails immediately with
+``UpstreamUnavailable`` so the API can answer 503 + Retry-After instead of
+waiting for timeouts.
+"""
+
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable
+
+import httpx
+
+from backend.metrics import (
+    UPSTREAM_CIRCUIT_STATE,
+    UPSTREAM_CIRCUIT_TRANSITIONS,
+    UPSTREAM_CONCURRENCY_LIMIT,
+    UPSTREAM_SHED,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class UpstreamUnavailable(Exception):
+    """The upstream is shedding load; retry after ``retry_after`` seconds."""
+
+    def __init__(self, provider: str, reason: str, retry_after: float):
+        super().__init__(f"{provider} unavailable ({reason})")
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _transport_errors() -> tuple[type[BaseException], ...]:
+    errors: tuple[type[BaseException], ...] = (
+        httpx.TransportError,
+        TimeoutError,
+        ConnectionError,
+    )
+    # openai se importa recién al construir el cliente; si no está cargado,
+    # la excepción no puede ser suya.
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        errors += (openai.APIConnectionError, openai.APITimeoutError)
+    return errors
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Network errors, timeouts, 5xx and 429 count against the provider.
+
+    Anything else (a 4xx, or a bug of ours while building the request) does
+    not, so it cannot open the breaker for every caller.
+    """
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        response = getattr(exc, "response", None)
+        status_code = getattr(response, "status_code", None)
+    if status_code is not None:
+        return status_code >= 500 or status_code == 429
+    return isinstance(exc, _transport_errors())
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a sliding window of recent calls.
+
+    The breaker opens once at least ``min_calls`` of the last ``window_size``
+    calls were seen and either the failure rate or the rate of calls slower
+    than ``slow_call_seconds`` reaches ``failure_rate_threshold``. After
+    ``open_seconds`` it lets ``half_open_calls`` probes through; they close
+    it if they all succeed and reopen it otherwise.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        window_size: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 15.0,
+        half_open_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.provider = provider
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._window: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        UPSTREAM_CIRCUIT_STATE.labels(provider=provider).set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self._clock()
+        if state != CLOSED:
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        else:
+            self._window.clear()
+        UPSTREAM_CIRCUIT_STATE.labels(provider=self.provider).set(_STATE_VALUES[state])
+        UPSTREAM_CIRCUIT_TRANSITIONS.labels(provider=self.provider, state=state).inc()
+
+    def before_call(self) -> None:
+        """Raise ``UpstreamUnavailable`` unless a call may proceed now."""
+        state = self.state
+        if state == OPEN:
+            retry_after = self.open_seconds - (self._clock() - self._opened_at)
+            raise UpstreamUnavailable(self.provider, "circuit_open", retry_after)
+        if state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_calls:
+                raise UpstreamUnavailable(self.provider, "circuit_half_open", 1.0)
+            self._probes_in_flight += 1
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot for a call that never completed."""
+        if self._state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record(self, success: bool, seconds: float) -> None:
+        slow = seconds >= self.slow_call_seconds
+        if self._state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not success or slow:
+                self._transition(OPEN)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_calls:
+                self._transition(CLOSED)
+            return
+        if self._state == OPEN:
+            return
+        self._window.append((success, slow))
+        if len(self._window) < self.min_calls:
+            return
+        calls = len(self._window)
+        failures = sum(1 for ok, _ in self._window if not ok)
+        slow_calls = sum(1 for _, was_slow in self._window if was_slow)
+        if (
+            failures / calls >= self.failure_rate_threshold
+            or slow_calls / calls >= self.failure_rate_threshold
+        ):
+            self._transition(OPEN)
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    Calls beyond the current limit are rejected immediately. Each fast,
+    successful call made while the limit is at least half used raises the
+    limit by ``increase``. Each failure or call slower than
+    ``latency_target`` multiplies it by ``decrease_factor``.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 128,
+        latency_target: float = 10.0,
+        increase: float = 1.0,
+        decrease_factor: float = 0.7,
+    ):
+        self.provider = provider
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        UPSTREAM_CONCURRENCY_LIMIT.labels(provider=provider).set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> bool:
+        if self._in_flight >= self.limit:
+            return False
+        self._in_flight += 1
+        return True
+
+    def release(self, success: bool | None, seconds: float) -> None:
+        """Free a slot; ``success=None`` frees it without adapting the limit."""
+        in_flight = self._in_flight
+        self._in_flight -= 1
+        if success is None:
+            return
+        if not success or seconds > self.latency_target:
+            self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        elif in_flight * 2 >= self.limit:
+            self._limit = min(self.max_limit, self._limit + self.increase)
+        else:
+            return
+        UPSTREAM_CONCURRENCY_LIMIT.labels(provider=self.provider).set(self.limit)
+
+
+class _CallOutcome:
+    __slots__ = ("success",)
+
+    def __init__(self):
+        self.success = True
+
+    def failed(self) -> None:
+        """Count this call as a provider failure without raising."""
+        self.success = False
+
+
+class UpstreamGuard:
+    def __init__(self, breaker: CircuitBreaker, limiter: AIMDLimiter):
+        self.breaker = breaker
+        self.limiter = limiter
+
+    @property
+    def provider(self) -> str:
+        return self.breaker.provider
+
+    @asynccontextmanager
+    async def call(self):
+        """Guard one upstream call.
+
+        Exceptions are recorded as failures when ``is_provider_failure``
+        says so; any other exception frees the slot without being recorded.
+        Calls that return an error response can call ``outcome.failed()``
+        to be recorded as failures too.
+        """
+        try:
+            self.breaker.before_call()
+        except UpstreamUnavailable as exc:
+            UPSTREAM_SHED.labels(provider=self.provider, reason=exc.reason).inc()
+            raise
+        if not self.limiter.try_acquire():
+            self.breaker.release_probe()
+            UPSTREAM_SHED.labels(provider=self.provider, reason="concurrency").inc()
+            raise UpstreamUnavailable(self.provider, "concurrency", 1.0)
+        outcome = _CallOutcome()
+        started = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException as exc:
+            if not is_provider_failure(exc):
+                # Cancelado por nosotros (cliente desconectado), un 4xx o un
+                # bug local: no es culpa del proveedor, así que libera el
+                # slot sin tocar límite ni breaker.
+                self.limiter.release(None, 0.0)
+                self.breaker.release_probe()
+                raise
+            outcome.failed()
+            self._finish(False, started)
+            raise
+        self._finish(outcome.success, started)
+
+    def report_failure(self, seconds: float) -> None:
+        """Count a failure seen after the guarded call returned (mid-stream)."""
+        self.breaker.record(False, seconds)
+
+    def _finish(self, success: bool, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self.limiter.release(success, elapsed)
+        self.breaker.record(success, elapsed)
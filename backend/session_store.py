@@ -0,0 +1,282 @@
+"""Server-side conversation history for /conversation.
+
+Each session keeps its last ``max_turns`` turns (a ring buffer) plus a running
+summary of older turns. Sessions are evicted least-recently-used once the
+total stored text exceeds ``max_bytes``.
+Two backends are available: an in-process dict and SQLite in WAL mode, which
+survives restarts and can be shared by several workers on the same host.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Protocol
+
+_TURN_OVERHEAD_BYTES = 64
+
+
+@dataclass(frozen=True)
+class Turn:
+    role: str
+    content: str
+
+    @property
+    def size(self) -> int:
+        return len(self.content.encode()) + _TURN_OVERHEAD_BYTES
+
+
+class SessionBackend(Protocol):
+    def exists(self, session_id: str) -> bool: ...
+
+    def load(self, session_id: str) -> list[Turn]: ...
+
+    def append(self, session_id: str, turns: list[Turn]) -> None: ...
+
+    def load_summary(self, session_id: str) -> str: ...
+
+    def compact(self, session_id: str, summary: str, dropped_turns: int) -> None:
+        """Replace the summary and drop the ``dropped_turns`` oldest turns."""
+
+    def delete(self, session_id: str) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class InMemorySessionBackend:
+    def __init__(self, max_turns: int = 20, max_bytes: int = 16 * 1024 * 1024):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self._sessions: OrderedDict[str, deque[Turn]] = OrderedDict()
+        self._summaries: dict[str, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def load_summary(self, session_id: str) -> str:
+        with self._lock:
+            return self._summaries.get(session_id, "")
+
+    def compact(self, session_id: str, summary: str, dropped_turns: int) -> None:
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None:
+                return
+            for _ in range(min(dropped_turns, len(history))):
+                self._bytes -= history.popleft().size
+            self._bytes += len(summary.encode()) - len(
+                self._summaries.get(session_id, "").encode()
+            )
+            self._summaries[session_id] = summary
+
+    def load(self, session_id: str) -> list[Turn]:
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None:
+                return []
+            self._sessions.move_to_end(session_id)
+            return list(turns)
+
+    def append(self, session_id: str, turns: list[Turn]) -> None:
+        with self._lock:
+            history = self._sessions.get(session_id)
+            if history is None:
+                history = deque(maxlen=self.max_turns)
+                self._sessions[session_id] = history
+            for turn in turns:
+                if len(history) == history.maxlen:
+                    self._bytes -= history[0].size
+                history.append(turn)
+                self._bytes += turn.size
+            self._sessions.move_to_end(session_id)
+            while self._bytes > self.max_bytes and len(self._sessions) > 1:
+                self._drop(next(iter(self._sessions)))
+
+    def _drop(self, session_id: str) -> None:
+        history = self._sessions.pop(session_id)
+        self._bytes -= sum(turn.size for turn in history)
+        self._bytes -= len(self._summaries.pop(session_id, "").encode())
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def close(self) -> None:
+        return None
+
+
+class SQLiteSessionBackend:
+    def __init__(
+        self,
+        path: str,
+        max_turns: int = 20,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS session_turns (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                summary TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_access
+                ON sessions (last_access);
+            """
+        )
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")
+        }
+        if "summary" not in columns:
+            # Bases creadas antes de guardar resúmenes.
+            self._conn.execute(
+                "ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''"
+            )
+        self._conn.commit()
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def load(self, session_id: str) -> list[Turn]:
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT role, content FROM session_turns "
+                "WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    "UPDATE sessions SET last_access = ? WHERE session_id = ?",
+                    (time.time(), session_id),
+                )
+        return [Turn(role=role, content=content) for role, content in rows]
+
+    def append(self, session_id: str, turns: list[Turn]) -> None:
+        with self._lock, self._conn:
+            (last_seq,) = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM session_turns WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            self._conn.executemany(
+                "INSERT INTO session_turns (session_id, seq, role, content, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (session_id, last_seq + offset, turn.role, turn.content, turn.size)
+                    for offset, turn in enumerate(turns, start=1)
+                ],
+            )
+            self._conn.execute(
+                "DELETE FROM session_turns WHERE session_id = ? AND seq <= ?",
+                (session_id, last_seq + len(turns) - self.max_turns),
+            )
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, last_access) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET "
+                "last_access = excluded.last_access",
+                (session_id, time.time()),
+            )
+            self._refresh_bytes(session_id)
+            self._evict_lru(keep=session_id)
+
+    def _refresh_bytes(self, session_id: str) -> None:
+        self._conn.execute(
+            "UPDATE sessions SET bytes = LENGTH(CAST(summary AS BLOB)) + ("
+            "SELECT COALESCE(SUM(size), 0) FROM session_turns "
+            "WHERE session_id = ?) WHERE session_id = ?",
+            (session_id, session_id),
+        )
+
+    def load_summary(self, session_id: str) -> str:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else ""
+
+    def compact(self, session_id: str, summary: str, dropped_turns: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM session_turns WHERE session_id = ? AND seq IN ("
+                "SELECT seq FROM session_turns WHERE session_id = ? "
+                "ORDER BY seq LIMIT ?)",
+                (session_id, session_id, dropped_turns),
+            )
+            self._conn.execute(
+                "UPDATE sessions SET summary = ? WHERE session_id = ?",
+                (summary, session_id),
+            )
+            self._refresh_bytes(session_id)
+
+    def _evict_lru(self, keep: str) -> None:
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM sessions"
+        ).fetchone()
+        while total > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT session_id, bytes FROM sessions WHERE session_id != ? "
+                "ORDER BY last_access LIMIT 1",
+                (keep,),
+            ).fetchone()
+            if row is None:
+                return
+            session_id, size = row
+            self._delete(session_id)
+            total -= size
+
+    def _delete(self, session_id: str) -> None:
+        self._conn.execute(
+            "DELETE FROM session_turns WHERE session_id = ?", (session_id,)
+        )
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._delete(session_id)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_session_backend(
+    kind: str, path: str, max_turns: int, max_bytes: int
+) -> SessionBackend:
+    if kind == "sqlite":
+        return SQLiteSessionBackend(path, max_turns=max_turns, max_bytes=max_bytes)
+    if kind == "memory":
+        return InMemorySessionBackend(max_turns=max_turns, max_bytes=max_bytes)
+    raise ValueError(f"Unknown session store backend: {kind}")
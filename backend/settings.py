@@ -0,0 +1,286 @@
+"""Typed, immutable settings snapshot built from settings.yaml and the env.
+
+Precedence: environment variables > ``config/settings.yaml`` > defaults.
+The snapshot is rebuilt atomically on SIGHUP or when the YAML file changes,
+so request handlers only read ``settings_store.current``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
+
+import yaml
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "settings.yaml"
+)
+DEFAULT_DOTENV_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "secrets.env"
+)
+
+TAVUS_MULTILINGUAL_CONTEXT = (
+    "INSTRUCCIÓN CRÍTICA DE IDIOMA Y VOZ: respondé SIEMPRE en español argentino "
+    "(es-AR, rioplatense) salvo que el usuario hable en otro idioma. "
+    "Si el usuario habla en portugués, respondé y continuá la conversación en "
+    "portugués. "
+    "Si el usuario habla en inglés, respondé y continuá la conversación en "
+    "inglés. "
+    "Usá voseo (vos, tenés, podés), vocabulario argentino y pronunciación "
+    "natural rioplatense cuando hables en español. "
+    "Tu lenguaje en español tiene que ser profesional, como el de un egresado "
+    "de la Facultad de Ciencias Veterinarias de la Universidad de Buenos Aires, "
+    "pero también cálido y cercano, como el de un sommelier apasionado por la "
+    "carne."
+)
+
+DEFAULT_TAVUS_GREETING = (
+    "¡Hola! Bienvenido a Tu Sommelier Virtual de carnes. "
+    "Estoy acá para ayudarte a elegir el mejor corte."
+)
+
+# (clave en settings.yaml bajo `tavus:`, variable de entorno, default)
+_TAVUS_FIELDS = (
+    ("api_key", "TAVUS_API_KEY", ""),
+    ("api_url", "TAVUS_API_URL", "https://tavusapi.com"),
+    ("replica_id", "TAVUS_REPLICA_ID", "rf4e9d9790f0"),
+    ("persona_id", "TAVUS_PERSONA_ID", "pcb7a34da5fe"),
+    ("custom_greeting", "TAVUS_CUSTOM_GREETING", DEFAULT_TAVUS_GREETING),
+    ("language", "TAVUS_LANGUAGE", "spanish"),
+    ("participant_left_timeout", "TAVUS_PARTICIPANT_LEFT_TIMEOUT", 0),
+    ("participant_absent_timeout", "TAVUS_PARTICIPANT_ABSENT_TIMEOUT", 120),
+    ("callback_url", "TAVUS_CALLBACK_URL", ""),
+)
+
+_VOICE_ENV_FIELDS = (
+    ("tts_provider", "TAVUS_TTS_PROVIDER"),
+    ("tts_voice_id", "TAVUS_TTS_VOICE_ID"),
+    ("cartesia_voice_id", "TAVUS_CARTESIA_VOICE_ID"),
+)
+
+
+class SettingsError(ValueError):
+    """Raised when settings.yaml cannot be turned into a snapshot."""
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Plain ``dict``/``list`` copy of a frozen value, ready for ``json``."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class TavusSettings:
+    api_key: str
+    api_url: str
+    replica_id: str
+    persona_id: str
+    custom_greeting: str
+    language: str
+    participant_left_timeout: int
+    participant_absent_timeout: int
+    voice_properties: Mapping[str, Any]
+    # Error de configuración diferido al request (p. ej. JSON inválido en env).
+    config_error: str | None = None
+    # URL pública de POST /tavus/webhooks; vacía = Tavus no envía eventos.
+    callback_url: str = ""
+    base_properties: Mapping[str, Any] = field(init=False)
+
+    def __post_init__(self):
+        base_properties = {
+            "participant_left_timeout": self.participant_left_timeout,
+            "participant_absent_timeout": self.participant_absent_timeout,
+            "language": self.language,
+            **self.voice_properties,
+        }
+        object.__setattr__(self, "base_properties", _freeze(base_properties))
+
+    def payload_properties(self) -> dict:
+        """Deep, mutable copy of ``base_properties`` for a request payload."""
+        return _thaw(self.base_properties)
+
+    @property
+    def conversations_endpoint(self) -> str:
+        return f"{self.api_url.rstrip('/')}/v2/conversations"
+
+
+@dataclass(frozen=True)
+class Settings:
+    tavus: TavusSettings
+    raw: Mapping[str, Any]
+    version: int = 0
+
+    def section(self, name: str) -> Mapping[str, Any]:
+        value = self.raw.get(name)
+        return value if isinstance(value, Mapping) else MappingProxyType({})
+
+
+def _read_yaml(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            data = yaml.safe_load(handle)
+    except FileNotFoundError:
+        return {}
+    except yaml.YAMLError as exc:
+        raise SettingsError(f"{path} is not valid YAML: {exc}") from exc
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise SettingsError(f"{path} must contain a mapping at the top level")
+    return data
+
+
+def _as_int(name: str, value: Any, default: int) -> int:
+    """``value`` as an int; an invalid one is logged and replaced by ``default``."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        # Un valor inválido no puede tirar abajo el import de la app.
+        logger.warning(
+            "%s=%r no es un entero, se usa el default %s", name, value, default
+        )
+        return default
+
+
+def _build_tavus_settings(section: dict, environ: Mapping[str, str]) -> TavusSettings:
+    values: dict[str, Any] = {}
+    for key, env_name, default in _TAVUS_FIELDS:
+        env_value = environ.get(env_name)
+        if env_value not in (None, ""):
+            values[key] = env_value
+        elif section.get(key) not in (None, ""):
+            values[key] = section[key]
+        else:
+            values[key] = default
+
+    defaults = {key: default for key, _, default in _TAVUS_FIELDS}
+    for key in ("participant_left_timeout", "participant_absent_timeout"):
+        values[key] = _as_int(key, values[key], defaults[key])
+
+    yaml_voice = section.get("voice_properties") or {}
+    if not isinstance(yaml_voice, dict):
+        raise SettingsError("tavus.voice_properties must be a mapping")
+    voice_properties = dict(yaml_voice)
+    voice_properties.update(
+        {
+            key: environ[env_name]
+            for key, env_name in _VOICE_ENV_FIELDS
+            if environ.get(env_name) not in (None, "")
+        }
+    )
+
+    config_error = None
+    raw_json = environ.get("TAVUS_VOICE_PROPERTIES_JSON", "").strip()
+    if raw_json:
+        try:
+            parsed = json.loads(raw_json)
+        except json.JSONDecodeError:
+            parsed = None
+            config_error = "TAVUS_VOICE_PROPERTIES_JSON must be a valid JSON object"
+        if isinstance(parsed, dict):
+            voice_properties.update(parsed)
+        elif config_error is None:
+            config_error = "TAVUS_VOICE_PROPERTIES_JSON must be a JSON object"
+
+    return TavusSettings(
+        api_key=str(values["api_key"]),
+        api_url=str(values["api_url"]),
+        replica_id=str(values["replica_id"]),
+        persona_id=str(values["persona_id"]),
+        custom_greeting=str(values["custom_greeting"]),
+        language=str(values["language"]),
+        participant_left_timeout=values["participant_left_timeout"],
+        participant_absent_timeout=values["participant_absent_timeout"],
+        voice_properties=_freeze(voice_properties),
+        config_error=config_error,
+        callback_url=str(values["callback_url"]),
+    )
+
+
+def load_settings(
+    path: str = DEFAULT_SETTINGS_PATH,
+    environ: Mapping[str, str] | None = None,
+    version: int = 0,
+) -> Settings:
+    raw = _read_yaml(path)
+    tavus_section = raw.get("tavus") or {}
+    if not isinstance(tavus_section, dict):
+        raise SettingsError("tavus section must be a mapping")
+    env = os.environ if environ is None else environ
+    return Settings(
+        tavus=_build_tavus_settings(tavus_section, env),
+        raw=_freeze(raw),
+        version=version,
+    )
+
+
+class SettingsStore:
+    """Holds the current snapshot and swaps it atomically on reload."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_SETTINGS_PATH,
+        dotenv_path: str | None = DEFAULT_DOTENV_PATH,
+    ):
+        self.path = path
+        self.dotenv_path = dotenv_path
+        self._mtime = self._current_mtime()
+        self._snapshot = load_settings(path)
+
+    @property
+    def current(self) -> Settings:
+        return self._snapshot
+
+    def _current_mtime(self) -> float | None:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self, reread_dotenv: bool = False) -> bool:
+        """Rebuild the snapshot; keeps the previous one if the new is invalid.
+
+        With ``reread_dotenv`` (used on SIGHUP) values from secrets.env are
+        loaded into the environment again before rebuilding. Variables that
+        systemd injects through ``EnvironmentFile`` still need a restart.
+        """
+        if reread_dotenv and self.dotenv_path:
+            load_dotenv(dotenv_path=self.dotenv_path, override=True)
+        mtime = self._current_mtime()
+        try:
+            snapshot = load_settings(self.path, version=self._snapshot.version + 1)
+        except SettingsError:
+            logger.exception("Configuración inválida, se mantiene la anterior")
+            return False
+        self._mtime = mtime
+        self._snapshot = snapshot
+        logger.info("Configuración recargada (versión %s)", snapshot.version)
+        return True
+
+    def reload_if_changed(self) -> bool:
+        if self._current_mtime() == self._mtime:
+            return False
+        return self.reload()
+
+    async def watch(self, interval: float) -> None:
+        """Poll settings.yaml and reload it whenever it changes."""
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
@@ -0,0 +1,136 @@
+"""Key/value state shared between uvicorn worker processes.
+
+With ``--workers N`` each process has its own memory, so in-process caches
+split N ways. ``SHARED_STATE_BACKEND`` picks where shared entries live:
+
+- ``memory``: nothing is shared; each worker keeps its in-process
+  structures (the single-worker default).
+- ``sqlite``: one WAL-mode file on local disk, shared by every worker on
+  the host.
+- ``redis``: any Redis-compatible server, shared across hosts (needs the
+  ``redis`` package).
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class SQLiteSharedState:
+    """Expiring key/value rows in a SQLite file."""
+
+    # Cada cuántos set() se borran las filas vencidas.
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str, clock=time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=5
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_state ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM shared_state WHERE key = ? AND expires_at > ?",
+                (key, self._clock()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shared_state (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, value, now + ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM shared_state WHERE expires_at <= ?", (now,)
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSharedState:
+    def __init__(self, url: str, prefix: str = "tusommelier:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "SHARED_STATE_BACKEND=redis requires the redis package"
+            ) from exc
+        self.prefix = prefix
+        self._errors = redis.RedisError
+        # Timeouts cortos: ante un Redis caído preferimos un miss a colgar.
+        self.client = redis.Redis.from_url(
+            url, socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self.client.get(self.prefix + key)
+        except self._errors as exc:
+            logger.warning("Redis GET falló, se trata como miss: %s", exc)
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+        except self._errors as exc:
+            logger.warning("Redis SET falló: %s", exc)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except self._errors as exc:
+            logger.warning("Redis DEL falló: %s", exc)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def build_shared_state(kind: str, path: str, url: str = "") -> SharedState | None:
+    """Shared backend for ``kind``; ``None`` means keep state in-process."""
+    if kind == "memory":
+        return None
+    if kind == "sqlite":
+        return SQLiteSharedState(path)
+    if kind == "redis":
+        if not url:
+            raise ValueError("SHARED_STATE_REDIS_URL is required for redis")
+        return RedisSharedState(url)
+    raise ValueError(f"Unknown shared state backend: {kind}")
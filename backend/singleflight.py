@@ -0,0 +1,40 @@
+"""Coalesce identical in-flight upstream calls.
+
+While a call for a key is running, later callers with the same key await the
+same task instead of starting their own. Each caller waits through
+``asyncio.shield``, so a caller that is cancelled (client disconnected) only
+stops waiting; the shared call keeps running for everyone else.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, on_coalesced: Callable[[], None] | None = None):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self._on_coalesced = on_coalesced
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return ``await fn()``, sharing one call per ``key`` at a time."""
+        task = self._calls.get(key)
+        if task is not None:
+            if self._on_coalesced is not None:
+                self._on_coalesced()
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Si todos los que esperaban se fueron, nadie lee la excepción.
+        if not task.cancelled():
+            task.exception()
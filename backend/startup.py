@@ -0,0 +1,138 @@
+"""Cold-start timing and lazy construction of heavy SDK clients.
+
+``STARTUP`` records when importing ``backend.main`` finished and when the
+app became ready (``phases``), plus how long each step took: the lifespan
+startup and every lazily built client (``steps``). ``GET /debug/startup``
+returns it. ``LazyClient`` defers importing an SDK and building its client
+until the first attribute access.
+
+``python -m backend.startup`` prints the slowest imports of
+``backend.main`` according to ``python -X importtime``.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Módulos pesados que no deberían cargarse hasta que se usen.
+HEAVY_MODULES = ("openai", "sentry_sdk", "requests")
+
+
+class StartupReport:
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._started = clock()
+        self.phases: dict[str, float] = {}
+        self.steps: dict[str, dict] = {}
+
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    def mark(self, phase: str) -> None:
+        """Record that ``phase`` ended, in seconds since the report started."""
+        self.phases[phase] = self.elapsed()
+
+    @contextmanager
+    def measure(self, name: str):
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.steps[name] = {
+                "seconds": self._clock() - started,
+                "at": started - self._started,
+            }
+
+    def as_dict(self) -> dict:
+        return {
+            "uptime_seconds": self.elapsed(),
+            "phases": dict(self.phases),
+            "steps": {name: dict(timing) for name, timing in self.steps.items()},
+            "heavy_modules_loaded": {
+                module: module in sys.modules for module in HEAVY_MODULES
+            },
+        }
+
+
+STARTUP = StartupReport()
+
+
+class LazyClient:
+    """Proxy that builds the real client with ``factory`` on first use."""
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        report: StartupReport = STARTUP,
+    ):
+        self._name = name
+        self._factory = factory
+        self._report = report
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None
+
+    def resolve(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    with self._report.measure(self._name):
+                        self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.resolve(), attr)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """``(module, self_us, cumulative_us)`` rows from ``-X importtime``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Slowest imports of a module.")
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        return result.returncode
+    rows = parse_importtime(result.stderr)
+    total = next((row[2] for row in rows if row[0] == args.module), None)
+    if total is not None:
+        print(f"{args.module}: {total / 1000:.0f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for module, self_us, cumulative_us in sorted(
+        rows, key=lambda row: row[2], reverse=True
+    )[: args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {module}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+PRIMARY_LABEL = "primary"
+VOICE_OVERRIDE_KEYS = frozenset({"tts_provider", "tts_voice_id", "cartesia_voice_id"})
+
+
+@dataclass
+class _LearnedVariant:
+    label: str
+    learned_at: float
+    last_probe_at: float
+
+
+def payload_shape(payload: dict) -> tuple[str, tuple[str, ...]]:
+    """Key describing what Tavus validates: language and voice override keys."""
+    properties = payload.get("properties", {})
+    language = str(properties.get("language", "")).lower()
+    voice_keys = tuple(sorted(VOICE_OVERRIDE_KEYS.intersection(properties)))
+    return language, voice_keys
+
+
+class FallbackLadderMemory:
+    """Remembers which fallback variant Tavus last accepted per payload shape.
+
+    Entries are kept in LRU order (at most ``max_entries``) and expire after
+    ``ttl`` seconds. Every ``reprobe_interval`` seconds one request per shape
+    is sent through the full ladder again, starting at the primary payload,
+    so we notice when Tavus starts accepting it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 3600.0,
+        reprobe_interval: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.reprobe_interval = reprobe_interval
+        self._clock = clock
+        self._entries: OrderedDict[tuple, _LearnedVariant] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def preferred_label(self, key: tuple) -> str | None:
+        """Label to try first, or ``None`` to run the ladder from the top."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now - entry.learned_at >= self.ttl:
+                del self._entries[key]
+                return None
+            if now - entry.last_probe_at >= self.reprobe_interval:
+                entry.last_probe_at = now
+                return None
+            self._entries.move_to_end(key)
+            return entry.label
+
+    def record_success(self, key: tuple, label: str) -> None:
+        with self._lock:
+            if label == PRIMARY_LABEL:
+                self._entries.pop(key, None)
+                return
+            now = self._clock()
+            self._entries[key] = _LearnedVariant(
+                label=label, learned_at=now, last_probe_at=now
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def order_attempts(
+    attempts: list[tuple[dict, str]], preferred_label: str | None
+) -> list[tuple[dict, str]]:
+    """Move the preferred variant to the front, keeping the rest in order."""
+    if preferred_label is None:
+        return attempts
+    preferred = [item for item in attempts if item[1] == preferred_label]
+    if not preferred:
+        return attempts
+    return preferred + [item for item in attempts if item[1] != preferred_label]
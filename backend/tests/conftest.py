@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure repo root is on sys.path so 'backend' package can be imported during tests
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _reset_backend_caches(monkeypatch):
+    """Keep in-process caches and breakers from leaking between tests."""
+    if backend_main.answer_cache is not None:
+        backend_main.answer_cache.clear()
+    # Los tests hacen muchas requests desde el mismo cliente.
+    monkeypatch.setattr(backend_main, "admission", None)
+    monkeypatch.setattr(
+        backend_main, "conversation_lifecycle", backend_main.ConversationLifecycle()
+    )
+    # Sin llamadas reales a Tavus/OpenAI al entrar en TestClient(app).
+    monkeypatch.setattr(backend_main, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(
+        backend_main,
+        "model_router",
+        backend_main.ModelRouter(backend_main.model_router.tiers),
+    )
+    # Los tests que miran el prompt exacto no esperan snippets inyectados.
+    monkeypatch.setattr(backend_main, "KNOWLEDGE_BASE_ENABLED", False)
+    for name in ("tavus_guard", "openai_guard"):
+        guard = getattr(backend_main, name)
+        monkeypatch.setattr(
+            backend_main,
+            name,
+            backend_main.UpstreamGuard(
+                backend_main.CircuitBreaker(guard.provider),
+                backend_main.AIMDLimiter(guard.provider),
+            ),
+        )
+    yield
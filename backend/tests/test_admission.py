@@ -0,0 +1,206 @@
+import asyncio
+import ipaddress
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from backend import main as backend_main
+from backend.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    ClientIdentity,
+    FairScheduler,
+    InMemoryRateLimitBackend,
+    SQLiteRateLimitBackend,
+    identify_client,
+    parse_api_keys,
+)
+
+TRUSTED = (ipaddress.ip_network("127.0.0.1"),)
+
+
+def _scope(peer, headers=()):
+    return {
+        "type": "http",
+        "client": (peer, 1234),
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+    }
+
+
+def test_client_identity_respects_forwarded_for_only_from_trusted_proxy():
+    forwarded = [("x-forwarded-for", "203.0.113.9, 198.51.100.7")]
+
+    behind_nginx = identify_client(_scope("127.0.0.1", forwarded), {}, TRUSTED)
+    direct = identify_client(_scope("192.0.2.1", forwarded), {}, TRUSTED)
+
+    # El cliente puede inventar la parte izquierda; nginx agrega la última.
+    assert behind_nginx.key == "ip:198.51.100.7"
+    assert direct.key == "ip:192.0.2.1"
+
+
+def test_client_identity_uses_api_key_and_weight():
+    keys = parse_api_keys("kiosk:secret:0.5,content:abc")
+
+    by_header = identify_client(
+        _scope("127.0.0.1", [("x-api-key", "secret")]), keys, TRUSTED
+    )
+    by_bearer = identify_client(
+        _scope("127.0.0.1", [("authorization", "Bearer abc")]), keys, TRUSTED
+    )
+
+    assert by_header == ClientIdentity(key="key:kiosk", weight=0.5)
+    assert by_bearer == ClientIdentity(key="key:content", weight=1.0)
+    with pytest.raises(ValueError):
+        parse_api_keys("missing-key")
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_token_bucket_limits_and_refills(kind, tmp_path):
+    clock = SimpleNamespace(now=1000.0)
+    if kind == "memory":
+        backend = InMemoryRateLimitBackend(clock=lambda: clock.now)
+    else:
+        backend = SQLiteRateLimitBackend(
+            str(tmp_path / "admission.sqlite3"), clock=lambda: clock.now
+        )
+
+    assert backend.take("a", rate=1, burst=2) == 0
+    assert backend.take("a", rate=1, burst=2) == 0
+    assert backend.take("a", rate=1, burst=2) == pytest.approx(1.0)
+    assert backend.take("b", rate=1, burst=2) == 0
+    clock.now += 1
+    assert backend.take("a", rate=1, burst=2) == 0
+    backend.close()
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "admission.sqlite3")
+    first, second = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+
+    assert first.take("a", rate=0.001, burst=1) == 0
+    assert second.take("a", rate=0.001, burst=1) > 0
+
+
+def test_fair_scheduler_interleaves_backlogged_clients_by_weight():
+    scheduler = FairScheduler(
+        max_concurrency=1, max_queue=100, max_queue_per_client=100, max_wait=5
+    )
+    noisy = ClientIdentity("ip:noisy")
+    heavy = ClientIdentity("key:heavy", weight=2)
+    order = []
+
+    async def request(client):
+        await scheduler.acquire(client)
+        order.append(client.key)
+        await asyncio.sleep(0)
+        scheduler.release()
+
+    async def run():
+        await scheduler.acquire(ClientIdentity("ip:first"))
+        tasks = [asyncio.ensure_future(request(noisy)) for _ in range(4)]
+        tasks += [asyncio.ensure_future(request(heavy)) for _ in range(4)]
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    # Aunque "noisy" encoló todo primero, "heavy" (peso 2) recibe el doble.
+    assert order[:6] == [
+        "key:heavy", "ip:noisy", "key:heavy",
+        "key:heavy", "ip:noisy", "key:heavy",
+    ]
+    assert scheduler.running == 0 and scheduler.queued == 0
+
+
+def test_fair_scheduler_rejects_when_client_queue_is_full_or_wait_expires():
+    scheduler = FairScheduler(
+        max_concurrency=1, max_queue=10, max_queue_per_client=1, max_wait=0.01
+    )
+    client = ClientIdentity("ip:a")
+
+    async def run():
+        await scheduler.acquire(client)
+        waiting = asyncio.ensure_future(scheduler.acquire(client))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await scheduler.acquire(client)
+        with pytest.raises(AdmissionRejected) as timeout:
+            await waiting
+        scheduler.release()
+        return full.value, timeout.value
+
+    full, timeout = asyncio.run(run())
+
+    assert (full.reason, full.status_code) == ("client_queue_full", 429)
+    assert (timeout.reason, timeout.status_code) == ("queue_timeout", 503)
+    assert scheduler.running == 0 and scheduler.queued == 0
+
+
+def test_conversation_returns_429_with_retry_after_per_client(monkeypatch):
+    monkeypatch.setattr(
+        backend_main,
+        "client",
+        SimpleNamespace(
+            responses=SimpleNamespace(
+                create=lambda **kwargs: SimpleNamespace(output_text="ok")
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        backend_main,
+        "admission",
+        AdmissionController(
+            scheduler=FairScheduler(64, 64, 8, 1),
+            rate_limits=InMemoryRateLimitBackend(),
+            rate=0.01,
+            burst=2,
+            trusted_proxies=("127.0.0.1",),
+        ),
+    )
+    rejected_before = (
+        REGISTRY.get_sample_value(
+            "admission_rejections_total", {"reason": "rate_limited"}
+        )
+        or 0
+    )
+    api = TestClient(backend_main.app)
+
+    statuses = [
+        api.post("/conversation", json={"text": f"hola {n}"}).status_code
+        for n in range(3)
+    ]
+    limited = api.post("/conversation", json={"text": "otra"})
+
+    assert statuses == [200, 200, 429]
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert api.get("/health").status_code == 200  # fuera de ADMISSION_PATHS
+    assert (
+        REGISTRY.get_sample_value(
+            "admission_rejections_total", {"reason": "rate_limited"}
+        )
+        == rejected_before + 2
+    )
+
+
+def test_zero_rate_rejects_with_a_bounded_retry_after(monkeypatch):
+    monkeypatch.setattr(
+        backend_main,
+        "admission",
+        AdmissionController(
+            scheduler=FairScheduler(64, 64, 8, 1),
+            rate_limits=InMemoryRateLimitBackend(),
+            rate=0,
+            burst=0,
+            trusted_proxies=("127.0.0.1",),
+        ),
+    )
+    api = TestClient(backend_main.app)
+
+    limited = api.post("/conversation", json={"text": "hola"})
+
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "3600"
@@ -0,0 +1,226 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from backend import main as backend_main
+from backend.answer_cache import AnswerCache, CacheHit, normalize_text
+from backend.shared_state import SQLiteSharedState
+
+
+MODEL = "gpt-test"
+VERSION = "v1"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _key(cache, text):
+    return cache.make_key(text, MODEL, VERSION)
+
+
+def test_normalize_text_folds_case_accents_and_punctuation():
+    assert normalize_text("  ¿Vacío  o ENTRAÑA?! ") == "vacio o entrana"
+
+
+def test_exact_hit_after_normalization():
+    cache = AnswerCache()
+    cache.put(_key(cache, "¿Qué corte para el asado?"), "Vacío", 2.5)
+
+    hit = cache.get(_key(cache, "que corte para el asado"))
+    assert hit is not None
+    assert hit.reply == "Vacío"
+    assert hit.near_duplicate is False
+
+
+def test_key_includes_model_and_prompt_version():
+    cache = AnswerCache()
+    cache.put(cache.make_key("hola", MODEL, VERSION), "respuesta")
+    assert cache.get(cache.make_key("hola", "other-model", VERSION)) is None
+    assert cache.get(cache.make_key("hola", MODEL, "v2")) is None
+
+
+def test_near_duplicate_paraphrase_hits():
+    cache = AnswerCache(similarity_threshold=0.6)
+    cache.put(_key(cache, "que corte me recomendas para el asado del domingo"), "Vacío")
+
+    hit = cache.get(_key(cache, "que corte me recomendas para un asado del domingo"))
+    assert hit is not None
+    assert hit.near_duplicate is True
+
+
+def test_near_duplicate_requires_identical_numbers():
+    cache = AnswerCache(similarity_threshold=0.5)
+    cache.put(_key(cache, "cuanto tiempo para 2 kg de vacio"), "Dos horas")
+    assert cache.get(_key(cache, "cuanto tiempo para 3 kg de vacio")) is None
+
+
+def test_long_questions_skip_minhash_but_still_hit_exactly():
+    cache = AnswerCache(max_similarity_length=40)
+    cache._hasher.signature = None  # falla si se llega a calcular una firma
+    question = "¿qué corte me recomendás para un asado con amigos este sábado?"
+    cache.put(_key(cache, question), "Vacío")
+
+    assert cache.get(_key(cache, question)).reply == "Vacío"
+    assert cache.get(_key(cache, question + " por favor")) is None
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = AnswerCache(ttl=10, clock=clock)
+    cache.put(_key(cache, "hola"), "respuesta")
+    clock.now = 11
+    assert cache.get(_key(cache, "hola")) is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = AnswerCache(max_entries=2, similarity_threshold=1)
+    cache.put(_key(cache, "uno"), "1")
+    cache.put(_key(cache, "dos"), "2")
+    cache.get(_key(cache, "uno"))
+    cache.put(_key(cache, "tres"), "3")
+    assert cache.get(_key(cache, "dos")) is None
+    assert cache.get(_key(cache, "uno")) is not None
+
+    small = AnswerCache(max_bytes=1200, similarity_threshold=1)
+    small.put(_key(small, "a"), "x" * 300)
+    small.put(_key(small, "b"), "y" * 300)
+    assert len(small) == 1
+    assert small.size_bytes <= 1200
+    small.put(_key(small, "c"), "z" * 5000)
+    assert small.get(_key(small, "c")) is None
+
+
+def test_conversation_serves_repeated_questions_from_cache(monkeypatch):
+    calls = []
+
+    class FakeResponses:
+        def create(self, **kwargs):
+            calls.append(kwargs["input"])
+            return SimpleNamespace(output_text="Vacío, sin dudas")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    hits_before = (
+        REGISTRY.get_sample_value("answer_cache_requests_total", {"result": "hit"})
+        or 0
+    )
+    api = TestClient(backend_main.app)
+
+    first = api.post("/conversation", json={"text": "¿Qué corte para el asado?"})
+    second = api.post("/conversation", json={"text": "que corte para el asado"})
+    streamed = api.post(
+        "/conversation", json={"text": "Qué corte para el asado", "stream": True}
+    )
+
+    assert first.json() == second.json() == {"reply": "Vacío, sin dudas"}
+    assert "event: done" in streamed.text
+    assert len(calls) == 1
+    assert (
+        REGISTRY.get_sample_value("answer_cache_requests_total", {"result": "hit"})
+        == hits_before + 2
+    )
+
+
+def test_conversation_with_context_bypasses_cache(monkeypatch):
+    calls = []
+
+    class FakeResponses:
+        def create(self, **kwargs):
+            calls.append(kwargs["input"])
+            return SimpleNamespace(output_text="respuesta")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    api = TestClient(backend_main.app)
+    body = {"text": "hola", "conversational_context": "ya hablamos del vacío"}
+
+    api.post("/conversation", json=body)
+    api.post("/conversation", json=body)
+
+    assert len(calls) == 2
+
+
+def test_exact_entries_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = AnswerCache(shared=SQLiteSharedState(path))
+    worker_b = AnswerCache(shared=SQLiteSharedState(path))
+    key = _key(worker_a, "¿Qué vino va con el vacío?")
+
+    worker_a.put(key, "Un Malbec.", upstream_seconds=1.5)
+    hit = worker_b.get(key)
+
+    assert hit == CacheHit(reply="Un Malbec.", near_duplicate=False)
+    assert len(worker_b) == 1  # copiado a la cache local
+
+
+def test_async_access_keeps_shared_backend_io_off_the_event_loop():
+    threads = []
+
+    class RecordingState:
+        def __init__(self):
+            self.values = {}
+
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return self.values.get(key)
+
+        def set(self, key, value, ttl):
+            threads.append(threading.get_ident())
+            self.values[key] = value
+
+    worker_a = AnswerCache(shared=RecordingState())
+    worker_b = AnswerCache(shared=worker_a._shared)
+    key = _key(worker_a, "¿Qué vino va con el vacío?")
+
+    async def run():
+        await worker_a.aput(key, "Un Malbec.")
+        return threading.get_ident(), await worker_b.aget(key)
+
+    loop_thread, hit = asyncio.run(run())
+    assert hit.reply == "Un Malbec."
+    assert threads and loop_thread not in threads
+
+
+def test_cached_session_turns_still_schedule_the_summary(monkeypatch):
+    summarized = []
+
+    class FakeResponses:
+        def create(self, **kwargs):
+            return SimpleNamespace(output_text="Vacío, sin dudas")
+
+    async def fake_summarize(session_id):
+        summarized.append(session_id)
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    monkeypatch.setattr(backend_main, "_maybe_summarize_session", fake_summarize)
+    api = TestClient(backend_main.app)
+    question = "¿Qué corte para el asado?"
+
+    api.post("/conversation", json={"text": question})
+    # Una sesión nueva no tiene historial, así que sale de la cache.
+    replies = [
+        api.post(
+            "/conversation", json={"text": question, "session": True, "stream": stream}
+        )
+        for stream in (False, True)
+    ]
+
+    assert replies[0].json()["reply"] == "Vacío, sin dudas"
+    assert "event: done" in replies[1].text
+    assert summarized == [
+        replies[0].json()["session_id"],
+        replies[1].text.split('"session_id": "')[1].split('"')[0],
+    ]
@@ -1,8 +1,14 @@
+import json
+import os
+import subprocess
 import sys
 from pathlib import Path
 from fastapi.testclient import TestClient
 from types import SimpleNamespace
 
+import httpx
+import pytest
+
 # Ensure repo root is on sys.path so 'backend' package can be imported during tests
 repo_root = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(repo_root))
@@ -13,6 +19,22 @@ from backend import main as backend_main  # noqa: E402
 client = TestClient(backend_main.app)
 
 
+@pytest.fixture(autouse=True)
+def _fresh_tavus_state(monkeypatch):
+    # Env vars are read once into the settings snapshot; tests that change
+    # them reload explicitly.
+    backend_main.settings_store.reload()
+    monkeypatch.setattr(
+        backend_main, "tavus_ladder_memory", backend_main.FallbackLadderMemory()
+    )
+
+
+def _use_tavus_handler(monkeypatch, handler):
+    """Route the shared Tavus HTTP client through an in-process handler."""
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(backend_main, "tavus_http_client", http_client)
+
+
 def test_health_endpoint():
     """Test that health endpoint returns ok status."""
     resp = client.get("/health")
@@ -52,6 +74,26 @@ def test_metrics_endpoint_exists():
     assert "text" in ctype or "application" in ctype
 
 
+def test_metrics_aggregates_workers_in_multiprocess_mode(monkeypatch, tmp_path):
+    worker = (
+        "from backend.metrics import HTTP_REQUESTS; "
+        "HTTP_REQUESTS.labels(method='GET', handler='/health').inc(3)"
+    )
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", worker],
+            cwd=repo_root,
+            env={**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)},
+            check=True,
+        )
+    monkeypatch.setattr(backend_main, "PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert 'http_requests_total{handler="/health",method="GET"} 6.0' in resp.text
+
+
 def test_conversation_returns_500_when_openai_not_configured(monkeypatch):
     monkeypatch.setattr(backend_main, "client", None)
 
@@ -80,6 +122,7 @@ def test_conversation_chat_completions_branch(monkeypatch):
 
 def test_tavus_conversation_requires_api_key(monkeypatch):
     monkeypatch.delenv("TAVUS_API_KEY", raising=False)
+    backend_main.settings_store.reload()
 
     resp = client.post("/tavus/conversations", json={})
     assert resp.status_code == 500
@@ -89,25 +132,17 @@ def test_tavus_conversation_requires_api_key(monkeypatch):
 def test_tavus_conversation_success(monkeypatch):
     monkeypatch.setenv("TAVUS_API_KEY", "test-key")
     monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
 
     captured = {"url": None, "json": None, "headers": None}
 
-    class FakeResponse:
-        ok = True
-        status_code = 200
-        text = ""
-
-        @staticmethod
-        def json():
-            return {"conversation_id": "conv-1"}
-
-    def fake_post(url, headers=None, json=None, timeout=20):
-        captured["url"] = url
-        captured["json"] = json
-        captured["headers"] = headers
-        return FakeResponse()
+    def handler(request):
+        captured["url"] = str(request.url)
+        captured["json"] = json.loads(request.content)
+        captured["headers"] = request.headers
+        return httpx.Response(200, json={"conversation_id": "conv-1"})
 
-    monkeypatch.setattr(backend_main.requests, "post", fake_post)
+    _use_tavus_handler(monkeypatch, handler)
 
     resp = client.post(
         "/tavus/conversations",
@@ -125,34 +160,17 @@ def test_tavus_conversation_success(monkeypatch):
 def test_tavus_conversation_fallback_to_spanish(monkeypatch):
     monkeypatch.setenv("TAVUS_API_KEY", "test-key")
     monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
 
     calls = []
 
-    class FailResponse:
-        ok = False
-        status_code = 400
-        text = "invalid language"
-
-        @staticmethod
-        def json():
-            return {"error": "invalid language"}
-
-    class OkResponse:
-        ok = True
-        status_code = 200
-        text = ""
-
-        @staticmethod
-        def json():
-            return {"conversation_id": "conv-fallback"}
-
-    def fake_post(url, headers=None, json=None, timeout=20):
-        calls.append(json)
+    def handler(request):
+        calls.append(json.loads(request.content))
         if len(calls) == 1:
-            return FailResponse()
-        return OkResponse()
+            return httpx.Response(400, text="invalid language")
+        return httpx.Response(200, json={"conversation_id": "conv-fallback"})
 
-    monkeypatch.setattr(backend_main.requests, "post", fake_post)
+    _use_tavus_handler(monkeypatch, handler)
 
     resp = client.post(
         "/tavus/conversations",
@@ -165,28 +183,35 @@ def test_tavus_conversation_fallback_to_spanish(monkeypatch):
     assert calls[1]["properties"]["language"] == "spanish"
 
 
+def test_tavus_conversation_returns_last_error_when_all_attempts_fail(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
+
+    def handler(request):
+        return httpx.Response(400, text="still invalid")
+
+    _use_tavus_handler(monkeypatch, handler)
+
+    resp = client.post("/tavus/conversations", json={"language": "english"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Tavus error (fallback spanish): still invalid"
+
+
 def test_tavus_conversation_includes_voice_properties(monkeypatch):
     monkeypatch.setenv("TAVUS_API_KEY", "test-key")
     monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
     monkeypatch.setenv("TAVUS_TTS_PROVIDER", "cartesia")
     monkeypatch.setenv("TAVUS_CARTESIA_VOICE_ID", "voice-env")
+    backend_main.settings_store.reload()
 
     captured = {"json": None}
 
-    class FakeResponse:
-        ok = True
-        status_code = 200
-        text = ""
-
-        @staticmethod
-        def json():
-            return {"conversation_id": "conv-voice"}
+    def handler(request):
+        captured["json"] = json.loads(request.content)
+        return httpx.Response(200, json={"conversation_id": "conv-voice"})
 
-    def fake_post(url, headers=None, json=None, timeout=20):
-        captured["json"] = json
-        return FakeResponse()
-
-    monkeypatch.setattr(backend_main.requests, "post", fake_post)
+    _use_tavus_handler(monkeypatch, handler)
 
     resp = client.post(
         "/tavus/conversations",
@@ -211,23 +236,17 @@ def test_tavus_verify_endpoint_sets_test_mode(monkeypatch):
     monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
     monkeypatch.setenv("TAVUS_TTS_PROVIDER", "cartesia")
     monkeypatch.setenv("TAVUS_CARTESIA_VOICE_ID", "voice-verify")
+    backend_main.settings_store.reload()
 
     captured = {"json": None}
 
-    class FakeResponse:
-        ok = True
-        status_code = 200
-        text = ""
-
-        @staticmethod
-        def json():
-            return {"conversation_id": "conv-verify", "status": "ended"}
-
-    def fake_post(url, headers=None, json=None, timeout=20):
-        captured["json"] = json
-        return FakeResponse()
+    def handler(request):
+        captured["json"] = json.loads(request.content)
+        return httpx.Response(
+            200, json={"conversation_id": "conv-verify", "status": "ended"}
+        )
 
-    monkeypatch.setattr(backend_main.requests, "post", fake_post)
+    _use_tavus_handler(monkeypatch, handler)
 
     resp = client.post("/tavus/conversations/verify", json={})
     assert resp.status_code == 200
@@ -247,37 +266,23 @@ def test_tavus_conversation_retries_without_unsupported_voice_keys(monkeypatch):
     monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
     monkeypatch.setenv("TAVUS_TTS_PROVIDER", "cartesia")
     monkeypatch.setenv("TAVUS_CARTESIA_VOICE_ID", "voice-unsupported")
+    backend_main.settings_store.reload()
 
     calls = []
 
-    class FailResponse:
-        ok = False
-        status_code = 400
-        text = (
-            '{"error":"Bad Request. {\'properties\': '
-            '{\'cartesia_voice_id\': [\'Unknown field.\']}}"}'
-        )
-
-        @staticmethod
-        def json():
-            return {"error": "unknown field"}
-
-    class OkResponse:
-        ok = True
-        status_code = 200
-        text = ""
-
-        @staticmethod
-        def json():
-            return {"conversation_id": "conv-no-voice-override"}
-
-    def fake_post(url, headers=None, json=None, timeout=20):
-        calls.append(json)
+    def handler(request):
+        calls.append(json.loads(request.content))
         if len(calls) == 1:
-            return FailResponse()
-        return OkResponse()
+            return httpx.Response(
+                400,
+                text=(
+                    '{"error":"Bad Request. {\'properties\': '
+                    '{\'cartesia_voice_id\': [\'Unknown field.\']}}"}'
+                ),
+            )
+        return httpx.Response(200, json={"conversation_id": "conv-no-voice-override"})
 
-    monkeypatch.setattr(backend_main.requests, "post", fake_post)
+    _use_tavus_handler(monkeypatch, handler)
 
     resp = client.post("/tavus/conversations", json={"language": "spanish"})
     assert resp.status_code == 200
@@ -286,3 +291,65 @@ def test_tavus_conversation_retries_without_unsupported_voice_keys(monkeypatch):
     assert len(calls) == 2
     assert calls[0]["properties"]["cartesia_voice_id"] == "voice-unsupported"
     assert "cartesia_voice_id" not in calls[1]["properties"]
+
+
+def test_conversation_uses_async_client(monkeypatch):
+    captured = {}
+
+    class FakeAsyncResponses:
+        async def create(self, **kwargs):
+            captured.update(kwargs)
+            return SimpleNamespace(output_text="hola async")
+
+    fake_client = SimpleNamespace(responses=FakeAsyncResponses())
+    monkeypatch.setattr(backend_main, "client", fake_client)
+
+    resp = client.post("/conversation", json={"text": "¿vacío o entraña?"})
+    assert resp.status_code == 200
+    assert resp.json() == {"reply": "hola async"}
+    assert captured["input"] == "¿vacío o entraña?"
+
+
+def test_conversation_returns_503_when_openai_saturated(monkeypatch):
+    import asyncio
+
+    class FakeResponses:
+        def create(self, **kwargs):
+            raise AssertionError("should not reach OpenAI when saturated")
+
+    limiter = backend_main.ConcurrencyLimiter(
+        max_concurrency=1, max_queue=0, max_wait=0.01
+    )
+    asyncio.run(limiter.acquire())
+    monkeypatch.setattr(backend_main, "openai_limiter", limiter)
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+
+    resp = client.post("/conversation", json={"text": "hola"})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+
+
+def test_tavus_conversation_reuses_learned_fallback_variant(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
+
+    languages = []
+
+    def handler(request):
+        language = json.loads(request.content)["properties"]["language"]
+        languages.append(language)
+        if language != "spanish":
+            return httpx.Response(400, text="invalid language")
+        return httpx.Response(200, json={"conversation_id": "conv-learned"})
+
+    _use_tavus_handler(monkeypatch, handler)
+
+    first = client.post("/tavus/conversations", json={"language": "english"})
+    second = client.post("/tavus/conversations", json={"language": "english"})
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert languages == ["english", "spanish", "spanish"]
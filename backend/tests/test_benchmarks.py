@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from openai import OpenAI
+
+from backend import main as backend_main
+from backend.benchmarks.bench_app import LagProbeApp, percentile
+from backend.benchmarks.harness import run_level
+from backend.benchmarks.stubs import (
+    OpenAIStubConfig,
+    StubServer,
+    TavusStubConfig,
+    build_openai_stub,
+    build_tavus_stub,
+    parse_latency,
+)
+
+
+def test_parse_latency_specs():
+    assert parse_latency("0.2")() == 0.2
+    assert 0.1 <= parse_latency("uniform:0.1,0.3")() <= 0.3
+    assert parse_latency("lognormal:0.5,0.2")() > 0
+    assert parse_latency("exp:0.1")() >= 0
+    with pytest.raises(ValueError):
+        parse_latency("uniform:1")
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+
+def test_tavus_stub_applies_rejection_rules():
+    stub = TestClient(
+        build_tavus_stub(
+            TavusStubConfig(
+                accepted_languages=frozenset({"spanish"}),
+                reject_voice_overrides=True,
+            )
+        )
+    )
+
+    def create(properties):
+        return stub.post("/v2/conversations", json={"properties": properties})
+
+    assert create({"language": "english"}).status_code == 400
+    assert create({"language": "spanish", "tts_voice_id": "x"}).status_code == 400
+    accepted = create({"language": "spanish"})
+    assert accepted.status_code == 200
+    assert accepted.json()["conversation_id"].startswith("stub-")
+
+
+def test_openai_stub_is_understood_by_the_sdk():
+    server = StubServer(build_openai_stub(OpenAIStubConfig(reply="Malbec"))).start()
+    try:
+        sdk = OpenAI(api_key="bench", base_url=f"{server.url}/v1")
+        response = sdk.responses.create(model="stub", input="hola")
+        completion = sdk.chat.completions.create(
+            model="stub", messages=[{"role": "user", "content": "hola"}]
+        )
+    finally:
+        server.stop()
+
+    assert response.output_text == "Malbec"
+    assert response.usage.input_tokens_details.cached_tokens == 128
+    assert completion.choices[0].message.content == "Malbec"
+
+
+def test_run_level_reports_throughput_latency_and_loop_lag(monkeypatch):
+    class FakeResponses:
+        async def create(self, **kwargs):
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(output_text="respuesta")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    monkeypatch.setattr(backend_main, "answer_cache", None)
+    server = StubServer(LagProbeApp(backend_main.app)).start()
+    try:
+        result = asyncio.run(
+            run_level(server.url, "conversation", concurrency=4, duration=0.3)
+        )
+    finally:
+        server.stop()
+
+    assert result["requests"] > 0
+    assert result["status"] == {"200": result["requests"]}
+    assert result["rps"] > 0
+    assert result["latency"]["p50"] <= result["latency"]["p99"]
+    assert result["event_loop_lag"]["samples"] > 0
@@ -1,50 +1,109 @@
-import pytest
-
-
-def test_tavus_client_post_and_get(monkeypatch):
-    """Simulate TavusClient network calls (requests.get/post) with monkeypatch."""
-
-    # Minimal function that mirrors src/tavus_client.create_conversation behavior
-    def fake_get(url, headers=None, timeout=10):
-        class Resp:
-            status_code = 200
+import json
+from urllib.parse import parse_qs, urlparse
 
-            def json(self):
-                return {"videos": []}
-
-        return Resp()
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+
+class FakeTavusAdapter(BaseAdapter):
+    """Transport for requests.Session that answers like the Tavus API."""
+
+    def __init__(self, items=(), etag='"v1"'):
+        super().__init__()
+        self.items = list(items)
+        self.etag = etag
+        self.calls = []
+
+    def _response(self, request, status, body=None, headers=None):
+        response = requests.Response()
+        response.status_code = status
+        response.request = request
+        response.url = request.url
+        response.headers.update(headers or {})
+        response._content = json.dumps(body).encode() if body is not None else b""
+        return response
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.calls.append((request.method, url.path, query, dict(request.headers)))
+        if request.method == "POST":
+            return self._response(request, 201, {"id": "conv-123"})
+        if url.path.endswith("/videos") and "page" not in query:
+            return self._response(request, 200, {"data": self.items[:1]})
+        if request.headers.get("If-None-Match") == self.etag:
+            return self._response(request, 304)
+        page, limit = int(query["page"]), int(query["limit"])
+        data = self.items[(page - 1) * limit:page * limit]
+        return self._response(
+            request,
+            200,
+            {"data": data, "total_count": len(self.items)},
+            {"ETag": self.etag},
+        )
+
+    def close(self):
+        return None
+
+
+def _tavus_client(monkeypatch, adapter):
+    from src.tavus_client import TavusClient
 
-    def fake_post(url, json=None, headers=None, timeout=10):
-        class Resp:
-            status_code = 201
+    monkeypatch.setenv("TAVUS_API_KEY", "fake-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://api.tavus.test/v2")
+    client = TavusClient(page_size=2)
+    client.session.mount("https://", adapter)
+    return client
 
-            def json(self):
-                return {"id": "conv-123"}
 
-            def raise_for_status(self):
-                return None
+def test_tavus_client_post_and_probe(monkeypatch):
+    adapter = FakeTavusAdapter(items=[{"video_id": "v1"}, {"video_id": "v2"}])
+    client = _tavus_client(monkeypatch, adapter)
 
-        return Resp()
+    assert client.api_key == "fake-key"
+    assert client.test_connection() is True
+    conv = client.create_conversation(context={"user": "test"})
 
-    monkeypatch.setattr("requests.get", fake_get)
-    monkeypatch.setattr("requests.post", fake_post)
+    assert conv == {"id": "conv-123"}
+    probe, create = adapter.calls
+    # El chequeo de conexión pide un solo elemento, no el listado completo.
+    assert probe[:3] == ("GET", "/v2/videos", {"limit": "1"})
+    assert probe[3]["x-api-key"] == "fake-key"
+    assert create[:2] == ("POST", "/v2/conversations")
+    retry = client.session.adapters["http://"].max_retries
+    assert retry.total == 3 and 503 in retry.status_forcelist
+    assert "POST" not in retry.allowed_methods
+
+
+def test_tavus_client_iterates_pages_lazily(monkeypatch):
+    items = [{"replica_id": f"r{n}"} for n in range(5)]
+    adapter = FakeTavusAdapter(items=items)
+    client = _tavus_client(monkeypatch, adapter)
+
+    replicas = client.iter_replicas()
+    first = next(replicas)
+
+    assert first == {"replica_id": "r0"}
+    assert list(replicas) == items[1:]
+    pages = [call[2]["page"] for call in adapter.calls]
+    assert pages == ["1", "2", "3"]  # se corta con total_count, sin página vacía
+    with pytest.raises(ValueError):
+        list(client.iter_resource("invoices"))
+    client.close()
 
-    # Import here to avoid module-level side effects earlier
-    from src.tavus_client import TavusClient
 
-    # Ensure env vars are present
-    monkeypatch.setenv("TAVUS_API_KEY", "fake-key")
-    monkeypatch.setenv("TAVUS_API_URL", "https://api.tavus.test")
+def test_tavus_client_reuses_cached_page_on_304(monkeypatch):
+    items = [{"persona_id": "p1"}]
+    adapter = FakeTavusAdapter(items=items)
+    client = _tavus_client(monkeypatch, adapter)
 
-    client = TavusClient()
-    assert client.api_key == "fake-key"
-    ok = client.test_connection()
-    # Our fake_get returns status_code 200, so method should return True
-    assert ok is True
+    first = list(client.iter_personas())
+    second = list(client.iter_personas())
 
-    conv = client.create_conversation(context={"user": "test"})
-    assert isinstance(conv, dict)
-    assert conv.get("id") == "conv-123"
+    assert first == second == items
+    assert "If-None-Match" not in adapter.calls[0][3]
+    assert adapter.calls[1][3]["If-None-Match"] == '"v1"'
 
 
 def test_livekit_client_socket(monkeypatch):
@@ -79,17 +138,36 @@ def test_livekit_client_socket(monkeypatch):
 
 def test_livekit_client_missing_env(monkeypatch):
     # Ensure dotenv doesn't populate env vars from config file for this test
-    monkeypatch.setattr("dotenv.load_dotenv", lambda *a, **k: None)
-    # reload module so the patched load_dotenv is used at import time
-    import importlib
-
-    import src.livekit_client as lk
+    import src.config
+    from src.livekit_client import LiveKitClient
 
-    importlib.reload(lk)
+    monkeypatch.setattr(src.config, "load_dotenv", lambda *a, **k: None)
+    src.config.load_secrets.cache_clear()
 
     # Remove any env vars that could still be set
     monkeypatch.delenv("LIVEKIT_API_KEY", raising=False)
     monkeypatch.delenv("LIVEKIT_API_SECRET", raising=False)
 
     with pytest.raises(ValueError):
-        lk.LiveKitClient()
+        LiveKitClient()
+
+
+def test_clients_load_secrets_once(monkeypatch):
+    import src.config
+    from src.livekit_client import LiveKitClient
+    from src.tavus_client import TavusClient
+
+    calls = []
+    monkeypatch.setattr(
+        src.config, "load_dotenv", lambda *a, **k: calls.append(k["dotenv_path"])
+    )
+    src.config.load_secrets.cache_clear()
+    monkeypatch.setenv("TAVUS_API_KEY", "fake-key")
+    monkeypatch.setenv("LIVEKIT_API_KEY", "k")
+    monkeypatch.setenv("LIVEKIT_API_SECRET", "s")
+
+    TavusClient()
+    TavusClient()
+    LiveKitClient()
+
+    assert calls == [src.config.SECRETS_PATH]
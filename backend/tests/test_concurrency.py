@@ -0,0 +1,67 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend.concurrency import (  # noqa: E402
+    ConcurrencyLimiter,
+    ConcurrencyLimitExceeded,
+)
+
+
+def test_limiter_caps_in_flight_calls():
+    limiter = ConcurrencyLimiter(max_concurrency=3, max_queue=10, max_wait=1)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*[work() for _ in range(12)])
+
+    asyncio.run(run())
+    assert peak == 3
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+
+
+def test_limiter_rejects_when_queue_is_full():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, max_wait=1)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        with pytest.raises(ConcurrencyLimitExceeded):
+            await limiter.acquire()
+        limiter.release()
+        await waiter
+        limiter.release()
+
+    asyncio.run(run())
+
+
+def test_limiter_times_out_waiting_callers():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=5, max_wait=0.02)
+
+    async def run():
+        await limiter.acquire()
+        with pytest.raises(ConcurrencyLimitExceeded):
+            await limiter.acquire()
+        assert limiter.waiting == 0
+        limiter.release()
+
+    asyncio.run(run())
+
+
+def test_limiter_requires_positive_concurrency():
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(max_concurrency=0, max_queue=0, max_wait=0)
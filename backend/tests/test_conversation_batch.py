@@ -0,0 +1,175 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main as backend_main
+from backend.admission import parse_api_keys
+
+api = TestClient(backend_main.app, headers={"X-API-Key": "batch-key"})
+
+
+@pytest.fixture(autouse=True)
+def _batch_keys(monkeypatch):
+    monkeypatch.setattr(
+        backend_main,
+        "batch_api_keys",
+        parse_api_keys("reports:batch-key,other:other-key"),
+    )
+
+
+def _lines(resp):
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def test_batch_streams_ndjson_with_per_item_errors(monkeypatch):
+    in_flight = {"now": 0, "max": 0}
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            if kwargs["input"] == "falla":
+                raise RuntimeError("boom")
+            assert kwargs["instructions"] == backend_main.SOMMELIER_SYSTEM_PROMPT
+            return SimpleNamespace(output_text=f"sobre {kwargs['input']}")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    prompts = [f"corte {n}" for n in range(6)] + ["falla", {"id": "x", "text": ""}]
+
+    resp = api.post("/conversation/batch", json={"prompts": prompts, "concurrency": 2})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(resp)
+    assert lines[-1] == {"done": True, "succeeded": 6, "failed": 2}
+    by_id = {line["id"]: line for line in lines[:-1]}
+    assert by_id["0"]["reply"] == "sobre corte 0"
+    assert by_id["6"]["error"]["status"] == 502
+    assert by_id["x"]["error"]["status"] == 400
+    assert in_flight["max"] == 2
+
+
+def test_batch_validates_prompts(monkeypatch):
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=SimpleNamespace())
+    )
+    assert api.post("/conversation/batch", json={"prompts": []}).status_code == 400
+    duplicated = {"prompts": [{"id": "a", "text": "x"}, {"id": "a", "text": "y"}]}
+    assert api.post("/conversation/batch", json=duplicated).status_code == 400
+
+
+def test_batch_requires_an_api_key(monkeypatch):
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=SimpleNamespace())
+    )
+    anonymous = TestClient(backend_main.app)
+    body = {"prompts": ["vacío"]}
+    assert anonymous.post("/conversation/batch", json=body).status_code == 401
+    assert anonymous.get("/conversation/batch/batch-1").status_code == 401
+    wrong = anonymous.post(
+        "/conversation/batch", json=body, headers={"X-API-Key": "nope"}
+    )
+    assert wrong.status_code == 401
+
+
+def test_provider_mode_is_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=SimpleNamespace())
+    )
+    resp = api.post(
+        "/conversation/batch", json={"mode": "provider", "prompts": ["vacío"]}
+    )
+    assert resp.status_code == 403
+
+
+def test_batch_can_be_submitted_to_the_provider_batch_api(monkeypatch):
+    uploads = []
+
+    class FakeFiles:
+        def create(self, file, purpose):
+            uploads.append((file, purpose))
+            return SimpleNamespace(id="file-in")
+
+        def content(self, file_id):
+            assert file_id == "file-out"
+            body = {
+                "output": [
+                    {
+                        "type": "message",
+                        "content": [{"type": "output_text", "text": "Malbec"}],
+                    }
+                ]
+            }
+            records = [
+                {"custom_id": "a", "response": {"status_code": 200, "body": body}},
+                {
+                    "custom_id": "b",
+                    "response": {"status_code": 500, "body": {}},
+                    "error": "boom",
+                },
+            ]
+            return SimpleNamespace(
+                text="\n".join(json.dumps(record) for record in records)
+            )
+
+    class FakeBatches:
+        def __init__(self):
+            self.status = "in_progress"
+
+        def create(self, **kwargs):
+            self.created = kwargs
+            return SimpleNamespace(id="batch-1", status="validating")
+
+        def retrieve(self, batch_id):
+            return SimpleNamespace(
+                id=batch_id,
+                metadata=self.created["metadata"],
+                status=self.status,
+                output_file_id="file-out" if self.status == "completed" else None,
+                request_counts={"total": 2, "completed": 0, "failed": 0},
+            )
+
+    batches = FakeBatches()
+    monkeypatch.setattr(backend_main, "CONVERSATION_BATCH_PROVIDER_ENABLED", True)
+    monkeypatch.setattr(
+        backend_main,
+        "client",
+        SimpleNamespace(
+            responses=SimpleNamespace(create=None), files=FakeFiles(), batches=batches
+        ),
+    )
+
+    resp = api.post(
+        "/conversation/batch",
+        json={"mode": "provider", "prompts": [{"id": "a", "text": "vacío"}, "b"]},
+    )
+
+    assert resp.status_code == 202
+    assert resp.json() == {"batch_id": "batch-1", "status": "validating", "items": 2}
+    (filename, data), purpose = uploads[0]
+    assert purpose == "batch"
+    requests = [json.loads(line) for line in data.decode().splitlines()]
+    assert [request["custom_id"] for request in requests] == ["a", "1"]
+    assert requests[0]["url"] == "/v1/responses"
+    assert requests[0]["body"]["instructions"] == backend_main.SOMMELIER_SYSTEM_PROMPT
+    assert batches.created["completion_window"] == "24h"
+    assert batches.created["metadata"]["client"] == "reports"
+
+    # Otro cliente no puede leer el resultado.
+    foreign = api.get("/conversation/batch/batch-1", headers={"X-API-Key": "other-key"})
+    assert foreign.status_code == 404
+
+    pending = api.get("/conversation/batch/batch-1")
+    assert pending.json()["status"] == "in_progress"
+
+    batches.status = "completed"
+    done = _lines(api.get("/conversation/batch/batch-1"))
+    assert done[0] == {"id": "a", "reply": "Malbec"}
+    assert done[1]["error"] == {"status": 500, "detail": "boom"}
@@ -0,0 +1,246 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+from backend.conversation_lifecycle import ConversationLifecycle  # noqa: E402
+
+client = TestClient(backend_main.app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _open(lifecycle, conversation_id):
+    slot_id = lifecycle.acquire()
+    assert slot_id is not None
+    return lifecycle.activate(slot_id, conversation_id)
+
+
+def test_quota_queues_in_fifo_order_and_grants_freed_slots():
+    clock = FakeClock()
+    lifecycle = ConversationLifecycle(
+        max_active=2, expected_duration=300, clock=clock
+    )
+    _open(lifecycle, "conv-1")
+    _open(lifecycle, "conv-2")
+    assert lifecycle.acquire() is None
+
+    first = lifecycle.enqueue({"language": "spanish"})
+    clock.now += 1
+    second = lifecycle.enqueue({})
+    assert (first.position, second.position) == (1, 2)
+    assert first.estimated_wait == 150
+    assert first.as_dict()["estimated_wait_seconds"] == 150
+
+    assert lifecycle.finish("conv-1")
+    # Con gente esperando, un pedido nuevo no se cuela.
+    assert lifecycle.acquire() is None
+    assert not lifecycle.poll(second.ticket_id).granted
+
+    granted = lifecycle.poll(first.ticket_id)
+    assert granted.granted
+    assert granted.body == {"language": "spanish"}
+    assert lifecycle.poll(first.ticket_id) is None
+    assert lifecycle.stats == {"limit": 2, "used": 2, "queued": 1}
+
+
+def test_reap_ends_idle_after_heartbeats_and_never_cuts_silent_ones():
+    clock = FakeClock()
+    lifecycle = ConversationLifecycle(max_active=0, idle_timeout=60, clock=clock)
+    token = _open(lifecycle, "talking")
+    _open(lifecycle, "silent")
+    assert lifecycle.heartbeat("talking", token)
+    assert not lifecycle.heartbeat("talking", "wrong-token")
+    assert not lifecycle.heartbeat("unknown", token)
+
+    clock.now += 61
+    assert lifecycle.reap() == [("talking", "idle")]
+
+    clock.now += 7200
+    assert lifecycle.reap() == []
+    assert lifecycle.stats["used"] == 1
+
+
+def test_silent_conversations_are_claimed_for_a_status_check_once_per_window():
+    clock = FakeClock()
+    lifecycle = ConversationLifecycle(max_active=0, idle_timeout=60, clock=clock)
+    token = _open(lifecycle, "talking")
+    _open(lifecycle, "silent")
+    assert lifecycle.claim_silent() == []
+
+    clock.now += 30
+    assert lifecycle.heartbeat("talking", token)
+    clock.now += 31
+    assert lifecycle.claim_silent() == ["silent"]
+    assert lifecycle.claim_silent() == []
+
+    clock.now += 61
+    assert lifecycle.claim_silent() == ["silent"]
+    assert lifecycle.finish("silent", "tavus")
+    assert lifecycle.stats["used"] == 1
+
+
+def test_max_duration_is_an_optional_hard_cap():
+    clock = FakeClock()
+    lifecycle = ConversationLifecycle(
+        max_active=0, idle_timeout=60, max_duration=600, clock=clock
+    )
+    token = _open(lifecycle, "talking")
+    for _ in range(10):
+        clock.now += 55
+        assert lifecycle.heartbeat("talking", token)
+        assert lifecycle.reap() == []
+    clock.now += 55
+    assert lifecycle.reap() == [("talking", "max_duration")]
+
+
+def test_pooled_hand_off_issues_a_new_control_token():
+    lifecycle = ConversationLifecycle()
+    pool_token = _open(lifecycle, "pooled")
+    client_token = lifecycle.hand_off("pooled")
+    assert client_token not in (None, pool_token)
+    assert lifecycle.hand_off("unknown") is None
+    assert not lifecycle.finish("pooled", token=pool_token)
+    assert lifecycle.finish("pooled", token=client_token)
+
+
+def test_reaper_frees_conversations_tavus_already_ended(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
+    clock = FakeClock()
+    lifecycle = ConversationLifecycle(idle_timeout=60, clock=clock)
+    monkeypatch.setattr(backend_main, "conversation_lifecycle", lifecycle)
+    for conversation_id in ("live", "ended", "gone", "unknown"):
+        _open(lifecycle, conversation_id)
+    statuses = {"live": 200, "ended": 200, "gone": 404, "unknown": 500}
+    calls = []
+
+    def handler(request):
+        conversation_id = request.url.path.rsplit("/", 1)[-1]
+        calls.append((request.method, conversation_id))
+        status = "ended" if conversation_id == "ended" else "active"
+        return httpx.Response(statuses[conversation_id], json={"status": status})
+
+    monkeypatch.setattr(
+        backend_main,
+        "tavus_http_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    clock.now += 61
+    try:
+        asyncio.run(backend_main._reap_tavus_conversations_once())
+    finally:
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+    # Sólo consulta el estado: nunca termina una llamada en curso.
+    assert {method for method, _ in calls} == {"GET"}
+    assert lifecycle.stats["used"] == 2
+    assert not lifecycle.finish("ended")
+    assert not lifecycle.finish("gone")
+    assert lifecycle.finish("live")
+    assert lifecycle.finish("unknown")
+
+
+def test_abandoned_tickets_and_pending_slots_expire():
+    clock = FakeClock()
+    lifecycle = ConversationLifecycle(
+        max_active=1, ticket_ttl=30, pending_ttl=120, clock=clock
+    )
+    assert lifecycle.acquire() is not None
+    ticket = lifecycle.enqueue({})
+
+    clock.now += 31
+    assert lifecycle.poll(ticket.ticket_id) is None
+
+    clock.now += 100
+    assert lifecycle.reap() == []
+    assert lifecycle.acquire() is not None
+
+
+def test_workers_sharing_a_file_share_the_quota(tmp_path):
+    path = str(tmp_path / "lifecycle.sqlite3")
+    worker_a = ConversationLifecycle(path=path, max_active=1)
+    worker_b = ConversationLifecycle(path=path, max_active=1)
+    try:
+        _open(worker_a, "conv-1")
+        assert worker_b.acquire() is None
+        assert worker_b.finish("conv-1")
+        assert worker_a.acquire() is not None
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_api_queues_over_quota_and_ends_conversations(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
+    monkeypatch.setattr(
+        backend_main, "conversation_lifecycle", ConversationLifecycle(max_active=1)
+    )
+
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("/end"):
+            return httpx.Response(200, json={})
+        return httpx.Response(200, json={"conversation_id": f"conv-{len(calls)}"})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(backend_main, "tavus_http_client", http_client)
+
+    first = client.post("/tavus/conversations", json={"language": "spanish"})
+    assert first.status_code == 200
+    assert first.json()["conversation_id"] == "conv-1"
+    control = {"X-Conversation-Token": first.json()["control_token"]}
+
+    queued = client.post("/tavus/conversations", json={"language": "spanish"})
+    assert queued.status_code == 202
+    assert queued.headers["Retry-After"] == str(backend_main.TAVUS_QUEUE_POLL_SECONDS)
+    ticket = queued.json()
+    assert ticket["status"] == "queued"
+    assert ticket["position"] == 1
+
+    ticket_url = f"/tavus/conversations/queue/{ticket['ticket_id']}"
+    assert client.get(ticket_url).status_code == 202
+    heartbeat_url = "/tavus/conversations/conv-1/heartbeat"
+    assert client.post(heartbeat_url, headers=control).status_code == 204
+    assert client.post(heartbeat_url).status_code == 401
+    wrong = {"X-Conversation-Token": "wrong"}
+    assert client.post(heartbeat_url, headers=wrong).status_code == 404
+    end_url = "/tavus/conversations/conv-1/end"
+    assert client.post(end_url, headers=wrong).status_code == 404
+    assert (
+        client.post("/tavus/conversations/nope/heartbeat", headers=control).status_code
+        == 404
+    )
+
+    ended = client.post(end_url, headers=control)
+    assert ended.status_code == 200
+    assert ended.json() == {"conversation_id": "conv-1", "status": "ended"}
+    assert calls[-1].endswith("/conversations/conv-1/end")
+
+    granted = client.get(ticket_url)
+    assert granted.status_code == 200
+    assert granted.json()["conversation_id"].startswith("conv-")
+    assert granted.json()["control_token"] != control["X-Conversation-Token"]
+    assert client.get(ticket_url).status_code == 404
+    assert client.post(end_url, headers=control).status_code == 404
+
+    monkeypatch.undo()
+    backend_main.settings_store.reload()
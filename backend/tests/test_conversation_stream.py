@@ -0,0 +1,199 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+
+
+client = TestClient(backend_main.app)
+
+
+def _parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        name = "message"
+        data = None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                name = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((name, data))
+    return events
+
+
+class FakeAsyncStream:
+    def __init__(self, events):
+        self._events = list(events)
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for event in self._events:
+            yield event
+
+    async def close(self):
+        self.closed = True
+
+
+def _text_delta(delta):
+    return SimpleNamespace(type="response.output_text.delta", delta=delta)
+
+
+def test_conversation_streams_responses_api_tokens(monkeypatch):
+    upstream = FakeAsyncStream(
+        [
+            SimpleNamespace(type="response.created"),
+            _text_delta("Vacío "),
+            _text_delta("a la parrilla"),
+            SimpleNamespace(type="response.completed"),
+        ]
+    )
+    captured = {}
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            captured.update(kwargs)
+            return upstream
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    ttft_labels = {"api": "responses"}
+    ttft_before = (
+        REGISTRY.get_sample_value(
+            "openai_time_to_first_token_seconds_count", ttft_labels
+        )
+        or 0
+    )
+
+    resp = client.post("/conversation", json={"text": "hola", "stream": True})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert captured["stream"] is True
+    assert _parse_sse(resp.text) == [
+        ("message", {"delta": "Vacío "}),
+        ("message", {"delta": "a la parrilla"}),
+        ("done", {"reply": "Vacío a la parrilla"}),
+    ]
+    assert upstream.closed is True
+    assert backend_main.openai_limiter.in_flight == 0
+    assert (
+        REGISTRY.get_sample_value(
+            "openai_time_to_first_token_seconds_count", ttft_labels
+        )
+        == ttft_before + 1
+    )
+
+
+def test_conversation_streams_chat_completions_with_accept_header(monkeypatch):
+    def chunk(content):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=content))]
+        )
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            assert kwargs["stream"] is True
+            return iter([chunk("Malbec"), chunk(None), chunk(" joven")])
+
+    monkeypatch.setattr(
+        backend_main,
+        "client",
+        SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())),
+    )
+
+    resp = client.post(
+        "/conversation",
+        json={"text": "¿qué vino?"},
+        headers={"Accept": "text/event-stream"},
+    )
+    assert resp.status_code == 200
+    assert _parse_sse(resp.text)[-1] == ("done", {"reply": "Malbec joven"})
+
+
+def test_stream_stops_and_closes_upstream_when_client_disconnects(monkeypatch):
+    upstream = FakeAsyncStream([_text_delta("uno"), _text_delta("dos")])
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            return upstream
+
+    class FakeRequest:
+        def __init__(self):
+            self.checks = 0
+
+        async def is_disconnected(self):
+            self.checks += 1
+            return self.checks > 1
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+
+    async def run():
+        response = await backend_main._stream_conversation(FakeRequest(), "hola")
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = asyncio.run(run())
+    assert chunks == ['data: {"delta": "uno"}\n\n']
+    assert upstream.closed is True
+    assert backend_main.openai_limiter.in_flight == 0
+
+
+def test_stream_reports_upstream_errors_as_sse_event(monkeypatch):
+    class BrokenStream(FakeAsyncStream):
+        async def _iterate(self):
+            yield _text_delta("parcial")
+            raise httpx.RemoteProtocolError("boom")
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            return BrokenStream([])
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+
+    monkeypatch.setattr(
+        backend_main,
+        "openai_guard",
+        backend_main.UpstreamGuard(
+            backend_main.CircuitBreaker("openai", window_size=2, min_calls=2),
+            backend_main.AIMDLimiter("openai"),
+        ),
+    )
+
+    resp = client.post("/conversation", json={"text": "hola", "stream": True})
+    events = _parse_sse(resp.text)
+    assert events[-1][0] == "error"
+    assert "boom" in events[-1][1]["detail"]
+    # Abrir el stream fue un éxito y el corte a mitad de camino una falla.
+    assert backend_main.openai_guard.breaker.state == "open"
+
+
+def test_routing_errors_surface_without_taking_a_limiter_slot(monkeypatch):
+    def broken_route(text):
+        raise RuntimeError("router down")
+
+    monkeypatch.setattr(backend_main.model_router, "route", broken_route)
+
+    async def run():
+        await backend_main._stream_conversation(SimpleNamespace(), "hola")
+
+    with pytest.raises(RuntimeError, match="router down"):
+        asyncio.run(run())
+    assert backend_main.openai_limiter.in_flight == 0
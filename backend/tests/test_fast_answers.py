@@ -0,0 +1,129 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+from backend.fast_answers import FastAnswerEngine  # noqa: E402
+
+client = TestClient(backend_main.app)
+engine = FastAnswerEngine()
+
+
+@pytest.mark.parametrize(
+    "text, intent, fragment",
+    [
+        (
+            "¿A qué temperatura interna saco un bife a punto?",
+            "doneness_temperature",
+            "retirala a 55-57 °C",
+        ),
+        ("¿a qué temperatura está listo el pollo?", "doneness_temperature", "74 °C"),
+        (
+            "¿cuánto tiempo a la parrilla para 2 kg de vacío?",
+            "cooking_time",
+            "para 2 kg lleva entre 1 h 20 min y 1 h 45 min",
+        ),
+        (
+            "¿Cuánto tarda un kilo y medio de matambre?",
+            "cooking_time",
+            "para 1,5 kg lleva entre 40 y 50 minutos",
+        ),
+        (
+            "¿cuántos minutos lleva un bife de chorizo?",
+            "cooking_time",
+            "entre 6 y 8 minutos, por lado",
+        ),
+        (
+            "¿Cuánta carne compro para 8 adultos y 4 chicos?",
+            "portions",
+            "8 adultos y 4 chicos calculá unos 4,5 kg de carne con hueso",
+        ),
+        (
+            "Somos 12 con 4 chicos, ¿cuántos kilos compro?",
+            "portions",
+            "8 adultos y 4 chicos",
+        ),
+    ],
+)
+def test_structured_questions_are_answered_from_the_tables(text, intent, fragment):
+    answer = engine.answer(text)
+    assert answer is not None
+    assert answer.intent == intent
+    assert fragment in answer.reply
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "hola",
+        "¿vacío o entraña?",
+        # Fuera de las tablas (parrilla) o con una segunda pregunta.
+        "¿cuánto tarda la colita de cuadril al horno?",
+        "¿cuánto tiempo para 2 kg de vacío y qué vino sirvo con eso?",
+        "a qué temperatura se saca la carne para una receta de la abuela con salsa",
+    ],
+)
+def test_unstructured_or_compound_questions_fall_back_to_the_model(text):
+    assert engine.answer(text) is None
+
+
+def test_conversation_answers_without_calling_the_model(monkeypatch):
+    calls = []
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(output_text="respuesta del modelo")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+
+    def hits():
+        return REGISTRY.get_sample_value(
+            "conversation_fast_path_total",
+            {"intent": "doneness_temperature", "result": "hit"},
+        ) or 0.0
+
+    before = hits()
+    question = "¿A qué temperatura interna saco un bife jugoso?"
+    resp = client.post("/conversation", json={"text": question})
+    assert resp.status_code == 200
+    assert "retirala a 50-52 °C" in resp.json()["reply"]
+    assert hits() == before + 1
+
+    streamed = client.post(
+        "/conversation", json={"text": question, "stream": True}
+    )
+    assert "event: done" in streamed.text
+    assert calls == []
+
+    resp = client.post("/conversation", json={"text": "¿qué corte me recomendás?"})
+    assert resp.json() == {"reply": "respuesta del modelo"}
+    assert len(calls) == 1
+
+
+def test_fast_path_session_turns_still_schedule_the_summary(monkeypatch):
+    summarized = []
+
+    async def fake_summarize(session_id):
+        summarized.append(session_id)
+
+    monkeypatch.setattr(backend_main, "client", SimpleNamespace(responses=None))
+    monkeypatch.setattr(backend_main, "_maybe_summarize_session", fake_summarize)
+    question = "¿A qué temperatura interna saco un bife jugoso?"
+
+    for stream in (False, True):
+        resp = client.post(
+            "/conversation", json={"text": question, "session": True, "stream": stream}
+        )
+        assert resp.status_code == 200
+
+    assert len(summarized) == 2
@@ -0,0 +1,125 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+from backend.knowledge import (  # noqa: E402
+    DEFAULT_SOURCE_PATH,
+    KnowledgeIndex,
+    benchmark,
+    compile_index,
+    load_knowledge_base,
+    tokenize,
+)
+
+client = TestClient(backend_main.app)
+
+SOURCE = """
+snippets:
+  - id: vacio
+    title: Vacío
+    tags: [flank]
+    text: Va a fuego medio-bajo de 1 h 30 min a 2 h.
+  - id: malbec
+    title: Malbec
+    text: Tinto argentino para bife de chorizo y vacío.
+  - id: lomo
+    title: Lomo
+    text: El corte más tierno y magro.
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    source = tmp_path / "kb.yaml"
+    source.write_text(SOURCE, encoding="utf-8")
+    index = load_knowledge_base(str(source), str(tmp_path / "kb.idx"))
+    yield index
+    index.close()
+
+
+def test_tokenize_folds_accents_plurals_and_stopwords():
+    assert tokenize("¿Qué VINOS van con el Vacío?") == ["vino", "van", "vacio"]
+
+
+def test_search_ranks_snippets_and_skips_small_talk(index):
+    results = index.search("¿cuánto tiempo al fuego para el vacío?", k=2)
+    assert [snippet.snippet_id for snippet in results] == ["vacio", "malbec"]
+    assert results[0].score > results[1].score
+    assert results[0].text.startswith("Va a fuego")
+    assert index.search("hola") == []
+    assert index.search("vacío", min_score=100) == []
+
+
+def test_index_is_rebuilt_only_when_the_source_changes(tmp_path):
+    source = tmp_path / "kb.yaml"
+    index_path = str(tmp_path / "kb.idx")
+    source.write_text(SOURCE, encoding="utf-8")
+    version = compile_index(str(source), index_path)
+    mtime = Path(index_path).stat().st_mtime_ns
+
+    index = load_knowledge_base(str(source), index_path)
+    assert index.version == version
+    assert Path(index_path).stat().st_mtime_ns == mtime
+    index.close()
+
+    source.write_text(SOURCE.replace("magro", "magro, ideal para el horno"))
+    index = load_knowledge_base(str(source), index_path)
+    assert index.version != version
+    assert [snippet.snippet_id for snippet in index.search("horno")] == ["lomo"]
+    index.close()
+
+
+def test_shipped_catalogue_retrieval_stays_sub_millisecond(tmp_path):
+    compile_index(DEFAULT_SOURCE_PATH, str(tmp_path / "kb.idx"))
+    index = KnowledgeIndex(str(tmp_path / "kb.idx"))
+    try:
+        top = index.search("¿qué temperatura interna para un bife a punto?", k=1)
+        assert top[0].snippet_id == "punto-coccion"
+        assert index.warm() >= 1
+        result = benchmark(index, rounds=5)
+    finally:
+        index.close()
+    assert result["snippets"] >= 40
+    assert result["p50_ms"] < 1
+
+
+def test_warm_up_pages_the_index_in(monkeypatch, index):
+    monkeypatch.setattr(backend_main, "client", None)
+    monkeypatch.setattr(backend_main, "knowledge_base", index)
+    steps = backend_main._warmup_steps()
+    assert "knowledge_base" in steps
+    asyncio.run(steps["knowledge_base"]())
+
+
+def test_conversation_injects_snippets_before_the_user_message(monkeypatch, index):
+    calls = []
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(output_text="respuesta")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    monkeypatch.setattr(backend_main, "knowledge_base", index)
+    monkeypatch.setattr(backend_main, "KNOWLEDGE_MIN_SCORE", 0.5)
+
+    resp = client.post("/conversation", json={"text": "¿un tinto para el vacío?"})
+    assert resp.status_code == 200
+    reference, user = calls[0]["input"]
+    assert calls[0]["instructions"] == backend_main.SOMMELIER_SYSTEM_PROMPT
+    assert reference["role"] == "system"
+    assert "- Malbec: Tinto argentino" in reference["content"]
+    assert user == {"role": "user", "content": "¿un tinto para el vacío?"}
+
+    client.post("/conversation", json={"text": "hola"})
+    assert calls[1]["input"] == "hola"
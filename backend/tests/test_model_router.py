@@ -0,0 +1,162 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+from backend.model_router import (  # noqa: E402
+    HEAVY,
+    LIGHT,
+    STANDARD,
+    ModelRouter,
+    ModelTier,
+    classify,
+    parse_tiers,
+)
+
+client = TestClient(backend_main.app)
+
+FAST = ModelTier("fast", "small-model", latency_budget=2)
+MID = ModelTier("mid", "mid-model", latency_budget=4)
+DEEP = ModelTier("deep", "big-model", latency_budget=8)
+MENU = "Quiero planificar el menú de un cumpleaños para 20 personas con tres cortes"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "text, level",
+    [
+        ("hola", LIGHT),
+        ("¡Muchas gracias!", LIGHT),
+        ("¿Qué vino va con el vacío?", STANDARD),
+        (MENU, HEAVY),
+        ("¿Vacío? ¿Entraña? ¿Matambre?", HEAVY),
+        ("a" * 300, HEAVY),
+    ],
+)
+def test_classify_by_length_questions_and_keywords(text, level):
+    assert classify(text) == level
+
+
+def test_parse_tiers_with_budgets_and_single_default():
+    assert parse_tiers("fast=small-model:2, deep=big-model", "x", 10) == [
+        ModelTier("fast", "small-model", 2.0),
+        ModelTier("deep", "big-model", 10.0),
+    ]
+    assert parse_tiers("", "gpt-4o-mini", 10) == [
+        ModelTier("default", "gpt-4o-mini", 10)
+    ]
+    with pytest.raises(ValueError):
+        parse_tiers("just-a-model", "x", 10)
+
+
+def test_levels_map_onto_the_configured_tiers():
+    two = ModelRouter([FAST, DEEP])
+    assert [two.route(text).model for text in ("hola", "¿y el vacío?", MENU)] == [
+        "small-model",
+        "small-model",
+        "big-model",
+    ]
+    three = ModelRouter([FAST, MID, DEEP])
+    assert three.route("¿y el vacío?").model == "mid-model"
+    single = ModelRouter([FAST])
+    assert single.route(MENU).model == "small-model"
+
+
+def test_degraded_model_shifts_to_a_faster_tier_then_recovers():
+    clock = FakeClock()
+    router = ModelRouter([FAST, MID, DEEP], min_samples=3, max_age=60, clock=clock)
+    for _ in range(3):
+        router.record("mid-model", 9.0, ok=True)
+
+    decision = router.route("¿y el vacío?")
+    assert (decision.model, decision.reason) == ("small-model", "slow")
+    assert router.snapshot()["mid"]["degraded"] == "slow"
+
+    for _ in range(3):
+        router.record("small-model", 1.0, ok=False)
+    decision = router.route("¿y el vacío?")
+    assert (decision.model, decision.reason) == ("big-model", "slow")
+    assert router.route("hola").reason == "errors"
+
+    clock.now += 61
+    assert router.route("¿y el vacío?").reason == "classified"
+
+
+def test_conversation_routes_by_complexity_without_changing_the_response(
+    monkeypatch,
+):
+    models = []
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            models.append(kwargs["model"])
+            return SimpleNamespace(output_text="respuesta")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    monkeypatch.setattr(backend_main, "model_router", ModelRouter([FAST, DEEP]))
+
+    def decisions(tier, model):
+        return REGISTRY.get_sample_value(
+            "model_routing_decisions_total",
+            {"tier": tier, "model": model, "reason": "classified"},
+        ) or 0.0
+
+    before = decisions("deep", "big-model")
+    assert client.post("/conversation", json={"text": "hola"}).json() == {
+        "reply": "respuesta"
+    }
+    assert client.post("/conversation", json={"text": MENU}).json() == {
+        "reply": "respuesta"
+    }
+    assert models == ["small-model", "big-model"]
+    assert decisions("deep", "big-model") == before + 1
+
+    assert client.get("/debug/model-router").status_code == 404
+    monkeypatch.setattr(backend_main, "DEBUG_ENDPOINTS_ENABLED", True)
+    snapshot = client.get("/debug/model-router").json()
+    assert snapshot["deep"]["samples"] == 1
+    assert snapshot["deep"]["degraded"] is None
+
+
+def test_fallback_replies_are_not_served_once_the_preferred_model_recovers(
+    monkeypatch,
+):
+    clock = FakeClock()
+    router = ModelRouter([FAST, MID, DEEP], min_samples=3, max_age=60, clock=clock)
+    models = []
+
+    class FakeResponses:
+        async def create(self, **kwargs):
+            models.append(kwargs["model"])
+            return SimpleNamespace(output_text=f"respuesta de {kwargs['model']}")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    monkeypatch.setattr(backend_main, "model_router", router)
+    for _ in range(3):
+        router.record("mid-model", 9.0, ok=True)
+
+    degraded = client.post("/conversation", json={"text": "¿y el vacío?"})
+    clock.now += 61
+    recovered = client.post("/conversation", json={"text": "¿y el vacío?"})
+
+    assert models == ["small-model", "mid-model"]
+    assert degraded.json() == {"reply": "respuesta de small-model"}
+    assert recovered.json() == {"reply": "respuesta de mid-model"}
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from backend import main as backend_main
+from backend.prompting import (
+    PromptBudget,
+    build_input_messages,
+    fit_history,
+    turn_tokens,
+    turns_to_summarize,
+)
+from backend.session_store import InMemorySessionBackend, Turn
+
+
+def test_fit_history_keeps_most_recent_turns_within_budget():
+    turns = [Turn("user", "x" * 40) for _ in range(5)]
+    budget = PromptBudget(max_history_tokens=turn_tokens(turns[0]) * 2)
+
+    assert fit_history(turns, "", budget) == turns[-2:]
+    assert fit_history(turns, "y" * 40, budget) == turns[-1:]
+
+
+def test_input_messages_put_summary_before_recent_turns():
+    messages = build_input_messages("resumen", [Turn("user", "hola")], "¿y vino?")
+
+    assert messages[0]["role"] == "system"
+    assert "resumen" in messages[0]["content"]
+    assert messages[1:] == [
+        {"role": "user", "content": "hola"},
+        {"role": "user", "content": "¿y vino?"},
+    ]
+
+
+def test_turns_to_summarize_keeps_recent_turns():
+    turns = [Turn("user", "x" * 40) for _ in range(6)]
+    budget = PromptBudget(summarize_after_tokens=1, keep_recent_turns=2)
+
+    assert turns_to_summarize(turns, budget) == 4
+    assert turns_to_summarize(turns, PromptBudget()) == 0
+
+
+def test_conversation_folds_old_turns_and_exports_cached_tokens(monkeypatch):
+    calls = []
+
+    class FakeResponses:
+        def create(self, **kwargs):
+            calls.append(kwargs)
+            usage = SimpleNamespace(
+                input_tokens=100,
+                input_tokens_details=SimpleNamespace(cached_tokens=64),
+            )
+            text = "resumen" if "Resum" in kwargs["instructions"] else "respuesta"
+            return SimpleNamespace(output_text=text, usage=usage)
+
+    store = InMemorySessionBackend()
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    monkeypatch.setattr(backend_main, "session_store", store)
+    monkeypatch.setattr(
+        backend_main,
+        "PROMPT_BUDGET",
+        PromptBudget(summarize_after_tokens=1, keep_recent_turns=2),
+    )
+    labels = {"model": backend_main.OPENAI_CHAT_MODEL}
+    cached_before = (
+        REGISTRY.get_sample_value("openai_cached_input_tokens_total", labels) or 0
+    )
+    api = TestClient(backend_main.app)
+
+    first = api.post("/conversation", json={"text": "¿vacío?", "session": True})
+    session_id = first.json()["session_id"]
+    api.post("/conversation", json={"text": "¿y vino?", "session_id": session_id})
+    api.post("/conversation", json={"text": "¿y postre?", "session_id": session_id})
+
+    assert store.load_summary(session_id) == "resumen"
+    assert [turn.content for turn in store.load(session_id)] == [
+        "¿y postre?",
+        "respuesta",
+    ]
+    last = calls[-2]
+    assert last["instructions"] == backend_main.SOMMELIER_SYSTEM_PROMPT
+    assert "resumen" in last["input"][0]["content"]
+    assert last["input"][-1] == {"role": "user", "content": "¿y postre?"}
+    assert (
+        REGISTRY.get_sample_value("openai_cached_input_tokens_total", labels)
+        == cached_before + 64 * len(calls)
+    )
@@ -0,0 +1,206 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from backend import main as backend_main
+from backend.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AIMDLimiter,
+    CircuitBreaker,
+    UpstreamGuard,
+    UpstreamUnavailable,
+    is_provider_failure,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock, **kwargs):
+    options = {"window_size": 4, "min_calls": 4, "open_seconds": 10}
+    options.update(kwargs)
+    return CircuitBreaker("test", clock=clock, **options)
+
+
+def test_breaker_opens_on_error_rate_and_recovers_through_half_open():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for success in (True, False, True, False):
+        breaker.before_call()
+        breaker.record(success, 0.1)
+
+    assert breaker.state == OPEN
+    with pytest.raises(UpstreamUnavailable) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 10
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(UpstreamUnavailable):
+        breaker.before_call()  # sólo un probe a la vez
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert REGISTRY.get_sample_value(
+        "upstream_circuit_state", {"provider": "test"}
+    ) == 0
+
+
+def test_breaker_opens_on_slow_calls_and_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = _breaker(clock, slow_call_seconds=1)
+    for _ in range(4):
+        breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+    clock.now = 10
+    breaker.before_call()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert REGISTRY.get_sample_value(
+        "upstream_circuit_state", {"provider": "test"}
+    ) == 2
+
+
+def test_aimd_limit_grows_when_fast_and_shrinks_on_failure():
+    limiter = AIMDLimiter("test", initial_limit=2, max_limit=4, latency_target=1)
+
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release(True, 0.1)
+    assert limiter.limit == 3
+    limiter.release(False, 0.1)
+    assert limiter.limit == 2
+    assert limiter.in_flight == 0
+
+    limiter.try_acquire()
+    limiter.release(True, 5.0)  # más lento que el target
+    assert limiter.limit == 1
+
+
+def test_provider_failure_classification():
+    request = httpx.Request("POST", "https://api.example")
+    assert is_provider_failure(httpx.ConnectError("network"))
+    assert is_provider_failure(httpx.ReadTimeout("slow"))
+    assert is_provider_failure(openai.APITimeoutError(request=request))
+    assert is_provider_failure(SimpleNamespace(status_code=503))
+    assert is_provider_failure(SimpleNamespace(status_code=429))
+    assert not is_provider_failure(SimpleNamespace(status_code=400))
+    assert not is_provider_failure(TypeError("bug while building the payload"))
+    assert not is_provider_failure(KeyError("missing"))
+
+
+def test_local_bugs_do_not_open_the_breaker():
+    guard = UpstreamGuard(
+        _breaker(FakeClock(), min_calls=1), AIMDLimiter("test", initial_limit=4)
+    )
+
+    async def buggy_call():
+        async with guard.call():
+            raise TypeError("Object of type mappingproxy is not JSON serializable")
+
+    for _ in range(3):
+        with pytest.raises(TypeError):
+            asyncio.run(buggy_call())
+
+    assert guard.breaker.state == CLOSED
+    assert guard.limiter.limit == 4
+    assert guard.limiter.in_flight == 0
+
+
+def test_cancelled_calls_do_not_count_against_the_provider():
+    guard = UpstreamGuard(
+        _breaker(FakeClock(), min_calls=1), AIMDLimiter("test", initial_limit=4)
+    )
+
+    async def cancelled_call():
+        async with guard.call():
+            raise asyncio.CancelledError
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancelled_call())
+
+    assert guard.breaker.state == CLOSED
+    assert guard.limiter.limit == 4
+    assert guard.limiter.in_flight == 0
+
+
+def test_conversation_sheds_with_retry_after_while_openai_circuit_is_open(
+    monkeypatch,
+):
+    calls = []
+
+    class FailingResponses:
+        def create(self, **kwargs):
+            calls.append(kwargs)
+            raise httpx.ConnectError("upstream down")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FailingResponses())
+    )
+    monkeypatch.setattr(
+        backend_main,
+        "openai_guard",
+        UpstreamGuard(
+            CircuitBreaker("openai", window_size=2, min_calls=2, open_seconds=30),
+            AIMDLimiter("openai"),
+        ),
+    )
+    api = TestClient(backend_main.app)
+
+    assert api.post("/conversation", json={"text": "a"}).status_code == 502
+    assert api.post("/conversation", json={"text": "b"}).status_code == 502
+    shed = api.post("/conversation", json={"text": "c"})
+
+    assert shed.status_code == 503
+    assert 1 <= int(shed.headers["Retry-After"]) <= 30
+    assert len(calls) == 2
+
+
+def test_tavus_rejections_do_not_open_the_breaker(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
+    monkeypatch.setattr(
+        backend_main, "tavus_ladder_memory", backend_main.FallbackLadderMemory()
+    )
+    breaker = CircuitBreaker("tavus", window_size=2, min_calls=2)
+    monkeypatch.setattr(
+        backend_main, "tavus_guard", UpstreamGuard(breaker, AIMDLimiter("tavus"))
+    )
+    status = {"code": 400}
+    monkeypatch.setattr(
+        backend_main,
+        "tavus_http_client",
+        httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(status["code"], text="nope")
+            )
+        ),
+    )
+    api = TestClient(backend_main.app)
+
+    api.post("/tavus/conversations", json={"language": "english"})
+    assert breaker.state == CLOSED
+
+    status["code"] = 502
+    api.post("/tavus/conversations", json={"language": "english"})
+    shed = api.post("/tavus/conversations", json={"language": "english"})
+    monkeypatch.undo()
+    backend_main.settings_store.reload()
+
+    assert breaker.state == OPEN
+    assert shed.status_code == 503
+    assert "Retry-After" in shed.headers
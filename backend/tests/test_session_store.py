@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main as backend_main
+from backend.session_store import (
+    InMemorySessionBackend,
+    SQLiteSessionBackend,
+    Turn,
+    build_session_backend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "memory":
+            return InMemorySessionBackend(**kwargs)
+        return SQLiteSessionBackend(str(tmp_path / "sessions.sqlite3"), **kwargs)
+
+    return factory
+
+
+def test_history_is_a_bounded_ring_buffer(make_backend):
+    backend = make_backend(max_turns=3)
+    backend.append("s1", [Turn("user", "uno"), Turn("assistant", "dos")])
+    backend.append("s1", [Turn("user", "tres"), Turn("assistant", "cuatro")])
+
+    assert [turn.content for turn in backend.load("s1")] == ["dos", "tres", "cuatro"]
+    assert backend.load("missing") == []
+    backend.close()
+
+
+def test_sessions_are_evicted_lru_by_total_bytes(make_backend):
+    turn_size = Turn("user", "x" * 100).size
+    backend = make_backend(max_turns=10, max_bytes=turn_size * 2)
+    backend.append("old", [Turn("user", "x" * 100)])
+    backend.append("newer", [Turn("user", "x" * 100)])
+    backend.load("old")  # refresh "old" so "newer" becomes the LRU session
+    backend.append("latest", [Turn("user", "x" * 100)])
+
+    assert backend.load("newer") == []
+    assert len(backend.load("old")) == 1
+    assert len(backend.load("latest")) == 1
+    backend.close()
+
+
+def test_delete_removes_session(make_backend):
+    backend = make_backend()
+    backend.append("s1", [Turn("user", "hola")])
+    assert backend.exists("s1")
+    backend.delete("s1")
+    assert backend.load("s1") == []
+    assert not backend.exists("s1")
+    backend.close()
+
+
+def test_sqlite_backend_uses_wal_and_persists(tmp_path):
+    path = str(tmp_path / "nested" / "sessions.sqlite3")
+    backend = SQLiteSessionBackend(path)
+    backend.append("s1", [Turn("user", "hola")])
+    (mode,) = backend._conn.execute("PRAGMA journal_mode").fetchone()
+    backend.close()
+
+    reopened = SQLiteSessionBackend(path)
+    assert mode == "wal"
+    assert reopened.load("s1") == [Turn("user", "hola")]
+    reopened.close()
+
+
+def test_compact_replaces_summary_and_drops_oldest_turns(make_backend):
+    backend = make_backend(max_turns=10)
+    backend.append("s1", [Turn("user", "uno"), Turn("assistant", "dos")])
+    backend.append("s1", [Turn("user", "tres")])
+
+    backend.compact("s1", "resumen", dropped_turns=2)
+
+    assert backend.load_summary("s1") == "resumen"
+    assert [turn.content for turn in backend.load("s1")] == ["tres"]
+    assert backend.load_summary("missing") == ""
+    backend.close()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        build_session_backend("redis", "", max_turns=1, max_bytes=1)
+
+
+def test_conversation_assembles_history_from_session(monkeypatch):
+    inputs = []
+
+    class FakeResponses:
+        def create(self, **kwargs):
+            inputs.append(kwargs["input"])
+            return SimpleNamespace(output_text=f"respuesta {len(inputs)}")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+    monkeypatch.setattr(backend_main, "session_store", InMemorySessionBackend())
+    api = TestClient(backend_main.app)
+
+    first = api.post(
+        "/conversation", json={"text": "¿vacío o entraña?", "session": True}
+    )
+    session_id = first.json()["session_id"]
+    second = api.post(
+        "/conversation", json={"text": "¿y con qué vino?", "session_id": session_id}
+    )
+
+    assert len(session_id) == 32
+    assert second.json() == {"reply": "respuesta 2", "session_id": session_id}
+    assert inputs[0] == "¿vacío o entraña?"
+    assert inputs[1] == [
+        {"role": "user", "content": "¿vacío o entraña?"},
+        {"role": "assistant", "content": "respuesta 1"},
+        {"role": "user", "content": "¿y con qué vino?"},
+    ]
+
+
+def test_conversation_rejects_invalid_session_id(monkeypatch):
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=SimpleNamespace())
+    )
+    resp = TestClient(backend_main.app).post(
+        "/conversation", json={"text": "hola", "session_id": "x" * 200}
+    )
+    assert resp.status_code == 400
+
+
+def test_conversation_rejects_session_ids_it_did_not_issue(monkeypatch):
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=SimpleNamespace())
+    )
+    monkeypatch.setattr(backend_main, "session_store", InMemorySessionBackend())
+    resp = TestClient(backend_main.app).post(
+        "/conversation", json={"text": "hola", "session_id": "s1"}
+    )
+    assert resp.status_code == 404
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+from backend.settings import SettingsStore, load_settings  # noqa: E402
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    # Force a visible mtime change even on coarse-grained filesystems.
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+
+def test_env_overrides_yaml_and_defaults(tmp_path):
+    settings_file = tmp_path / "settings.yaml"
+    _write(
+        settings_file,
+        "tavus:\n"
+        "  replica_id: yaml-replica\n"
+        "  persona_id: yaml-persona\n"
+        "  participant_absent_timeout: 60\n"
+        "  voice_properties:\n"
+        "    tts_provider: yaml-provider\n"
+        "    tts_voice_id: yaml-voice\n",
+    )
+    environ = {
+        "TAVUS_PERSONA_ID": "env-persona",
+        "TAVUS_TTS_PROVIDER": "cartesia",
+        "TAVUS_VOICE_PROPERTIES_JSON": '{"tts_voice_id": "json-voice"}',
+    }
+
+    tavus = load_settings(str(settings_file), environ=environ).tavus
+
+    assert tavus.replica_id == "yaml-replica"
+    assert tavus.persona_id == "env-persona"
+    assert tavus.language == "spanish"
+    assert tavus.participant_absent_timeout == 60
+    assert dict(tavus.voice_properties) == {
+        "tts_provider": "cartesia",
+        "tts_voice_id": "json-voice",
+    }
+    assert tavus.base_properties["participant_absent_timeout"] == 60
+    assert tavus.config_error is None
+
+
+def test_snapshot_is_immutable(tmp_path):
+    tavus = load_settings(str(tmp_path / "missing.yaml"), environ={}).tavus
+    with pytest.raises(Exception):
+        tavus.replica_id = "other"
+    with pytest.raises(TypeError):
+        tavus.base_properties["language"] = "english"
+
+
+def test_invalid_numeric_env_falls_back_to_the_default(tmp_path, caplog):
+    environ = {"TAVUS_PARTICIPANT_ABSENT_TIMEOUT": "dos minutos"}
+
+    tavus = load_settings(str(tmp_path / "missing.yaml"), environ=environ).tavus
+
+    assert tavus.participant_absent_timeout == 120
+    assert "dos minutos" in caplog.text
+
+
+def test_invalid_voice_json_is_reported_per_request(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_VOICE_PROPERTIES_JSON", "[1, 2]")
+    backend_main.settings_store.reload()
+    try:
+        resp = TestClient(backend_main.app).post("/tavus/conversations", json={})
+        assert resp.status_code == 500
+        assert "TAVUS_VOICE_PROPERTIES_JSON" in resp.json()["detail"]
+    finally:
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+
+def test_nested_voice_properties_reach_tavus_as_plain_json(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv(
+        "TAVUS_VOICE_PROPERTIES_JSON", '{"stability": {"value": 0.5}, "tags": ["a"]}'
+    )
+    backend_main.settings_store.reload()
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={"conversation_id": "conv-1"})
+
+    monkeypatch.setattr(
+        backend_main,
+        "tavus_http_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    try:
+        resp = TestClient(backend_main.app).post("/tavus/conversations", json={})
+    finally:
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+    assert resp.status_code == 200
+    assert sent[0]["properties"]["stability"] == {"value": 0.5}
+    assert sent[0]["properties"]["tags"] == ["a"]
+
+
+def test_reload_keeps_previous_snapshot_when_yaml_is_invalid(tmp_path):
+    settings_file = tmp_path / "settings.yaml"
+    _write(settings_file, "tavus:\n  replica_id: first\n")
+    store = SettingsStore(path=str(settings_file), dotenv_path=None)
+
+    _write(settings_file, "tavus: [not, a, mapping]\n")
+    assert store.reload_if_changed() is False
+    assert store.current.tavus.replica_id == "first"
+
+    _write(settings_file, "tavus:\n  replica_id: second\n")
+    assert store.reload_if_changed() is True
+    assert store.current.tavus.replica_id == "second"
+    assert store.current.version == 1
+    assert store.reload_if_changed() is False
+
+
+def test_sighup_reloads_settings(tmp_path, monkeypatch):
+    settings_file = tmp_path / "settings.yaml"
+    _write(settings_file, "tavus:\n  replica_id: before\n")
+    store = SettingsStore(path=str(settings_file), dotenv_path=None)
+    monkeypatch.setattr(backend_main, "settings_store", store)
+
+    async def run():
+        assert backend_main._install_sighup_reload() is True
+        try:
+            settings_file.write_text(
+                "tavus:\n  replica_id: after\n", encoding="utf-8"
+            )
+            os.kill(os.getpid(), signal.SIGHUP)
+            for _ in range(50):
+                if store.current.tavus.replica_id == "after":
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+
+    asyncio.run(run())
+    assert store.current.tavus.replica_id == "after"
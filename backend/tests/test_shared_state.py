@@ -0,0 +1,41 @@
+import pytest
+
+from backend.shared_state import SQLiteSharedState, build_shared_state
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sqlite_shared_state_expires_and_is_shared_between_connections(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "shared.sqlite3")
+    writer = SQLiteSharedState(path, clock=clock)
+    reader = SQLiteSharedState(path, clock=clock)
+
+    writer.set("answer:a", b"uno", ttl=10)
+
+    assert reader.get("answer:a") == b"uno"
+    clock.now += 10
+    assert reader.get("answer:a") is None
+    writer.set("answer:b", b"dos", ttl=10)
+    writer.delete("answer:b")
+    assert reader.get("answer:b") is None
+    writer.close()
+    reader.close()
+
+
+def test_build_shared_state(tmp_path):
+    assert build_shared_state("memory", path="") is None
+    assert isinstance(
+        build_shared_state("sqlite", path=str(tmp_path / "s.sqlite3")),
+        SQLiteSharedState,
+    )
+    with pytest.raises(ValueError):
+        build_shared_state("redis", path="", url="")
+    with pytest.raises(ValueError):
+        build_shared_state("memcached", path="")
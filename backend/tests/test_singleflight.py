@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from backend import main as backend_main
+from backend.singleflight import SingleFlight
+
+
+def test_identical_calls_share_one_execution():
+    coalesced = []
+    flight = SingleFlight(on_coalesced=lambda: coalesced.append(1))
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "respuesta"
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+        return results, len(flight)
+
+    results, pending = asyncio.run(run())
+
+    assert results == ["respuesta"] * 5
+    assert len(calls) == 1
+    assert len(coalesced) == 4
+    assert pending == 0
+
+
+def test_errors_reach_every_waiter_and_the_key_is_released():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(flight) == 0
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    finished = []
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        finished.append(1)
+        return "ok"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        follower = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "ok"
+    assert finished == [1]
+
+
+def test_concurrent_identical_questions_make_one_openai_call(monkeypatch):
+    calls = []
+
+    class SlowResponses:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            await asyncio.sleep(0.05)
+            return SimpleNamespace(output_text="Malbec")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=SlowResponses())
+    )
+    monkeypatch.setattr(backend_main, "answer_cache", None)
+    monkeypatch.setattr(
+        backend_main,
+        "reply_flight",
+        SingleFlight(on_coalesced=backend_main.OPENAI_COALESCED_REQUESTS.inc),
+    )
+    saved_before = REGISTRY.get_sample_value("openai_coalesced_requests_total")
+
+    async def run():
+        transport = httpx.ASGITransport(app=backend_main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as api:
+            return await asyncio.gather(
+                *(
+                    api.post("/conversation", json={"text": text})
+                    for text in ("¿Qué vino?", "¿qué  vino", "¿QUÉ VINO?")
+                )
+            )
+
+    responses = asyncio.run(run())
+
+    assert [response.json() for response in responses] == [{"reply": "Malbec"}] * 3
+    assert len(calls) == 1
+    assert (
+        REGISTRY.get_sample_value("openai_coalesced_requests_total")
+        == saved_before + 2
+    )
@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from backend import main as backend_main
+from backend.startup import LazyClient, StartupReport, parse_importtime
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+# Holgado para CI; hoy el import tarda ~0.7s (antes ~1.3s con openai/sentry).
+IMPORT_BUDGET_SECONDS = 3.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_import_stays_fast_and_skips_heavy_sdks():
+    script = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        "import backend.main\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started,"
+        " 'modules': [m for m in ('openai', 'sentry_sdk', 'requests')"
+        " if m in sys.modules]}))\n"
+    )
+    env = {**os.environ, "OPENAI_API_KEY": "sk-test"}
+    env.pop("SENTRY_DSN", None)
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["modules"] == []
+    assert report["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_lazy_client_builds_once_on_first_use():
+    clock = FakeClock()
+    report = StartupReport(clock=clock)
+    built = []
+
+    def factory():
+        clock.now += 0.5
+        built.append(True)
+        return type("Client", (), {"responses": "api"})()
+
+    lazy = LazyClient("openai", factory, report=report)
+
+    assert not lazy.initialized and built == []
+    assert lazy.responses == "api"
+    assert hasattr(lazy, "responses")
+    assert built == [True]
+    assert report.steps["openai"] == {"seconds": 0.5, "at": 0.0}
+
+
+def test_debug_startup_reports_phases(monkeypatch):
+    with TestClient(backend_main.app) as api:
+        assert api.get("/debug/startup").status_code == 404
+        monkeypatch.setattr(backend_main, "DEBUG_ENDPOINTS_ENABLED", True)
+        body = api.get("/debug/startup").json()
+
+    assert body["phases"]["import"] <= body["phases"]["started"]
+    assert "lifespan" in body["steps"]
+    assert set(body["heavy_modules_loaded"]) == {"openai", "sentry_sdk", "requests"}
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   json.decoder\n"
+        "import time:       300 |        420 | json\n"
+    )
+
+    assert parse_importtime(stderr) == [
+        ("json.decoder", 120, 120),
+        ("json", 300, 420),
+    ]
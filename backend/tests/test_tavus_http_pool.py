@@ -0,0 +1,99 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+
+
+STUB_DELAY_SECONDS = 0.3
+
+
+class _SlowTavusHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        self.rfile.read(length)
+        time.sleep(STUB_DELAY_SECONDS)
+        body = json.dumps({"conversation_id": "conv-stub"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return None
+
+
+class _StubServer(ThreadingHTTPServer):
+    # The default backlog (5) makes bursts of connects wait for SYN retries.
+    request_queue_size = 64
+
+
+def _start_stub_server():
+    server = _StubServer(("127.0.0.1", 0), _SlowTavusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def test_parallel_tavus_conversations_overlap(monkeypatch):
+    server = _start_stub_server()
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", f"http://127.0.0.1:{server.server_port}")
+    backend_main.settings_store.reload()
+    parallel_requests = 8
+
+    async def run():
+        backend_main.tavus_http_client = backend_main._build_tavus_http_client()
+        transport = httpx.ASGITransport(app=backend_main.app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://backend"
+            ) as api:
+                started = time.perf_counter()
+                responses = await asyncio.gather(
+                    *[
+                        api.post("/tavus/conversations", json={"language": "spanish"})
+                        for _ in range(parallel_requests)
+                    ]
+                )
+                return time.perf_counter() - started, responses
+        finally:
+            await backend_main.tavus_http_client.aclose()
+            backend_main.tavus_http_client = None
+
+    try:
+        elapsed, responses = asyncio.run(run())
+    finally:
+        server.shutdown()
+        server.server_close()
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+    assert [r.status_code for r in responses] == [200] * parallel_requests
+    assert all(r.json()["conversation_id"] == "conv-stub" for r in responses)
+    # Serial execution would take parallel_requests * STUB_DELAY_SECONDS.
+    assert elapsed < STUB_DELAY_SECONDS * 3
+
+
+def test_lifespan_manages_shared_tavus_client(monkeypatch):
+    monkeypatch.setattr(backend_main, "tavus_http_client", None)
+
+    with TestClient(backend_main.app) as test_client:
+        shared = backend_main.tavus_http_client
+        assert shared is not None
+        assert not shared.is_closed
+        assert test_client.get("/health").status_code == 200
+
+    assert shared.is_closed
+    assert backend_main.tavus_http_client is None
@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend.tavus_ladder import (  # noqa: E402
+    FallbackLadderMemory,
+    order_attempts,
+    payload_shape,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_payload_shape_uses_language_and_voice_keys():
+    payload = {
+        "properties": {
+            "language": "English",
+            "cartesia_voice_id": "v1",
+            "tts_provider": "cartesia",
+            "participant_left_timeout": 0,
+        }
+    }
+    assert payload_shape(payload) == ("english", ("cartesia_voice_id", "tts_provider"))
+
+
+def test_memory_returns_learned_label_until_reprobe_is_due():
+    clock = FakeClock()
+    memory = FallbackLadderMemory(ttl=100, reprobe_interval=10, clock=clock)
+    key = ("english", ())
+    memory.record_success(key, "fallback spanish")
+
+    clock.now = 5
+    assert memory.preferred_label(key) == "fallback spanish"
+
+    clock.now = 11
+    # One request re-probes the primary; the next ones keep the shortcut.
+    assert memory.preferred_label(key) is None
+    assert memory.preferred_label(key) == "fallback spanish"
+
+
+def test_memory_entries_expire_after_ttl():
+    clock = FakeClock()
+    memory = FallbackLadderMemory(ttl=30, reprobe_interval=1000, clock=clock)
+    key = ("english", ())
+    memory.record_success(key, "fallback spanish")
+
+    clock.now = 31
+    assert memory.preferred_label(key) is None
+    assert len(memory) == 0
+
+
+def test_primary_success_forgets_the_shortcut():
+    memory = FallbackLadderMemory()
+    key = ("english", ())
+    memory.record_success(key, "fallback spanish")
+    memory.record_success(key, "primary")
+    assert memory.preferred_label(key) is None
+
+
+def test_memory_is_bounded_with_lru_eviction():
+    memory = FallbackLadderMemory(max_entries=2)
+    memory.record_success(("a", ()), "fallback spanish")
+    memory.record_success(("b", ()), "fallback spanish")
+    memory.preferred_label(("a", ()))
+    memory.record_success(("c", ()), "fallback spanish")
+
+    assert len(memory) == 2
+    assert memory.preferred_label(("b", ())) is None
+    assert memory.preferred_label(("a", ())) == "fallback spanish"
+
+
+def test_order_attempts_moves_preferred_variant_first():
+    attempts = [({}, "primary"), ({}, "fallback spanish"), ({}, "fallback x")]
+    labels = [label for _, label in order_attempts(attempts, "fallback spanish")]
+    assert labels == ["fallback spanish", "primary", "fallback x"]
+    assert order_attempts(attempts, None) == attempts
+    assert order_attempts(attempts, "unknown") == attempts
@@ -0,0 +1,172 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main as backend_main
+from backend.tracing import (
+    NOOP_SPAN,
+    BatchSpanExporter,
+    InMemorySpanExporter,
+    JsonlSpanExporter,
+    Tracer,
+    build_tracer,
+)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(backend_main, "tracer", Tracer(exporter, sample_rate=1.0))
+    return exporter
+
+
+def test_tavus_request_has_one_child_span_per_ladder_attempt(monkeypatch, exporter):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://tavus.example")
+    backend_main.settings_store.reload()
+    monkeypatch.setattr(
+        backend_main, "tavus_ladder_memory", backend_main.FallbackLadderMemory()
+    )
+
+    def handler(request):
+        if json.loads(request.content)["properties"]["language"] == "spanish":
+            return httpx.Response(200, json={"conversation_id": "c1"})
+        return httpx.Response(400, text="invalid language")
+
+    monkeypatch.setattr(
+        backend_main,
+        "tavus_http_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    resp = TestClient(backend_main.app).post(
+        "/tavus/conversations", json={"language": "english"}
+    )
+    monkeypatch.undo()
+    backend_main.settings_store.reload()
+
+    assert resp.status_code == 200
+    spans = {span.name: span for span in exporter.spans}
+    root = spans["POST /tavus/conversations"]
+    assert root.parent_id is None
+    assert root.attributes["http.status_code"] == 200
+    assert root.attributes["http.response_bytes"] == len(resp.content)
+    attempts = [span for span in exporter.spans if span.name == "tavus.attempt"]
+    assert [span.attributes["attempt"] for span in attempts] == [
+        "primary",
+        "fallback spanish",
+    ]
+    assert [span.attributes["http.status_code"] for span in attempts] == [400, 200]
+    assert all(span.parent_id == root.span_id for span in attempts)
+    assert all(span.attributes["request_bytes"] > 0 for span in attempts)
+    assert spans["tavus.parse_json"].parent_id == attempts[1].span_id
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+
+
+def test_openai_call_is_traced_with_byte_sizes(monkeypatch, exporter):
+    class FakeResponses:
+        def create(self, **kwargs):
+            return SimpleNamespace(output_text="un Malbec")
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(responses=FakeResponses())
+    )
+
+    TestClient(backend_main.app).post("/conversation", json={"text": "¿vino?"})
+
+    (child,) = [span for span in exporter.spans if span.name == "openai.request"]
+    assert child.attributes["attempt"] == "responses"
+    assert child.attributes["response_bytes"] == len("un Malbec".encode())
+    assert child.attributes["request_bytes"] > 0
+
+
+def test_failed_span_records_error_and_status_code():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter)
+
+    with pytest.raises(RuntimeError):
+        with tracer.start_trace("root"):
+            with tracer.span("child"):
+                error = RuntimeError("boom")
+                error.status_code = 503
+                raise error
+
+    child, root = exporter.spans
+    assert child.status == "error"
+    assert child.attributes["http.status_code"] == 503
+    assert root.status == "error"
+
+
+def test_unsampled_requests_record_nothing():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+
+    with tracer.start_trace("root") as root:
+        with tracer.span("child") as child:
+            pass
+
+    assert root is NOOP_SPAN and child is NOOP_SPAN
+    assert exporter.spans == []
+
+
+def test_jsonl_exporter_writes_one_line_per_span(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = build_tracer("jsonl", str(path), sample_rate=1.0)
+    assert isinstance(tracer.exporter, BatchSpanExporter)
+    assert isinstance(tracer.exporter.exporter, JsonlSpanExporter)
+
+    with tracer.start_trace("root", route="/x"):
+        with tracer.span("child"):
+            pass
+    tracer.shutdown()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["name"] for record in records] == ["child", "root"]
+    assert records[0]["parent_id"] == records[1]["span_id"]
+    assert records[1]["attributes"] == {"route": "/x"}
+    assert records[1]["duration"] >= 0
+
+
+def test_batch_exporter_writes_off_the_calling_thread():
+    threads = []
+
+    class RecordingExporter(InMemorySpanExporter):
+        def export(self, spans):
+            threads.append(threading.current_thread())
+            super().export(spans)
+
+    inner = RecordingExporter()
+    tracer = Tracer(BatchSpanExporter(inner), sample_rate=1.0)
+    with tracer.start_trace("root"):
+        pass
+    tracer.shutdown()
+
+    assert [span.name for span in inner.spans] == ["root"]
+    assert threads and threading.current_thread() not in threads
+
+
+def test_jsonl_exporter_rotates_at_max_bytes(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = build_tracer("jsonl", str(path), sample_rate=1.0, max_bytes=400)
+    for index in range(10):
+        with tracer.start_trace(f"root-{index}"):
+            pass
+    tracer.shutdown()
+
+    rotated = tmp_path / "spans.jsonl.1"
+    assert rotated.exists()
+    assert path.stat().st_size <= 400
+    names = [
+        json.loads(line)["name"]
+        for line in rotated.read_text().splitlines() + path.read_text().splitlines()
+    ]
+    assert names[-1] == "root-9"
+
+
+def test_unknown_exporter_is_rejected():
+    with pytest.raises(ValueError):
+        build_tracer("zipkin", "", sample_rate=1.0)
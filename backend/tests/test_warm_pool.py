@@ -0,0 +1,249 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+from backend.conversation_lifecycle import ConversationLifecycle  # noqa: E402
+from backend.warm_pool import PoolProfile, TavusWarmPool  # noqa: E402
+
+
+PROFILE = PoolProfile(replica_id="r1", persona_id="p1", language="spanish")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _counter_create():
+    created = []
+
+    async def create(profile):
+        created.append(profile)
+        return {"conversation_id": f"conv-{len(created)}"}
+
+    return create, created
+
+
+def test_refill_tops_up_each_profile_and_take_hands_out_fifo():
+    create, created = _counter_create()
+    pool = TavusWarmPool(create=create, profiles=[PROFILE], size=2, max_age=60)
+
+    async def run():
+        await pool.refill_once()
+        first = pool.take(PROFILE)
+        await pool.refill_once()
+        return first
+
+    first = asyncio.run(run())
+    assert first == {"conversation_id": "conv-1"}
+    assert len(created) == 3
+    assert pool.ready_count(PROFILE) == 2
+    assert pool.take(PoolProfile("other", "p1", "spanish")) is None
+
+
+def test_expired_conversations_are_discarded_not_served():
+    clock = FakeClock()
+    create, _ = _counter_create()
+    discarded = []
+
+    async def discard(conversation):
+        discarded.append(conversation["conversation_id"])
+
+    pool = TavusWarmPool(
+        create=create,
+        discard=discard,
+        profiles=[PROFILE],
+        size=1,
+        max_age=30,
+        clock=clock,
+    )
+
+    async def run():
+        await pool.refill_once()
+        clock.now = 31
+        result = pool.take(PROFILE)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) is None
+    assert discarded == ["conv-1"]
+
+
+def test_settings_version_change_invalidates_pool():
+    version = {"value": 1}
+    create, _ = _counter_create()
+    pool = TavusWarmPool(
+        create=create,
+        profiles=[PROFILE],
+        size=1,
+        max_age=60,
+        settings_version=lambda: version["value"],
+    )
+
+    asyncio.run(pool.refill_once())
+    version["value"] = 2
+    assert pool.take(PROFILE) is None
+
+
+def test_failed_refill_backs_off():
+    clock = FakeClock()
+    attempts = []
+
+    async def failing_create(profile):
+        attempts.append(clock.now)
+        raise RuntimeError("tavus down")
+
+    pool = TavusWarmPool(
+        create=failing_create, profiles=[PROFILE], size=2, max_age=60, clock=clock
+    )
+
+    async def run():
+        await pool.refill_once()
+        await pool.refill_once()  # still inside the backoff window
+        clock.now = 5
+        await pool.refill_once()
+
+    asyncio.run(run())
+    assert attempts == [0.0, 5]
+    assert pool.ready_count(PROFILE) == 0
+
+
+def test_close_discards_every_ready_conversation():
+    create, _ = _counter_create()
+    discarded = []
+
+    async def discard(conversation):
+        discarded.append(conversation["conversation_id"])
+
+    pool = TavusWarmPool(
+        create=create, discard=discard, profiles=[PROFILE], size=2, max_age=60
+    )
+
+    async def run():
+        await pool.refill_once()
+        await pool.close()
+
+    asyncio.run(run())
+    assert discarded == ["conv-1", "conv-2"]
+    assert pool.ready_count(PROFILE) == 0
+
+
+def test_pooled_conversations_hold_quota_slots(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    backend_main.settings_store.reload()
+    tavus = backend_main.settings_store.current.tavus
+    profile = PoolProfile(tavus.replica_id, tavus.persona_id, "spanish")
+    lifecycle = ConversationLifecycle(max_active=1)
+    monkeypatch.setattr(backend_main, "conversation_lifecycle", lifecycle)
+    ended = []
+
+    def handler(request):
+        if request.url.path.endswith("/end"):
+            ended.append(request.url.path)
+            return httpx.Response(200, json={})
+        return httpx.Response(200, json={"conversation_id": "conv-pooled"})
+
+    monkeypatch.setattr(
+        backend_main,
+        "tavus_http_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    pool = TavusWarmPool(
+        create=backend_main._create_pooled_tavus_conversation,
+        discard=backend_main._discard_pooled_tavus_conversation,
+        profiles=[profile],
+        size=2,
+        max_age=60,
+    )
+
+    try:
+        asyncio.run(pool.refill_once())
+        # El segundo refill no entra en la cuota.
+        assert pool.ready_count(profile) == 1
+        assert lifecycle.stats["used"] == 1
+        monkeypatch.setattr(backend_main, "tavus_warm_pool", pool)
+
+        api = TestClient(backend_main.app)
+        pooled = api.post("/tavus/conversations", json={"language": "spanish"})
+        queued = api.post("/tavus/conversations", json={"language": "spanish"})
+    finally:
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+    assert pooled.json()["conversation_id"] == "conv-pooled"
+    assert pooled.json()["control_token"]
+    assert queued.status_code == 202
+    assert lifecycle.stats["used"] == 1
+    assert ended == []
+
+
+def test_endpoint_serves_matching_requests_from_the_pool(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    backend_main.settings_store.reload()
+    tavus = backend_main.settings_store.current.tavus
+    profile = PoolProfile(tavus.replica_id, tavus.persona_id, "spanish")
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, json={"conversation_id": "conv-direct"})
+
+    monkeypatch.setattr(
+        backend_main,
+        "tavus_http_client",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    async def create(requested_profile):
+        return {"conversation_id": "conv-pooled"}
+
+    pool = TavusWarmPool(create=create, profiles=[profile], size=1, max_age=60)
+    asyncio.run(pool.refill_once())
+    monkeypatch.setattr(backend_main, "tavus_warm_pool", pool)
+
+    try:
+        api = TestClient(backend_main.app)
+        pooled = api.post("/tavus/conversations", json={"language": "spanish"})
+        custom = api.post(
+            "/tavus/conversations", json={"custom_greeting": "¡Buenas!"}
+        )
+    finally:
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+    assert pooled.json() == {"conversation_id": "conv-pooled"}
+    assert custom.json()["conversation_id"] == "conv-direct"
+    assert len(calls) == 1
+    assert calls[0]["custom_greeting"] == "¡Buenas!"
+
+
+def test_warm_pool_is_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("TAVUS_WARM_POOL_SIZE", raising=False)
+    assert backend_main._build_tavus_warm_pool() is None
+
+
+def test_warm_pool_built_from_env(monkeypatch):
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_WARM_POOL_SIZE", "3")
+    backend_main.settings_store.reload()
+    try:
+        pool = backend_main._build_tavus_warm_pool()
+    finally:
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+    assert pool is not None
+    assert pool.size == 3
+    assert pool.max_age == 90
+    assert len(pool.profiles) == 1
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from backend import main as backend_main
+from backend.warmup import WarmUp
+
+
+def test_warm_up_runs_steps_concurrently_and_tolerates_failures():
+    warmup = WarmUp(timeout=0.05)
+
+    async def ok():
+        await asyncio.sleep(0.01)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def broken():
+        raise ConnectionError("dns")
+
+    started = time.perf_counter()
+    asyncio.run(warmup.run({"ok": ok, "slow": slow, "broken": broken}))
+
+    assert time.perf_counter() - started < 0.5
+    assert warmup.ready
+    assert warmup.results == {"ok": "ok", "slow": "timeout", "broken": "error"}
+    assert REGISTRY.get_sample_value(
+        "warmup_steps_total", {"step": "slow", "result": "timeout"}
+    ) >= 1
+    assert REGISTRY.get_sample_value(
+        "warmup_duration_seconds", {"step": "total"}
+    ) > 0
+
+
+def test_ready_waits_for_warm_up_while_health_stays_live(monkeypatch):
+    monkeypatch.setattr(backend_main, "WARMUP_ENABLED", True)
+    monkeypatch.setenv("TAVUS_API_KEY", "test-key")
+    monkeypatch.setenv("TAVUS_API_URL", "https://tavus.test")
+    backend_main.settings_store.reload()
+    release = asyncio.Event()
+    seen = []
+
+    class FakeModels:
+        async def retrieve(self, model):
+            seen.append(("openai", model))
+            await release.wait()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(("tavus", str(request.url)))
+        return httpx.Response(200, json={"data": []})
+
+    monkeypatch.setattr(
+        backend_main, "client", SimpleNamespace(models=FakeModels())
+    )
+    monkeypatch.setattr(
+        backend_main,
+        "_build_tavus_http_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    try:
+        with TestClient(backend_main.app) as api:
+            assert api.get("/health").status_code == 200
+            warming = api.get("/ready")
+            api.portal.call(release.set)
+            deadline = time.monotonic() + 5
+            ready = api.get("/ready")
+            while ready.status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.01)
+                ready = api.get("/ready")
+    finally:
+        monkeypatch.undo()
+        backend_main.settings_store.reload()
+
+    assert warming.status_code == 503
+    assert warming.headers["Retry-After"] == "1"
+    assert ready.json() == {
+        "status": "ready",
+        "ready": True,
+        "steps": {"openai": "ok", "tavus": "ok"},
+    }
+    assert ("openai", backend_main.OPENAI_CHAT_MODEL) in seen
+    assert ("tavus", "https://tavus.test/v2/conversations?limit=1") in seen
+
+
+def test_ready_is_503_without_lifespan(monkeypatch):
+    monkeypatch.setattr(backend_main, "warmup", None)
+
+    resp = TestClient(backend_main.app).get("/ready")
+
+    assert resp.status_code == 503
+    assert resp.json() == {"status": "warming_up"}
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+repo_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(repo_root))
+
+from backend import main as backend_main  # noqa: E402
+from backend import webhooks  # noqa: E402
+from backend.webhooks import (  # noqa: E402
+    InvalidWebhook,
+    SQLiteEventStore,
+    WebhookEvent,
+    WebhookIngestor,
+)
+
+
+def _event(conversation_id="c1", event_type="system.replica_joined", at=1.0):
+    return WebhookEvent(
+        at,
+        conversation_id,
+        event_type,
+        {"conversation_id": conversation_id, "event_type": event_type},
+    )
+
+
+def test_parse_requires_conversation_and_event_type():
+    event = WebhookEvent.parse(
+        {"conversation_id": "c1", "event_type": "system.shutdown", "x": 1}, 5.0
+    )
+    assert event.payload["x"] == 1
+    for body in ([], {"conversation_id": "c1"}, {"event_type": "e", "x": 1}):
+        with pytest.raises(InvalidWebhook):
+            WebhookEvent.parse(body, 0.0)
+
+
+def test_writer_batches_events_in_order(tmp_path):
+    store = SQLiteEventStore(str(tmp_path / "events.sqlite3"))
+    writes = []
+    original_write = store.write
+
+    def recording_write(events):
+        writes.append(len(events))
+        original_write(events)
+
+    store.write = recording_write
+    ingestor = WebhookIngestor(store, batch_size=2, flush_interval=0.01)
+
+    async def run():
+        for index in range(5):
+            assert ingestor.submit(_event(f"c{index}"))
+        writer = asyncio.create_task(ingestor.run())
+        while ingestor.depth or sum(writes) < 5:
+            await asyncio.sleep(0.01)
+        writer.cancel()
+
+    asyncio.run(run())
+    assert writes == [2, 2, 1]
+    assert [event.conversation_id for event in store.iter_events()] == [
+        "c0", "c1", "c2", "c3", "c4"
+    ]
+    store.close()
+
+
+def test_full_queue_rejects_and_drain_keeps_acknowledged_events(tmp_path):
+    store = SQLiteEventStore(str(tmp_path / "events.sqlite3"))
+    ingestor = WebhookIngestor(store, max_queue=2, batch_size=10)
+
+    assert ingestor.submit(_event("c1"))
+    assert ingestor.submit(_event("c2"))
+    assert not ingestor.submit(_event("c3"))
+
+    ingestor.drain()
+    assert [event.conversation_id for event in store.iter_events()] == ["c1", "c2"]
+    store.close()
+
+
+def test_replay_tool_prints_filtered_events_as_json_lines(tmp_path, capsys):
+    path = str(tmp_path / "events.sqlite3")
+    store = SQLiteEventStore(path)
+    store.write(
+        [
+            _event("c1", at=1.0),
+            _event("c2", "system.shutdown", at=2.0),
+            _event("c1", "system.shutdown", at=3.0),
+        ]
+    )
+    store.close()
+
+    assert webhooks.main(["--db", path, "--event-type", "system.shutdown"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["conversation_id"] for line in lines] == ["c2", "c1"]
+
+    assert webhooks.main(["--db", path, "--conversation-id", "c1", "--since", "2"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 1
+
+
+def test_webhook_endpoint_acknowledges_and_stores_events(monkeypatch, tmp_path):
+    path = str(tmp_path / "events.sqlite3")
+    monkeypatch.setenv("TAVUS_WEBHOOK_PATH", path)
+    monkeypatch.setenv("TAVUS_WEBHOOK_FLUSH_INTERVAL", "0.01")
+    monkeypatch.setattr(backend_main, "TAVUS_WEBHOOK_TOKEN", "secret")
+    monkeypatch.setattr(backend_main, "TAVUS_WEBHOOK_MAX_BYTES", 1024)
+    lifecycle = backend_main.conversation_lifecycle
+    lifecycle.activate(lifecycle.acquire(), "conv-1")
+    lifecycle.activate(lifecycle.acquire(), "conv-2")
+
+    with TestClient(backend_main.app) as client:
+        url = "/tavus/webhooks?token=secret"
+        joined = client.post(
+            url,
+            json={"conversation_id": "conv-1", "event_type": "system.replica_joined"},
+        )
+        shutdown = client.post(
+            url, json={"conversation_id": "conv-1", "event_type": "system.shutdown"}
+        )
+        foreign = client.post(
+            url, json={"conversation_id": "other", "event_type": "system.shutdown"}
+        )
+        too_large = client.post(
+            url,
+            json={
+                "conversation_id": "conv-2",
+                "event_type": "system.shutdown",
+                "padding": "x" * 2048,
+            },
+        )
+        invalid = client.post(url, json={"event_type": "system.shutdown"})
+        unauthorized = client.post(
+            "/tavus/webhooks?token=nope",
+            json={"conversation_id": "conv-1", "event_type": "system.shutdown"},
+        )
+
+    assert joined.status_code == 202
+    assert joined.json() == {"status": "accepted"}
+    assert shutdown.status_code == 202
+    assert foreign.status_code == 202
+    assert too_large.status_code == 413
+    assert invalid.status_code == 400
+    assert unauthorized.status_code == 401
+    # system.shutdown libera sólo el slot de conv-1.
+    assert lifecycle.stats["used"] == 1
+
+    store = SQLiteEventStore(path)
+    assert [event.event_type for event in store.iter_events()] == [
+        "system.replica_joined",
+        "system.shutdown",
+        "system.shutdown",
+    ]
+    store.close()
+
+
+def test_webhook_endpoint_refuses_events_without_a_configured_token(
+    monkeypatch, tmp_path
+):
+    monkeypatch.setenv("TAVUS_WEBHOOK_PATH", str(tmp_path / "events.sqlite3"))
+    monkeypatch.setattr(backend_main, "TAVUS_WEBHOOK_TOKEN", "")
+    lifecycle = backend_main.conversation_lifecycle
+    lifecycle.activate(lifecycle.acquire(), "conv-1")
+
+    with TestClient(backend_main.app) as client:
+        response = client.post(
+            "/tavus/webhooks",
+            json={"conversation_id": "conv-1", "event_type": "system.shutdown"},
+        )
+
+    assert response.status_code == 503
+    assert lifecycle.stats["used"] == 1
@@ -0,0 +1,342 @@
+"""Lightweight span tracing for requests and their upstream calls.
+
+Each sampled HTTP request gets a root span; upstream attempts (every rung of
+the Tavus fallback ladder, every OpenAI call) become child spans. Sampling is
+decided once per request (head sampling), so unsampled requests only pay for
+a random number and a context-variable lookup. Finished traces are handed to
+a pluggable exporter as one batch; the JSONL exporter writes from a
+background thread and rotates its file at ``max_bytes``.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from backend.http_metrics import route_template
+from backend.metrics import TRACING_SPANS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_time: float
+    end_time: float | None = None
+    status: str = "ok"
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float | None:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned for unsampled requests; accepts and drops attributes."""
+
+    def set_attribute(self, key: str, value) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class InMemorySpanExporter:
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def shutdown(self) -> None:
+        return None
+
+
+class JsonlSpanExporter:
+    """Appends one JSON object per span to ``path``.
+
+    Once the file would pass ``max_bytes`` it is renamed to ``path + ".1"``
+    (replacing the previous one) and a new file is started, so at most about
+    twice ``max_bytes`` stay on disk. ``max_bytes=0`` never rotates.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        lines = [
+            json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans
+        ]
+        with self._lock:
+            for line in lines:
+                size = self._file.tell()
+                if size and 0 < self.max_bytes < size + len(line.encode()):
+                    self._rotate()
+                self._file.write(line)
+            self._file.flush()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        os.replace(self.path, self.path + ".1")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_STOP = object()
+
+
+class BatchSpanExporter:
+    """Hands spans to ``exporter`` from a background thread.
+
+    ``export`` only enqueues, so the thread that ends a span (usually the
+    event loop) never does I/O. At most ``max_queue`` spans wait; beyond
+    that new spans are dropped and counted in ``tracing_spans_dropped``.
+    """
+
+    def __init__(
+        self, exporter: SpanExporter, max_queue: int = 2048, batch_size: int = 256
+    ):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def export(self, spans: list[Span]) -> None:
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                TRACING_SPANS_DROPPED.inc()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception:
+                    TRACING_SPANS_DROPPED.inc(len(batch))
+                    logger.warning("No se pudieron exportar %d spans", len(batch))
+            if stop:
+                return
+
+    def shutdown(self) -> None:
+        """Write what is still queued, then shut the wrapped exporter down."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self.exporter.shutdown()
+
+
+@dataclass
+class _Trace:
+    trace_id: str
+    spans: list[Span] = field(default_factory=list)
+
+
+_current_trace: contextvars.ContextVar[_Trace | None] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Tracer:
+    def __init__(
+        self, exporter: SpanExporter | None = None, sample_rate: float = 1.0
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and self.sample_rate > 0
+
+    def _should_sample(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes):
+        """Root span for one request; the sampling decision is taken here."""
+        if not self.enabled or not self._should_sample():
+            yield NOOP_SPAN
+            return
+        trace = _Trace(trace_id=_new_id(128))
+        trace_token = _current_trace.set(trace)
+        try:
+            with self._span(trace, name, attributes) as span:
+                yield span
+        finally:
+            _current_trace.reset(trace_token)
+            self.exporter.export(trace.spans)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Child span of the current request; no-op when it is not sampled."""
+        trace = _current_trace.get()
+        if trace is None:
+            yield NOOP_SPAN
+            return
+        with self._span(trace, name, attributes) as span:
+            yield span
+
+    @contextmanager
+    def _span(self, trace: _Trace, name: str, attributes: dict):
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=trace.trace_id,
+            span_id=_new_id(64),
+            parent_id=parent.span_id if parent is not None else None,
+            start_time=time.time(),
+            attributes=attributes,
+        )
+        started = time.perf_counter()
+        span_token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.status = "error"
+            span.set_attribute("error.type", type(exc).__name__)
+            status_code = getattr(exc, "status_code", None)
+            if status_code is not None:
+                span.set_attribute("http.status_code", status_code)
+            raise
+        finally:
+            _current_span.reset(span_token)
+            span.end_time = span.start_time + (time.perf_counter() - started)
+            trace.spans.append(span)
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def build_tracer(
+    kind: str, path: str, sample_rate: float, max_bytes: int = 0
+) -> Tracer:
+    if kind in ("", "none"):
+        return Tracer(None, sample_rate)
+    if kind == "memory":
+        return Tracer(InMemorySpanExporter(), sample_rate)
+    if kind == "jsonl":
+        return Tracer(
+            BatchSpanExporter(JsonlSpanExporter(path, max_bytes)), sample_rate
+        )
+    raise ValueError(f"Unknown tracing exporter: {kind}")
+
+
+class TracingMiddleware:
+    """Opens the root span of every sampled HTTP request.
+
+    ``get_tracer`` is called per request so the tracer can be swapped at
+    runtime (and in tests).
+    """
+
+    def __init__(self, app, get_tracer):
+        self.app = app
+        self.get_tracer = get_tracer
+
+    async def __call__(self, scope, receive, send):
+        tracer = self.get_tracer()
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        request_bytes = 0
+        response_bytes = 0
+
+        async def receive_counting():
+            nonlocal request_bytes
+            message = await receive()
+            request_bytes += len(message.get("body", b""))
+            return message
+
+        with tracer.start_trace(f"{scope['method']} request") as span:
+            if span is NOOP_SPAN:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_recording(message):
+                nonlocal response_bytes
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                elif message["type"] == "http.response.body":
+                    response_bytes += len(message.get("body", b""))
+                await send(message)
+
+            span.set_attribute("http.method", scope["method"])
+            try:
+                await self.app(scope, receive_counting, send_recording)
+            finally:
+                route = route_template(scope)
+                span.name = f"{scope['method']} {route}"
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.request_bytes", request_bytes)
+                span.set_attribute("http.response_bytes", response_bytes)
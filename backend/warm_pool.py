@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable
+
+from backend.metrics import (
+    TAVUS_WARM_POOL_READY,
+    TAVUS_WARM_POOL_REFILL_SECONDS,
+    TAVUS_WARM_POOL_REQUESTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolProfile:
+    replica_id: str
+    persona_id: str
+    language: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.replica_id}/{self.persona_id}/{self.language}"
+
+
+@dataclass
+class _PooledConversation:
+    conversation: dict
+    created_at: float
+    settings_version: int
+
+
+class TavusWarmPool:
+    """Keeps ``size`` ready Tavus conversations per profile.
+
+    ``create`` builds one conversation for a profile. Conversations older than
+    ``max_age`` (or created under an older settings version) are dropped and
+    handed to ``discard`` so they can be ended before Tavus times them out.
+    Failed refills back off exponentially per profile up to ``max_backoff``.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[PoolProfile], Awaitable[dict]],
+        profiles: Iterable[PoolProfile],
+        size: int,
+        max_age: float,
+        settings_version: Callable[[], int] = lambda: 0,
+        discard: Callable[[dict], Awaitable[None]] | None = None,
+        refill_interval: float = 5.0,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.size = size
+        self.max_age = max_age
+        self.refill_interval = refill_interval
+        self.max_backoff = max_backoff
+        self._create = create
+        self._discard = discard
+        self._settings_version = settings_version
+        self._clock = clock
+        self._pools: dict[PoolProfile, deque[_PooledConversation]] = {
+            profile: deque() for profile in profiles
+        }
+        self._failures: dict[PoolProfile, int] = {}
+        self._retry_at: dict[PoolProfile, float] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._discard_tasks: set[asyncio.Future] = set()
+
+    @property
+    def profiles(self) -> list[PoolProfile]:
+        return list(self._pools)
+
+    def ready_count(self, profile: PoolProfile) -> int:
+        return len(self._pools.get(profile, ()))
+
+    def _is_fresh(self, item: _PooledConversation, now: float) -> bool:
+        return (
+            now - item.created_at < self.max_age
+            and item.settings_version == self._settings_version()
+        )
+
+    def take(self, profile: PoolProfile) -> dict | None:
+        """Pop a ready conversation for ``profile`` or return ``None``."""
+        pool = self._pools.get(profile)
+        if pool is None:
+            return None
+        now = self._clock()
+        conversation = None
+        while pool:
+            item = pool.popleft()
+            if self._is_fresh(item, now):
+                conversation = item.conversation
+                break
+            self._schedule_discard(item)
+        TAVUS_WARM_POOL_REQUESTS.labels(
+            result="hit" if conversation is not None else "miss"
+        ).inc()
+        TAVUS_WARM_POOL_READY.labels(profile=profile.label).set(len(pool))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return conversation
+
+    def _schedule_discard(self, item: _PooledConversation) -> None:
+        if self._discard is None:
+            return
+        task = asyncio.ensure_future(self._discard_safely(item.conversation))
+        self._discard_tasks.add(task)
+        task.add_done_callback(self._discard_tasks.discard)
+
+    async def _discard_safely(self, conversation: dict) -> None:
+        try:
+            await self._discard(conversation)
+        except Exception:
+            logger.warning("No se pudo finalizar conversación vencida del pool")
+
+    def _purge_expired(self, now: float) -> None:
+        for pool in self._pools.values():
+            fresh = []
+            for item in pool:
+                if self._is_fresh(item, now):
+                    fresh.append(item)
+                else:
+                    self._schedule_discard(item)
+            pool.clear()
+            pool.extend(fresh)
+
+    def _backoff(self, failures: int) -> float:
+        delay = min(self.max_backoff, 2 ** (failures - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def refill_once(self) -> None:
+        """Drop expired entries and top up every profile once."""
+        now = self._clock()
+        self._purge_expired(now)
+        for profile, pool in self._pools.items():
+            if now < self._retry_at.get(profile, 0.0):
+                continue
+            while len(pool) < self.size:
+                started = time.perf_counter()
+                version = self._settings_version()
+                try:
+                    conversation = await self._create(profile)
+                except Exception:
+                    failures = self._failures.get(profile, 0) + 1
+                    self._failures[profile] = failures
+                    delay = self._backoff(failures)
+                    self._retry_at[profile] = self._clock() + delay
+                    logger.warning(
+                        "Falló el refill del pool Tavus (%s), reintento en %.1fs",
+                        profile.label,
+                        delay,
+                    )
+                    break
+                TAVUS_WARM_POOL_REFILL_SECONDS.observe(time.perf_counter() - started)
+                self._failures.pop(profile, None)
+                self._retry_at.pop(profile, None)
+                pool.append(
+                    _PooledConversation(
+                        conversation=conversation,
+                        created_at=self._clock(),
+                        settings_version=version,
+                    )
+                )
+            TAVUS_WARM_POOL_READY.labels(profile=profile.label).set(len(pool))
+
+    async def close(self) -> None:
+        """Discard every ready conversation; call once ``run`` has stopped."""
+        for profile, pool in self._pools.items():
+            while pool:
+                self._schedule_discard(pool.popleft())
+            TAVUS_WARM_POOL_READY.labels(profile=profile.label).set(0)
+        if self._discard_tasks:
+            await asyncio.gather(*self._discard_tasks, return_exceptions=True)
+
+    async def run(self) -> None:
+        """Background loop: refill, then sleep until a take or the interval."""
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            await self.refill_once()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
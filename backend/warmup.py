@@ -0,0 +1,54 @@
+"""Startup warm-up and readiness.
+
+Right after a restart the first users would otherwise pay for DNS, TLS
+handshakes and lazy client construction. ``WarmUp`` runs named async steps
+concurrently (each bounded by ``timeout``) and flips ``ready`` once all of
+them finished, whatever their outcome: a slow or failing upstream is the
+circuit breakers' job, not a reason to keep the worker out of rotation.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from backend.metrics import WARMUP_DURATION, WARMUP_STEPS
+from backend.startup import STARTUP, StartupReport
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    def __init__(self, timeout: float = 10.0, report: StartupReport = STARTUP):
+        self.timeout = timeout
+        self.ready = False
+        self.results: dict[str, str] = {}
+        self._report = report
+
+    async def run(self, steps: dict[str, Callable[[], Awaitable]]) -> None:
+        started = time.perf_counter()
+        with self._report.measure("warmup"):
+            await asyncio.gather(
+                *(self._run_step(name, step) for name, step in steps.items())
+            )
+        WARMUP_DURATION.labels(step="total").set(time.perf_counter() - started)
+        self.ready = True
+        self._report.mark("warm")
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), self.timeout)
+            result = "ok"
+        except asyncio.TimeoutError:
+            logger.warning("Warm-up %s superó %.1fs", name, self.timeout)
+            result = "timeout"
+        except Exception as exc:
+            logger.warning("Warm-up %s falló: %s", name, exc)
+            result = "error"
+        self.results[name] = result
+        WARMUP_DURATION.labels(step=name).set(time.perf_counter() - started)
+        WARMUP_STEPS.labels(step=name, result=result).inc()
+
+    def as_dict(self) -> dict:
+        return {"ready": self.ready, "steps": dict(self.results)}
@@ -0,0 +1,280 @@
+"""Ingestion of Tavus conversation callbacks.
+
+Tavus posts conversation events (``system.replica_joined``,
+``system.shutdown``, ``application.transcription_ready``, ...) to the
+``callback_url`` of each conversation. ``POST /tavus/webhooks`` validates
+the event and hands it to ``WebhookIngestor.submit``, which only appends to
+a bounded in-process queue so the callback is acknowledged right away. A
+background writer drains the queue in batches (``batch_size`` events or
+every ``flush_interval`` seconds, whichever comes first) into a WAL-mode
+SQLite file, one transaction per batch.
+
+When the queue is full the endpoint answers 503 with ``Retry-After`` and
+Tavus retries later; ``tavus_webhook_events_total{result="rejected"}`` and
+``tavus_webhook_queue_depth`` show that backpressure.
+
+``python -m backend.webhooks`` prints stored events as JSON lines or
+replays them against a webhook URL.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+from backend.metrics import (
+    TAVUS_WEBHOOK_BATCH_SIZE,
+    TAVUS_WEBHOOK_EVENTS,
+    TAVUS_WEBHOOK_FLUSH_SECONDS,
+    TAVUS_WEBHOOK_QUEUE_DEPTH,
+)
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_PATH = os.path.join(REPO_ROOT, "data", "tavus_webhooks.sqlite3")
+
+
+class InvalidWebhook(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class WebhookEvent:
+    received_at: float
+    conversation_id: str
+    event_type: str
+    payload: dict
+
+    @classmethod
+    def parse(cls, body, received_at: float) -> "WebhookEvent":
+        """Validate a callback body; raises ``InvalidWebhook``."""
+        if not isinstance(body, dict):
+            raise InvalidWebhook("Webhook body must be a JSON object")
+        conversation_id = body.get("conversation_id")
+        event_type = body.get("event_type")
+        if not isinstance(conversation_id, str) or not conversation_id:
+            raise InvalidWebhook("conversation_id is required")
+        if not isinstance(event_type, str) or not event_type:
+            raise InvalidWebhook("event_type is required")
+        return cls(received_at, conversation_id, event_type, body)
+
+
+class SQLiteEventStore:
+    """Append-only table of webhook events."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Se abre en el primer uso: importar el backend no crea archivos.
+        if self._conn is None:
+            if self.path != ":memory:":
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None, timeout=5
+            )
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS tavus_webhook_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    received_at REAL NOT NULL,
+                    conversation_id TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    payload TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS tavus_webhook_events_conversation
+                    ON tavus_webhook_events (conversation_id, id);
+                """
+            )
+        return self._conn
+
+    def write(self, events: list[WebhookEvent]) -> None:
+        rows = [
+            (
+                event.received_at,
+                event.conversation_id,
+                event.event_type,
+                json.dumps(event.payload, ensure_ascii=False),
+            )
+            for event in events
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT INTO tavus_webhook_events "
+                    "(received_at, conversation_id, event_type, payload) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def iter_events(
+        self,
+        since: float = 0.0,
+        conversation_id: str | None = None,
+        event_type: str | None = None,
+    ) -> Iterator[WebhookEvent]:
+        query = (
+            "SELECT received_at, conversation_id, event_type, payload "
+            "FROM tavus_webhook_events WHERE received_at >= ?"
+        )
+        params: list = [since]
+        if conversation_id:
+            query += " AND conversation_id = ?"
+            params.append(conversation_id)
+        if event_type:
+            query += " AND event_type = ?"
+            params.append(event_type)
+        with self._lock:
+            rows = self._connect().execute(query + " ORDER BY id", params).fetchall()
+        for received_at, cid, kind, payload in rows:
+            yield WebhookEvent(received_at, cid, kind, json.loads(payload))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class WebhookIngestor:
+    def __init__(
+        self,
+        store: SQLiteEventStore,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+    ):
+        self.store = store
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[WebhookEvent] = asyncio.Queue(max_queue)
+        # Lote en armado; drain() lo escribe si el writer se cancela a mitad.
+        self._batch: list[WebhookEvent] = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, event: WebhookEvent) -> bool:
+        """Queue ``event`` for the writer; ``False`` if the queue is full."""
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            TAVUS_WEBHOOK_EVENTS.labels(result="rejected").inc()
+            return False
+        TAVUS_WEBHOOK_EVENTS.labels(result="accepted").inc()
+        TAVUS_WEBHOOK_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    async def _next_batch(self) -> list[WebhookEvent]:
+        self._batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(self._batch) < self.batch_size:
+            if not self._queue.empty():
+                self._batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self._batch.append(
+                    await asyncio.wait_for(self._queue.get(), remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+        batch, self._batch = self._batch, []
+        return batch
+
+    def _write(self, batch: list[WebhookEvent]) -> None:
+        started = time.perf_counter()
+        try:
+            self.store.write(batch)
+        except Exception:
+            logger.exception("No se pudo guardar un lote de %d webhooks", len(batch))
+            TAVUS_WEBHOOK_EVENTS.labels(result="lost").inc(len(batch))
+            return
+        TAVUS_WEBHOOK_EVENTS.labels(result="stored").inc(len(batch))
+        TAVUS_WEBHOOK_BATCH_SIZE.observe(len(batch))
+        TAVUS_WEBHOOK_FLUSH_SECONDS.observe(time.perf_counter() - started)
+
+    async def run(self) -> None:
+        """Writer loop; runs until cancelled."""
+        while True:
+            batch = await self._next_batch()
+            TAVUS_WEBHOOK_QUEUE_DEPTH.set(self._queue.qsize())
+            await asyncio.to_thread(self._write, batch)
+
+    def drain(self) -> None:
+        """Write whatever is still queued (on shutdown, after cancelling ``run``)."""
+        batch, self._batch = self._batch, []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+        TAVUS_WEBHOOK_QUEUE_DEPTH.set(0)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Print or replay stored Tavus webhook events."
+    )
+    parser.add_argument("--db", default=os.getenv("TAVUS_WEBHOOK_PATH", DEFAULT_PATH))
+    parser.add_argument("--since", type=float, default=0.0, help="Unix timestamp")
+    parser.add_argument("--conversation-id")
+    parser.add_argument("--event-type")
+    parser.add_argument(
+        "--target", help="Webhook URL to POST each event to, in order"
+    )
+    args = parser.parse_args(argv)
+
+    store = SQLiteEventStore(args.db)
+    events = store.iter_events(args.since, args.conversation_id, args.event_type)
+    try:
+        if not args.target:
+            for event in events:
+                sys.stdout.write(json.dumps(event.payload, ensure_ascii=False) + "\n")
+            return 0
+        import httpx
+
+        failed = replayed = 0
+        with httpx.Client(timeout=10) as http_client:
+            for event in events:
+                response = http_client.post(args.target, json=event.payload)
+                replayed += 1
+                if response.status_code >= 400:
+                    failed += 1
+                    print(
+                        f"{event.conversation_id} {event.event_type}: "
+                        f"HTTP {response.status_code}",
+                        file=sys.stderr,
+                    )
+        print(f"Replayed {replayed} events, {failed} failed", file=sys.stderr)
+        return 1 if failed else 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
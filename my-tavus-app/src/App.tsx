@@ -4,11 +4,19 @@ import { Conversation } from "./components/cvi/components/conversation";
 import { AvatarLayout, ControlButton } from "./components/sommelier-layout";
 import { 
   createConversation, 
+  endConversation,
   getConversationalContext,
   clearConversationalContext,
-  saveConversationalContext 
+  saveConversationalContext,
+  sendConversationHeartbeat,
+  HEARTBEAT_INTERVAL_MS,
 } from "./components/cvi/api";
 
+type ActiveConversation = {
+  conversationId: string;
+  controlToken: string;
+};
+
 const parseVoicePropertiesFromEnv = (): Record<string, unknown> => {
   const rawVoiceProperties = import.meta.env.VITE_TAVUS_VOICE_PROPERTIES_JSON;
   if (!rawVoiceProperties) {
@@ -33,6 +41,8 @@ const App: React.FC = () => {
     import.meta.env.VITE_SHOW_LAYOUT_VERIFICATION !== "false";
 
   const [conversationUrl, setConversationUrl] = useState<string | null>(null);
+  const [activeConversation, setActiveConversation] =
+    useState<ActiveConversation | null>(null);
   const [backendReply, setBackendReply] = useState<string>("");
   const [conversationalContext, setConversationalContext] = useState<string | null>(null);
   const [hasContextAvailable, setHasContextAvailable] = useState(false);
@@ -92,6 +102,31 @@ const App: React.FC = () => {
     }
   }, []);
 
+  // Mientras la llamada está abierta avisamos al backend que sigue en uso;
+  // al cerrar la pestaña la terminamos para liberar el cupo de Tavus.
+  useEffect(() => {
+    if (!activeConversation) {
+      return;
+    }
+    const { conversationId, controlToken } = activeConversation;
+    const beat = () => {
+      sendConversationHeartbeat(BACKEND_URL, conversationId, controlToken).catch(
+        (error) => console.warn("No se pudo enviar el heartbeat", error),
+      );
+    };
+    const handlePageHide = () => {
+      endConversation(BACKEND_URL, conversationId, controlToken).catch(() => {});
+    };
+
+    beat();
+    const interval = window.setInterval(beat, HEARTBEAT_INTERVAL_MS);
+    window.addEventListener("pagehide", handlePageHide);
+    return () => {
+      window.clearInterval(interval);
+      window.removeEventListener("pagehide", handlePageHide);
+    };
+  }, [activeConversation, BACKEND_URL]);
+
   const startConversation = async (useContext: boolean = false) => {
     try {
       // 1. Llamar al backend para obtener respuesta del LLM
@@ -127,6 +162,12 @@ const App: React.FC = () => {
       );
 
       setConversationUrl(data.conversation_url);
+      if (data.conversation_id && data.control_token) {
+        setActiveConversation({
+          conversationId: data.conversation_id,
+          controlToken: data.control_token,
+        });
+      }
       
       // Si estamos iniciando una nueva conversación sin contexto, limpiar el guardado
       if (!useContext) {
@@ -152,6 +193,13 @@ const App: React.FC = () => {
       setConversationalContext(context);
       setHasContextAvailable(true);
     }
+    if (activeConversation) {
+      const { conversationId, controlToken } = activeConversation;
+      endConversation(BACKEND_URL, conversationId, controlToken).catch((error) =>
+        console.warn("No se pudo terminar la conversación", error),
+      );
+      setActiveConversation(null);
+    }
     setConversationUrl(null);
     // Resetear autoplay para Safari
     if (isSafariIOS) {
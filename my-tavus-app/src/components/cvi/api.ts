@@ -36,7 +36,7 @@ export async function createConversation(
     payload.conversational_context = conversationalContext;
   }
 
-  const response = await fetch(`${backendUrl}/tavus/conversations`, {
+  let response = await fetch(`${backendUrl}/tavus/conversations`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
@@ -44,6 +44,17 @@ export async function createConversation(
     body: JSON.stringify(payload),
   });
 
+  // Cuota de Tavus llena: el backend devuelve un turno en la cola (202)
+  // y hay que consultarlo hasta que nos toque.
+  while (response.status === 202) {
+    const ticket = await response.json();
+    const retryAfter = Number(response.headers.get("Retry-After")) || 5;
+    await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+    response = await fetch(
+      `${backendUrl}/tavus/conversations/queue/${ticket.ticket_id}`,
+    );
+  }
+
   if (!response.ok) {
     throw new Error(`Error creando conversación: ${response.status}`);
   }
@@ -51,6 +62,49 @@ export async function createConversation(
   return response.json();
 }
 
+// El backend cierra las conversaciones que dejan de mandar heartbeat, así
+// liberan el cupo de Tavus. `controlToken` viene en la respuesta de
+// createConversation.
+export const HEARTBEAT_INTERVAL_MS = 30_000;
+
+export async function sendConversationHeartbeat(
+  backendUrl: string,
+  conversationId: string,
+  controlToken: string,
+) {
+  const response = await fetch(
+    `${backendUrl}/tavus/conversations/${conversationId}/heartbeat`,
+    {
+      method: "POST",
+      headers: { "X-Conversation-Token": controlToken },
+    },
+  );
+
+  if (!response.ok) {
+    throw new Error(`Error enviando heartbeat: ${response.status}`);
+  }
+}
+
+export async function endConversation(
+  backendUrl: string,
+  conversationId: string,
+  controlToken: string,
+) {
+  // keepalive: el pedido sale aunque la pestaña se esté cerrando.
+  const response = await fetch(
+    `${backendUrl}/tavus/conversations/${conversationId}/end`,
+    {
+      method: "POST",
+      headers: { "X-Conversation-Token": controlToken },
+      keepalive: true,
+    },
+  );
+
+  if (!response.ok) {
+    throw new Error(`Error terminando conversación: ${response.status}`);
+  }
+}
+
 export async function listVideos(apiKey: string) {
   const response = await fetch("https://tavusapi.com/v2/videos", {
     method: "GET",
@@ -0,0 +1,12 @@
+import os
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+SECRETS_PATH = os.path.join("config", "secrets.env")
+
+
+@lru_cache(maxsize=None)
+def load_secrets() -> None:
+    """Load config/secrets.env into the environment once per process."""
+    load_dotenv(dotenv_path=SECRETS_PATH)
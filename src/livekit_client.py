@@ -1,11 +1,13 @@
 import os
 import socket
-from dotenv import load_dotenv
+
+from src.config import load_secrets
 
 
 class LiveKitClient:
     def __init__(self):
-        load_dotenv(dotenv_path=os.path.join("config", "secrets.env"))
+        # Cargar secrets.env desde config/ (una sola vez por proceso)
+        load_secrets()
         self.api_url = os.getenv("LIVEKIT_API_URL", "http://localhost:7880")
         self.api_key = os.getenv("LIVEKIT_API_KEY", "")
         self.api_secret = os.getenv("LIVEKIT_API_SECRET", "")
@@ -1,24 +1,84 @@
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
 import requests
-from typing import Optional, Dict, Any
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.config import load_secrets
+
+# Recursos paginados de la API (GET /<recurso>?page=N&limit=M).
+LISTABLE_RESOURCES = ("videos", "replicas", "personas", "conversations")
 
 
 class TavusClient:
-    def __init__(self):
-        # Cargar secrets.env desde config/
-        load_dotenv(dotenv_path=os.path.join("config", "secrets.env"))
+    """Tavus API client over one pooled ``requests.Session``.
+
+    GETs are retried with exponential backoff on 429/5xx (honouring
+    ``Retry-After``); conversation creation is never retried. Listings
+    remember each page's ETag, so asking for an unchanged page again costs
+    a ``304 Not Modified`` instead of the full body.
+    """
+
+    def __init__(
+        self,
+        page_size: int = 100,
+        etag_cache_size: int = 128,
+        max_retries: int = 3,
+        pool_size: int = 10,
+    ):
+        # Cargar secrets.env desde config/ (una sola vez por proceso)
+        load_secrets()
         self.api_url = os.getenv("TAVUS_API_URL", "https://api.tavus.io/v2")
         self.api_key = os.getenv("TAVUS_API_KEY", "")
         # Verify that API key is loaded (don't log the actual key)
         if not self.api_key:
             raise ValueError("TAVUS_API_KEY not found in environment variables")
+        self.page_size = page_size
+        self.etag_cache_size = etag_cache_size
+        self.session = requests.Session()
+        self.session.headers.update(
+            {"Content-Type": "application/json", "x-api-key": self.api_key}
+        )
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._etags: OrderedDict[Tuple, Tuple[str, Any]] = OrderedDict()
+        self._etag_lock = threading.Lock()
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+
+    def _url(self, path: str) -> str:
+        return f"{self.api_url.rstrip('/')}/{path.lstrip('/')}"
+
+    def close(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def __enter__(self) -> "TavusClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def test_connection(self) -> bool:
         try:
-            headers = {"Content-Type": "application/json", "x-api-key": self.api_key}
-            response = requests.get(
-                f"{self.api_url}/videos", headers=headers, timeout=10
+            # limit=1: alcanza para validar key y conectividad sin bajar el listado.
+            response = self.session.get(
+                self._url("videos"), params={"limit": 1}, timeout=10
             )
             # Log status code only, not response body (may contain sensitive data)
             if response.status_code != 200:
@@ -31,6 +91,85 @@ class TavusClient:
             print(f"Error en Tavus: {e}")
             return False
 
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET ``path`` with If-None-Match; a 304 returns the cached body."""
+        url = self._url(path)
+        cache_key = (url, tuple(sorted((params or {}).items())))
+        with self._etag_lock:
+            cached = self._etags.get(cache_key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.session.get(url, params=params, headers=headers, timeout=10)
+        if response.status_code == 304 and cached:
+            with self._etag_lock:
+                if cache_key in self._etags:
+                    self._etags.move_to_end(cache_key)
+            return cached[1]
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            with self._etag_lock:
+                self._etags[cache_key] = (etag, body)
+                self._etags.move_to_end(cache_key)
+                while len(self._etags) > self.etag_cache_size:
+                    self._etags.popitem(last=False)
+        return body
+
+    def _get_page(
+        self, resource: str, page: int, page_size: int, params: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        body = self.get_json(resource, {**params, "page": page, "limit": page_size})
+        if isinstance(body, list):
+            return body, None
+        return body.get("data", []), body.get("total_count")
+
+    def _prefetch(self, *args) -> Future:
+        if self._prefetcher is None:
+            self._prefetcher = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="tavus-prefetch"
+            )
+        return self._prefetcher.submit(self._get_page, *args)
+
+    def iter_resource(
+        self,
+        resource: str,
+        page_size: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every item of a paginated listing, one page in memory at a time.
+
+        The next page is requested in the background while the caller
+        consumes the current one.
+        """
+        if resource not in LISTABLE_RESOURCES:
+            raise ValueError(f"Unknown Tavus resource: {resource}")
+        page_size = page_size or self.page_size
+        params = dict(params or {})
+        page = 1
+        pending: Optional[Future] = self._prefetch(resource, page, page_size, params)
+        seen = 0
+        while pending is not None:
+            items, total = pending.result()
+            seen += len(items)
+            has_more = len(items) == page_size and (total is None or seen < total)
+            page += 1
+            pending = (
+                self._prefetch(resource, page, page_size, params) if has_more else None
+            )
+            yield from items
+
+    def iter_videos(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        return self.iter_resource("videos", **kwargs)
+
+    def iter_replicas(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        return self.iter_resource("replicas", **kwargs)
+
+    def iter_personas(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        return self.iter_resource("personas", **kwargs)
+
+    def iter_conversations(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        return self.iter_resource("conversations", **kwargs)
+
     def create_conversation(
         self, context: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
@@ -43,13 +182,11 @@ class TavusClient:
             "conversational_context": context or {},
         }
 
-        headers = {"Content-Type": "application/json", "x-api-key": self.api_key}
-
         try:
-            response = requests.post(
-                f"{self.api_url}/conversations",
+            # Sin reintentos: un POST repetido podría crear dos conversaciones.
+            response = self.session.post(
+                self._url("conversations"),
                 json=payload,
-                headers=headers,
                 timeout=10,
             )
             # Log status code only, not response body (may contain sensitive data)